@@ -0,0 +1,84 @@
+"""
+Corpus embedding throughput for the store build: corpus order versus length-sorted batches.
+
+Encodes the first N chunks of the chunk file into an empty embedding cache, the way
+create_vector_store.py does on a cold build, and reports chunks per second for:
+
+- `corpus-order`: one process, batches in file order (how the build encoded before);
+- `length-sorted`: CorpusEncoder and encode_corpus, with the given process counts.
+
+Usage:
+    python benchmarks/corpus_encoding.py
+    python benchmarks/corpus_encoding.py --chunks 2000 --batch-size 64 --workers 1 2 4 --json encode.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from itertools import islice
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.retrieval.chunk_stream import CHUNKS_FILE, iter_chunks  # noqa: E402
+from src.retrieval.corpus_encoder import (EMBED_ENCODE_BATCH, CorpusEncoder, encode_corpus, encode_texts,  # noqa: E402
+                                          load_model, plan_workers, usable_cores)
+from src.retrieval.embedding_cache import EmbeddingCache  # noqa: E402
+
+
+def corpus_order(model, texts, batch_size: int) -> float:
+    started = time.perf_counter()
+    for i in range(0, len(texts), batch_size):
+        # One call per batch, so sentence-transformers cannot sort across batches either
+        encode_texts(model, texts[i:i + batch_size], batch_size)
+    return time.perf_counter() - started
+
+
+def length_sorted(model_name: str, texts, batch_size: int, workers: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = EmbeddingCache(os.path.join(tmp, "embeddings.sqlite3"))
+        with CorpusEncoder(model_name, plan_workers(workers), batch_size) as encoder:
+            # Load the model(s) first; only the encoding is timed
+            list(encoder.map([texts[:1]] * encoder.workers))
+            stats = encode_corpus(texts, cache, encoder)
+        cache.close()
+    return stats.seconds, encoder.workers
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default=os.getenv("EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2"))
+    parser.add_argument("--chunks-file", default=CHUNKS_FILE)
+    parser.add_argument("--chunks", type=int, default=2000, help="Chunks to encode per run.")
+    parser.add_argument("--batch-size", type=int, default=EMBED_ENCODE_BATCH)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1], help="Encode process counts to try.")
+    parser.add_argument("--json", help="Write the results to this file.")
+    args = parser.parse_args()
+
+    texts = [c["text"] for c in islice(iter_chunks(args.chunks_file), args.chunks)]
+    model = load_model(args.model)
+    encode_texts(model, texts[:args.batch_size], args.batch_size)  # warm up
+
+    results = [{"mode": "corpus-order", "workers": 1, "seconds": corpus_order(model, texts, args.batch_size)}]
+    for workers in args.workers:
+        seconds, started = length_sorted(args.model, texts, args.batch_size, workers)
+        results.append({"mode": "length-sorted", "workers": started, "seconds": seconds})
+    for row in results:
+        row["seconds"] = round(row["seconds"], 2)
+        row["chunks_per_second"] = round(len(texts) / row["seconds"], 1)
+
+    print(f"{len(texts)} chunks, batches of {args.batch_size}, {len(usable_cores())} usable core(s)\n")
+    print(f"{'mode':<14} {'processes':>9} {'seconds':>8} {'chunks/s':>9}")
+    for row in results:
+        print(f"{row['mode']:<14} {row['workers']:>9} {row['seconds']:>8} {row['chunks_per_second']:>9}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"chunks": len(texts), "batch_size": args.batch_size, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
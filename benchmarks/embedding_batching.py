@@ -0,0 +1,116 @@
+"""
+Query embedding throughput and latency: one encode call per request versus the micro-batcher.
+
+Each of C client threads embeds single queries back to back (the way concurrent /query and
+/search requests do). For every concurrency level the script reports queries per second and
+the p50/p95 latency of one embedding, first calling `model.encode` directly and then through
+EmbeddingBatcher.
+
+Usage:
+    python benchmarks/embedding_batching.py
+    python benchmarks/embedding_batching.py --concurrency 1 8 32 --max-wait-ms 2 --threads 1 --json embed.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.retrieval.embedding_batcher import EMBED_MAX_BATCH, EMBED_MAX_WAIT_MS, EmbeddingBatcher  # noqa: E402
+
+QUERIES = [
+    "how do I register a zero FIR",
+    "punishment for theft of a mobile phone",
+    "what happens after a police complaint is filed",
+    "medical examination of a rape victim",
+    "can the police refuse to register my complaint",
+    "anticipatory bail procedure",
+    "time limit for filing the charge sheet",
+    "rights of an arrested person",
+]
+
+
+def run_clients(encode, concurrency: int, per_client: int) -> Dict[str, Any]:
+    latencies: List[float] = []
+    lock = threading.Lock()
+    start_gate = threading.Barrier(concurrency + 1)
+
+    def client(worker: int):
+        own = []
+        start_gate.wait()
+        for i in range(per_client):
+            query = QUERIES[(worker + i) % len(QUERIES)]
+            started = time.perf_counter()
+            encode([query])
+            own.append(time.perf_counter() - started)
+        with lock:
+            latencies.extend(own)
+
+    threads = [threading.Thread(target=client, args=(w,)) for w in range(concurrency)]
+    for t in threads:
+        t.start()
+    start_gate.wait()
+    started = time.perf_counter()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    ms = np.array(latencies) * 1000
+    return {
+        "concurrency": concurrency,
+        "queries": len(latencies),
+        "qps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(float(np.percentile(ms, 50)), 2),
+        "p95_ms": round(float(np.percentile(ms, 95)), 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default=os.getenv("EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2"))
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=256, help="Embeddings per concurrency level.")
+    parser.add_argument("--max-batch", type=int, default=EMBED_MAX_BATCH)
+    parser.add_argument("--max-wait-ms", type=float, default=EMBED_MAX_WAIT_MS)
+    parser.add_argument("--threads", type=int, default=None, help="torch intra-op threads (default: torch's).")
+    parser.add_argument("--json", help="Write the results to this file.")
+    args = parser.parse_args()
+
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+    model = SentenceTransformer(args.model)
+    batcher = EmbeddingBatcher(model, max_batch=args.max_batch, max_wait_ms=args.max_wait_ms, threads=args.threads)
+    direct = lambda texts: model.encode(texts, convert_to_numpy=True, show_progress_bar=False)  # noqa: E731
+    direct(QUERIES)  # warm up
+
+    results = []
+    for concurrency in args.concurrency:
+        per_client = max(1, args.requests // concurrency)
+        for mode, encode in (("direct", direct), ("batched", batcher.encode)):
+            row = {"mode": mode, **run_clients(encode, concurrency, per_client)}
+            results.append(row)
+
+    print(f"torch threads: {torch.get_num_threads()}, max batch {args.max_batch}, max wait {args.max_wait_ms} ms\n")
+    print(f"{'clients':>8} {'mode':<8} {'queries/s':>10} {'p50 ms':>8} {'p95 ms':>8}")
+    for row in results:
+        print(f"{row['concurrency']:>8} {row['mode']:<8} {row['qps']:>10} {row['p50_ms']:>8} {row['p95_ms']:>8}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"torch_threads": torch.get_num_threads(), "max_batch": args.max_batch,
+                       "max_wait_ms": args.max_wait_ms, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Import-time profile of the server entry point.
+
+Imports the module in a fresh interpreter under `python -X importtime`, prints the slowest
+imports and fails (exit code 1) when:
+- the total import time or the idle RSS is over budget, or
+- a library that should only load on demand (torch, sentence_transformers, faiss,
+  google.genai, ...) was pulled in by the import.
+
+Usage:
+    python benchmarks/import_profile.py
+    python benchmarks/import_profile.py --max-ms 1500 --max-rss-mb 200 --top 15 --json profile.json
+"""
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_MODULE = "src.server.app"
+
+# Budgets for importing the server app (no engine loaded yet)
+IMPORT_BUDGET_MS = float(os.getenv("IMPORT_BUDGET_MS", 1500))
+RSS_BUDGET_MB = float(os.getenv("IMPORT_RSS_BUDGET_MB", 200))
+
+# Loaded only by the component that needs them (semantic phase, first LLM call, ...)
+LAZY_MODULES = (
+    "torch",
+    "transformers",
+    "sentence_transformers",
+    "faiss",
+    "google.genai",
+    "rank_bm25",
+)
+
+IMPORTTIME_RE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s+)(\S+)$")
+
+CHILD_SCRIPT = """
+import json, sys
+import {module}
+try:
+    import resource
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    rss_mb = rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+except ImportError:
+    rss_mb = None
+print(json.dumps({{"rss_mb": rss_mb, "modules": sorted(sys.modules)}}))
+"""
+
+
+def parse_importtime(stderr: str) -> List[Dict[str, Any]]:
+    """Rows of `-X importtime` output: module, self/cumulative microseconds and nesting depth."""
+    rows = []
+    for line in stderr.splitlines():
+        match = IMPORTTIME_RE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            rows.append({
+                "module": name,
+                "self_us": int(self_us),
+                "cumulative_us": int(cumulative_us),
+                "depth": (len(indent) - 1) // 2,
+            })
+    return rows
+
+
+def profile_import(module: str = DEFAULT_MODULE, python: str = sys.executable) -> Dict[str, Any]:
+    env = {**os.environ, "PYTHONPATH": str(REPO_ROOT)}
+    proc = subprocess.run(
+        [python, "-X", "importtime", "-c", CHILD_SCRIPT.format(module=module)],
+        cwd=REPO_ROOT, env=env, capture_output=True, text=True
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{proc.stderr[-2000:]}")
+
+    rows = parse_importtime(proc.stderr)
+    child = json.loads(proc.stdout.strip().splitlines()[-1])
+    loaded = set(child["modules"])
+    return {
+        "module": module,
+        "total_ms": round(sum(r["cumulative_us"] for r in rows if r["depth"] == 0) / 1000, 1),
+        "rss_mb": round(child["rss_mb"], 1) if child["rss_mb"] is not None else None,
+        "eager_heavy_modules": [m for m in LAZY_MODULES if m in loaded],
+        "slowest": sorted(rows, key=lambda r: r["cumulative_us"], reverse=True),
+    }
+
+
+def check_budgets(profile: Dict[str, Any], max_ms: float, max_rss_mb: Optional[float]) -> List[str]:
+    failures = []
+    if profile["total_ms"] > max_ms:
+        failures.append(f"import took {profile['total_ms']} ms (budget {max_ms} ms)")
+    if max_rss_mb is not None and profile["rss_mb"] is not None and profile["rss_mb"] > max_rss_mb:
+        failures.append(f"idle RSS is {profile['rss_mb']} MB (budget {max_rss_mb} MB)")
+    if profile["eager_heavy_modules"]:
+        failures.append(f"imported eagerly: {', '.join(profile['eager_heavy_modules'])}")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default=DEFAULT_MODULE)
+    parser.add_argument("--max-ms", type=float, default=IMPORT_BUDGET_MS)
+    parser.add_argument("--max-rss-mb", type=float, default=RSS_BUDGET_MB)
+    parser.add_argument("--top", type=int, default=15, help="How many of the slowest imports to list.")
+    parser.add_argument("--json", help="Also write the full profile to this file.")
+    args = parser.parse_args()
+
+    profile = profile_import(args.module)
+    print(f"import {profile['module']}: {profile['total_ms']} ms, RSS {profile['rss_mb']} MB")
+    print(f"\n{'cumulative ms':>14} {'self ms':>9}  module")
+    for row in profile["slowest"][:args.top]:
+        print(f"{row['cumulative_us'] / 1000:>14.1f} {row['self_us'] / 1000:>9.1f}  {'  ' * row['depth']}{row['module']}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(profile, f, indent=2)
+
+    failures = check_budgets(profile, args.max_ms, args.max_rss_mb)
+    if failures:
+        print("\nFAILED: " + "; ".join(failures))
+        sys.exit(1)
+    print("\nOK: within budget")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Line-scanner throughput of the ingestion parser, in lines per second.
+
+Reads every file in the ingestion manifest into memory once, then feeds all lines through
+StatefulParser.parse_line for several rounds (no file I/O, one process), so the figure is the
+cost of the scanner itself.
+
+Usage:
+    python benchmarks/ingest_scanner.py
+    python benchmarks/ingest_scanner.py --rounds 20 --json scanner.json
+    python benchmarks/ingest_scanner.py --app-root /path/to/older/checkout   # before/after comparison
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs-dir", default=str(REPO_ROOT / "documents"))
+    parser.add_argument("--manifest", default=str(REPO_ROOT / "ingest_manifest.json"))
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--app-root", type=Path, default=REPO_ROOT, help="Source tree whose parser is measured.")
+    parser.add_argument("--json", help="Write the results to this file.")
+    args = parser.parse_args()
+
+    sys.path.insert(0, str(args.app_root))
+    import ingest_legal_docs as ingest
+
+    with open(args.manifest, "r", encoding="utf-8") as f:
+        sources = json.load(f)["sources"]
+    documents = []
+    for entry in sources:
+        path = Path(args.docs_dir) / entry["path"]
+        files = sorted(path.glob(entry.get("pattern", "*.md"))) if path.is_dir() else [path] if path.is_file() else []
+        for file in files:
+            with open(file, "r", encoding="utf-8") as f:
+                documents.append((entry.get("context", {}), f.readlines()))
+    total_lines = sum(len(lines) for _, lines in documents)
+
+    timings = []
+    for _ in range(args.rounds):
+        started = time.perf_counter()
+        chunks = 0
+        for context, lines in documents:
+            state = ingest.StatefulParser()
+            for key, value in context.items():
+                setattr(state.context, key, value)
+            for line in lines:
+                state.parse_line(line)
+            state.flush_buffer()
+            chunks += len(state.chunks)
+        timings.append(time.perf_counter() - started)
+
+    best = min(timings)
+    result = {
+        "files": len(documents),
+        "lines": total_lines,
+        "chunks": chunks,
+        "rounds": args.rounds,
+        "best_seconds": round(best, 4),
+        "lines_per_second": round(total_lines / best),
+    }
+    print(f"{result['files']} files, {total_lines} lines, {chunks} chunks")
+    print(f"best of {args.rounds}: {best * 1000:.1f} ms -> {result['lines_per_second']:,} lines/s")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,6 @@
+"""
+Retrieval benchmark suite: a labelled golden query set, per-stage latency and ranking quality.
+
+    python benchmarks/retrieval/run.py --json results.json
+    python benchmarks/retrieval/run.py --compare baseline.json
+"""
@@ -0,0 +1,29 @@
+import json
+from pathlib import Path
+from typing import Any, Dict, Iterable, List
+
+GOLDEN_SET = Path(__file__).resolve().parent / "golden_set.json"
+
+
+def load_golden_set(path=GOLDEN_SET) -> List[Dict[str, Any]]:
+    with open(path, "r", encoding="utf-8") as f:
+        queries = json.load(f)["queries"]
+    for entry in queries:
+        if not entry.get("query") or not entry.get("expected"):
+            raise ValueError(f"Golden query {entry.get('id')!r} needs a query and at least one expected target")
+    return queries
+
+
+def matches(chunk: Dict[str, Any], target: Dict[str, str]) -> bool:
+    """A chunk is relevant to a target when its metadata has every field of the target."""
+    meta = chunk.get("metadata", {})
+    return all(str(meta.get(field)) == str(value) for field, value in target.items())
+
+
+def missing_targets(queries: Iterable[Dict[str, Any]], chunks: Iterable[Dict[str, Any]]) -> List[str]:
+    """Expected targets no chunk matches (a typo in the golden set, or a section dropped from the corpus)."""
+    targets = {json.dumps(t, sort_keys=True): t for entry in queries for t in entry["expected"]}
+    found = set()
+    for chunk in chunks:
+        found.update(key for key, target in targets.items() if key not in found and matches(chunk, target))
+    return sorted(set(targets) - found)
@@ -0,0 +1,37 @@
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+
+from .golden import matches
+
+
+def latency_summary(seconds: Sequence[float]) -> Dict[str, float]:
+    ms = np.asarray(seconds, dtype=float) * 1000
+    if not len(ms):
+        return {"mean": 0.0, "p50": 0.0, "p95": 0.0, "p99": 0.0}
+    return {
+        "mean": round(float(ms.mean()), 3),
+        "p50": round(float(np.percentile(ms, 50)), 3),
+        "p95": round(float(np.percentile(ms, 95)), 3),
+        "p99": round(float(np.percentile(ms, 99)), 3),
+    }
+
+
+def first_relevant_rank(results: List[Dict[str, Any]], targets: List[Dict[str, str]]) -> int:
+    """1-based rank of the first result matching any target, or 0 if none does."""
+    for rank, result in enumerate(results, start=1):
+        if any(matches(result["chunk"], t) for t in targets):
+            return rank
+    return 0
+
+
+def recall_at(results: List[Dict[str, Any]], targets: List[Dict[str, str]], k: int) -> float:
+    """Share of the targets matched by at least one of the top k results."""
+    top = [r["chunk"] for r in results[:k]]
+    return sum(any(matches(chunk, t) for chunk in top) for t in targets) / len(targets)
+
+
+def quality_summary(per_query: List[Dict[str, Any]], cutoffs: Sequence[int]) -> Dict[str, float]:
+    summary = {f"recall@{k}": round(float(np.mean([q["recall"][str(k)] for q in per_query])), 4) for k in cutoffs}
+    summary["mrr"] = round(float(np.mean([1 / q["rank"] if q["rank"] else 0.0 for q in per_query])), 4)
+    return summary
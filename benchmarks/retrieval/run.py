@@ -0,0 +1,227 @@
+"""
+Retrieval latency per stage and ranking quality on the golden query set.
+
+Every golden query goes through the retrieval-only pipeline of /api/v1/search one stage at a
+time, for each configuration (a hybrid weight, or BM25 alone):
+
+- encode: the query embedding (model.encode directly, not through the micro-batcher);
+- faiss: the index lookup for 2k candidates;
+- bm25: scoring every chunk;
+- fusion: combining the two into the top k;
+- prioritize, expand: the orchestrator's priority boosts and parent expansion.
+
+Each stage is timed separately over `--repeat` passes. The script reports p50/p95/p99 per stage
+and end to end, queries per second (one client, queries back to back), recall@k and MRR. It
+writes everything to JSON. `--compare` prints the change against an earlier results file, e.g.
+one saved at the previous commit.
+
+Usage (from a directory with a built data/vector_store and a GEMINI_API_KEY set; any value
+works, since no LLM is called):
+    python benchmarks/retrieval/run.py
+    python benchmarks/retrieval/run.py --weights 0.5 0.3 --lexical --repeat 5 --json results.json
+    python benchmarks/retrieval/run.py --compare results.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+REPO_ROOT = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+from benchmarks.retrieval.golden import GOLDEN_SET, load_golden_set  # noqa: E402
+from benchmarks.retrieval.metrics import (first_relevant_rank, latency_summary, quality_summary,  # noqa: E402
+                                          recall_at)
+
+STAGES = ("encode", "faiss", "bm25", "fusion", "prioritize", "expand")
+
+
+def run_query(orchestrator, query: str, k: int, hybrid_weight: Optional[float]) -> Tuple[List[Dict], Dict[str, float]]:
+    """The retrieval-only pipeline for one query, stage by stage. `hybrid_weight=None` is BM25 only."""
+    engine = orchestrator.engine
+    clock = time.perf_counter
+    timings: Dict[str, float] = {}
+
+    if hybrid_weight is not None:
+        import faiss
+
+        start = clock()
+        vectors = engine.model.encode([query], convert_to_numpy=True)
+        faiss.normalize_L2(vectors)
+        timings["encode"] = clock() - start
+
+        start = clock()
+        distances, ids = engine.index.search(vectors, k * 2)
+        rows = engine.rows_for_ids(ids)
+        timings["faiss"] = clock() - start
+
+    start = clock()
+    bm25_scores = engine.bm25_scores(query)
+    timings["bm25"] = clock() - start
+
+    start = clock()
+    if hybrid_weight is None:
+        results = engine._lexical(query, k, bm25_scores=bm25_scores)
+    else:
+        results = engine._fuse(query, distances[0], rows[0], k, hybrid_weight, bm25_scores=bm25_scores)
+    timings["fusion"] = clock() - start
+
+    start = clock()
+    results = orchestrator.prioritize_results(results, orchestrator.search_intent(query))
+    timings["prioritize"] = clock() - start
+
+    start = clock()
+    results = orchestrator.expand_results(results)
+    timings["expand"] = clock() - start
+    return results, timings
+
+
+def run_config(orchestrator, golden: List[Dict[str, Any]], hybrid_weight: Optional[float], k: int,
+               cutoffs: Sequence[int], repeat: int = 3, warmup: int = 1) -> Dict[str, Any]:
+    for entry in golden[:warmup]:
+        run_query(orchestrator, entry["query"], k, hybrid_weight)
+
+    stage_times: Dict[str, List[float]] = {}
+    totals: List[float] = []
+    per_query: List[Dict[str, Any]] = []
+    started = time.perf_counter()
+    for attempt in range(repeat):
+        for entry in golden:
+            results, timings = run_query(orchestrator, entry["query"], k, hybrid_weight)
+            for stage, seconds in timings.items():
+                stage_times.setdefault(stage, []).append(seconds)
+            totals.append(sum(timings.values()))
+            if attempt == 0:
+                per_query.append({
+                    "id": entry["id"],
+                    "query": entry["query"],
+                    "rank": first_relevant_rank(results, entry["expected"]),
+                    "recall": {str(c): recall_at(results, entry["expected"], c) for c in cutoffs},
+                    "top": [r["chunk"].get("chunk_id") for r in results[:3]],
+                })
+    elapsed = time.perf_counter() - started
+
+    return {
+        "name": "lexical" if hybrid_weight is None else f"hybrid@{hybrid_weight}",
+        "hybrid_weight": hybrid_weight,
+        "k": k,
+        "queries": len(totals),
+        "qps": round(len(totals) / elapsed, 1),
+        "quality": quality_summary(per_query, cutoffs),
+        "latency_ms": {
+            **{stage: latency_summary(stage_times[stage]) for stage in STAGES if stage in stage_times},
+            "total": latency_summary(totals),
+        },
+        "per_query": per_query,
+    }
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_report(report: Dict[str, Any]):
+    print(f"{report['chunks']} chunks, store {report['store_version']}, {len(report['configs'][0]['per_query'])} "
+          f"golden queries, commit {report['commit']}\n")
+    quality_keys = list(report["configs"][0]["quality"])
+    print(f"{'config':<12} {'qps':>7} " + " ".join(f"{key:>9}" for key in quality_keys))
+    for config in report["configs"]:
+        print(f"{config['name']:<12} {config['qps']:>7} " +
+              " ".join(f"{config['quality'][key]:>9}" for key in quality_keys))
+
+    print(f"\n{'config':<12} {'stage':<11} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for config in report["configs"]:
+        for stage, summary in config["latency_ms"].items():
+            print(f"{config['name']:<12} {stage:<11} {summary['p50']:>8} {summary['p95']:>8} {summary['p99']:>8}")
+
+
+def compare(previous: Dict[str, Any], current: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Metric changes per configuration present in both result files."""
+    before = {config["name"]: config for config in previous["configs"]}
+    rows = []
+    for config in current["configs"]:
+        old = before.get(config["name"])
+        if old is None:
+            continue
+        metrics = {**{key: (old["quality"].get(key), value) for key, value in config["quality"].items()},
+                   "qps": (old["qps"], config["qps"])}
+        for pct in ("p50", "p95", "p99"):
+            metrics[f"total {pct} ms"] = (old["latency_ms"]["total"][pct], config["latency_ms"]["total"][pct])
+        old_ranks = {q["id"]: q["rank"] for q in old["per_query"]}
+        changed = [q["id"] for q in config["per_query"] if q["id"] in old_ranks and q["rank"] != old_ranks[q["id"]]]
+        rows.append({"name": config["name"], "metrics": metrics, "rank_changed": changed})
+    return rows
+
+
+def print_comparison(rows: List[Dict[str, Any]], previous_commit: Optional[str]):
+    print(f"\nCompared with {previous_commit or 'the previous run'}:")
+    for row in rows:
+        print(f"\n{row['name']}")
+        for metric, (old, new) in row["metrics"].items():
+            delta = "" if old is None else f"{new - old:+.4g}"
+            print(f"  {metric:<14} {str(old):>10} -> {str(new):<10} {delta}")
+        if row["rank_changed"]:
+            print(f"  first relevant rank changed for: {', '.join(row['rank_changed'])}")
+
+
+def main():
+    from src.retrieval.store import DEFAULT_STORE_DIR
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--store", default=DEFAULT_STORE_DIR)
+    parser.add_argument("--golden", default=str(GOLDEN_SET))
+    parser.add_argument("--k", type=int, default=10, help="Results per query.")
+    parser.add_argument("--cutoffs", type=int, nargs="+", default=[1, 3, 5, 10], help="recall@k cutoffs.")
+    parser.add_argument("--weights", type=float, nargs="+", default=[0.5], help="Hybrid weights to run (BM25 share).")
+    parser.add_argument("--lexical", action="store_true", help="Also run BM25 only.")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed passes over the golden set per configuration.")
+    parser.add_argument("--threads", type=int, default=None, help="torch / FAISS threads (default: the libraries').")
+    parser.add_argument("--json", help="Write the results to this file.")
+    parser.add_argument("--compare", help="Earlier results file to compare against.")
+    args = parser.parse_args()
+
+    from src.retrieval.orchestrator import LegalOrchestrator
+
+    golden = load_golden_set(args.golden)
+    orchestrator = LegalOrchestrator(args.store)
+    if args.threads:
+        from src.server.prefork import set_compute_threads
+        set_compute_threads(args.threads)
+
+    weights: List[Optional[float]] = list(args.weights) + ([None] if args.lexical else [])
+    cutoffs = sorted(c for c in set(args.cutoffs) if c <= args.k)
+    engine = orchestrator.engine
+    report = {
+        "commit": git_commit(),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "store_version": engine.store_version,
+        "embedding_model": os.getenv("EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2"),
+        "chunks": len(engine.chunks),
+        "python": platform.python_version(),
+        "golden_set": Path(args.golden).name,
+        "configs": [run_config(orchestrator, golden, w, args.k, cutoffs, args.repeat) for w in weights],
+    }
+    print_report(report)
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            previous = json.load(f)
+        print_comparison(compare(previous, report), previous.get("commit"))
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+"""
+Time and memory against corpus size: ingest -> store build -> retrieval benchmark on synthetic corpora.
+
+For each size the script writes a corpus with benchmarks/synthetic_corpus.py into its own
+working directory, then runs each step there as a separate process:
+
+- ingest: ingest_legal_docs.py --full over the generated documents;
+- store: create_vector_store.py (encoding, FAISS, BM25, manifest);
+- retrieval: benchmarks/retrieval/run.py with the corpus' own golden set of section queries.
+
+Each step reports wall time and the peak RSS of its main process (from wait4, Linux/macOS).
+Encode and ingest worker processes are not included; EMBED_WORKERS=1 and --ingest-workers 1
+keep everything in one process. `--random-vectors` fills the step's embedding cache with random
+unit vectors first, so the store build skips the model and measures the index and BM25 build on
+their own; encoding speed is covered by benchmarks/corpus_encoding.py. With random vectors
+only the hybrid latency means anything, not its recall. Results go to a JSON file and a table,
+and to a chart when matplotlib is installed (it is not a dependency of the repo).
+
+Usage (a GEMINI_API_KEY is needed by the retrieval step; any value works, no LLM is called):
+    python benchmarks/scaling.py --sizes 10000 100000 --random-vectors --work-dir /tmp/scaling
+    python benchmarks/scaling.py --sizes 100000 1000000 10000000 --random-vectors --chart scaling.png
+"""
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+from benchmarks.synthetic_corpus import generate_corpus  # noqa: E402
+
+STEPS = ("ingest", "store", "retrieval")
+
+
+def run_measured(command: List[str], cwd: Path, env: Dict[str, str], log_path: Path) -> Dict[str, Any]:
+    """Runs one step; returns its wall time and the peak RSS of its process."""
+    started = time.perf_counter()
+    with open(log_path, "w", encoding="utf-8") as log:
+        proc = subprocess.Popen(command, cwd=cwd, env=env, stdout=log, stderr=subprocess.STDOUT)
+        _, status, usage = os.wait4(proc.pid, 0)
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    seconds = time.perf_counter() - started
+    if proc.returncode != 0:
+        raise RuntimeError(f"{' '.join(command)} exited with {proc.returncode}; see {log_path}")
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak = usage.ru_maxrss * (1 if sys.platform == "darwin" else 1024)
+    return {"seconds": round(seconds, 2), "peak_rss_mb": round(peak / 2**20, 1)}
+
+
+def seed_random_vectors(chunks_path: Path, cache_path: Path, model_name: str, dim: int, batch: int = 10_000) -> int:
+    """Puts a random unit vector for every chunk text the cache lacks, as if the model had encoded it."""
+    import numpy as np
+
+    from src.retrieval.chunk_stream import iter_chunks
+    from src.retrieval.embedding_cache import EmbeddingCache, text_hash
+
+    rng = np.random.default_rng(0)
+    cache = EmbeddingCache(str(cache_path))
+    count = 0
+    try:
+        pending: Dict[str, Any] = {}
+        for chunk in iter_chunks(chunks_path):
+            pending[text_hash(chunk["text"])] = None
+            if len(pending) >= batch:
+                count += _put_random(cache, model_name, pending, dim, rng)
+                pending = {}
+        count += _put_random(cache, model_name, pending, dim, rng)
+    finally:
+        cache.close()
+    return count
+
+
+def _put_random(cache, model_name: str, pending: Dict[str, Any], dim: int, rng) -> int:
+    missing = cache.missing(model_name, pending)
+    if not missing:
+        return 0
+    vectors = rng.standard_normal((len(missing), dim)).astype("float32")
+    vectors /= (vectors ** 2).sum(axis=1, keepdims=True) ** 0.5
+    cache.put_many(model_name, dict(zip(missing, vectors)))
+    return len(missing)
+
+
+def dir_size(path: Path) -> int:
+    return sum(f.stat().st_size for f in path.rglob("*") if f.is_file())
+
+
+def run_size(size: int, work_dir: Path, args) -> Dict[str, Any]:
+    work_dir.mkdir(parents=True, exist_ok=True)
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, [str(REPO_ROOT), os.getenv("PYTHONPATH")])),
+           "EMBEDDING_CACHE_PATH": str(work_dir / "embeddings.sqlite3")}
+    env.setdefault("GEMINI_API_KEY", "unused")
+    if args.random_vectors:
+        env.setdefault("EMBED_WORKERS", "1")
+
+    started = time.perf_counter()
+    corpus = generate_corpus(work_dir, size, seed=args.seed, golden_queries=args.golden_queries)
+    row: Dict[str, Any] = {"target_chunks": size, "corpus": {**corpus, "seconds": round(time.perf_counter() - started, 2)}}
+    print(f"\n[{size}] generated {corpus['chunks']} chunks, {corpus['files']} files, {corpus['bytes'] / 1e6:.1f} MB")
+
+    commands = {
+        "ingest": [sys.executable, str(REPO_ROOT / "ingest_legal_docs.py"), "--docs-dir", "documents",
+                   "--manifest", "ingest_manifest.json", "--workers", str(args.ingest_workers), "--full"],
+        "store": [sys.executable, str(REPO_ROOT / "create_vector_store.py")],
+        "retrieval": [sys.executable, str(REPO_ROOT / "benchmarks" / "retrieval" / "run.py"), "--golden",
+                      "golden_set.json", "--lexical", "--repeat", str(args.repeat), "--json", "retrieval.json"],
+    }
+    for step in STEPS:
+        if step == "store" and args.random_vectors:
+            seeded = seed_random_vectors(work_dir / "legal_chunks.jsonl", work_dir / "embeddings.sqlite3",
+                                         env.get("EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2"), args.dim)
+            print(f"[{size}] seeded {seeded} random vectors")
+        row[step] = run_measured(commands[step], work_dir, env, work_dir / f"{step}.log")
+        print(f"[{size}] {step}: {row[step]['seconds']}s, peak RSS {row[step]['peak_rss_mb']} MB")
+
+    store_dir = work_dir / "data" / "vector_store"
+    row["store"]["disk_mb"] = round(dir_size(store_dir) / 2**20, 1)
+    with open(work_dir / "retrieval.json", "r", encoding="utf-8") as f:
+        retrieval = json.load(f)
+    row["chunks"] = retrieval["chunks"]
+    row["retrieval"]["configs"] = {
+        config["name"]: {"qps": config["qps"], "p50_ms": config["latency_ms"]["total"]["p50"],
+                         "p95_ms": config["latency_ms"]["total"]["p95"], **config["quality"]}
+        for config in retrieval["configs"]
+    }
+
+    if not args.keep:
+        for name in ("documents", "data", "legal_chunks.jsonl", "embeddings.sqlite3"):
+            target = work_dir / name
+            shutil.rmtree(target) if target.is_dir() else target.unlink(missing_ok=True)
+    return row
+
+
+def print_table(rows: List[Dict[str, Any]]):
+    print(f"\n{'chunks':>10} {'ingest s':>9} {'MB':>7} {'store s':>9} {'MB':>7} {'disk MB':>8} "
+          f"{'search MB':>9} {'config':<10} {'p50 ms':>8} {'p95 ms':>8} {'mrr':>6}")
+    for row in rows:
+        for i, (name, config) in enumerate(row["retrieval"]["configs"].items()):
+            lead = (f"{row['chunks']:>10} {row['ingest']['seconds']:>9} {row['ingest']['peak_rss_mb']:>7} "
+                    f"{row['store']['seconds']:>9} {row['store']['peak_rss_mb']:>7} {row['store']['disk_mb']:>8} "
+                    f"{row['retrieval']['peak_rss_mb']:>9}") if i == 0 else " " * 65
+            print(f"{lead} {name:<10} {config['p50_ms']:>8} {config['p95_ms']:>8} {config.get('mrr', ''):>6}")
+
+
+def plot(rows: List[Dict[str, Any]], path: str) -> bool:
+    """Time and peak memory per step against chunk count (log-log). False when matplotlib is missing."""
+    try:
+        import matplotlib
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+    except ImportError:
+        return False
+
+    chunks = [row["chunks"] for row in rows]
+    fig, (time_ax, memory_ax) = plt.subplots(1, 2, figsize=(12, 4.5))
+    for step in STEPS:
+        time_ax.plot(chunks, [row[step]["seconds"] for row in rows], marker="o", label=step)
+        memory_ax.plot(chunks, [row[step]["peak_rss_mb"] for row in rows], marker="o", label=step)
+    for ax, label in ((time_ax, "wall time (s)"), (memory_ax, "peak RSS (MB)")):
+        ax.set_xscale("log")
+        ax.set_yscale("log")
+        ax.set_xlabel("chunks")
+        ax.set_ylabel(label)
+        ax.grid(True, which="both", alpha=0.3)
+        ax.legend()
+    fig.tight_layout()
+    fig.savefig(path, dpi=120)
+    plt.close(fig)
+    return True
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000], help="Corpus sizes in chunks.")
+    parser.add_argument("--work-dir", default="scaling_runs", help="One subdirectory per size is created here.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--random-vectors", action="store_true", help="Seed the embedding cache instead of encoding.")
+    parser.add_argument("--dim", type=int, default=384, help="Vector size for --random-vectors (the model's).")
+    parser.add_argument("--ingest-workers", type=int, default=1)
+    parser.add_argument("--golden-queries", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=3, help="Timed passes over the golden set.")
+    parser.add_argument("--keep", action="store_true", help="Keep each size's documents, chunks and store.")
+    parser.add_argument("--json", default=None, help="Results file (default: <work-dir>/scaling.json).")
+    parser.add_argument("--chart", default=None, help="Chart file (default: <work-dir>/scaling.png).")
+    args = parser.parse_args(argv)
+
+    work_root = Path(args.work_dir).resolve()
+    rows = [run_size(size, work_root / f"chunks_{size}", args) for size in sorted(args.sizes)]
+    print_table(rows)
+
+    json_path = args.json or str(work_root / "scaling.json")
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump({"random_vectors": args.random_vectors, "ingest_workers": args.ingest_workers,
+                   "embedding_model": os.getenv("EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2"),
+                   "cpus": os.cpu_count(), "results": rows}, f, indent=2)
+    print(f"\nResults: {json_path}")
+
+    chart_path = args.chart or str(work_root / "scaling.png")
+    if plot(rows, chart_path):
+        print(f"Chart: {chart_path}")
+    else:
+        print("matplotlib is not installed; skipping the chart (pip install matplotlib)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+FAISS lookup throughput and latency: one index.search per request versus the search scheduler.
+
+Each of C client threads searches single query vectors back to back against the store's
+index.faiss (or a random index of the same shape with --synthetic). For every concurrency level
+the script reports searches per second and p50/p95 latency, first calling `index.search` from
+every client thread and then through SearchScheduler.
+
+Usage:
+    python benchmarks/search_batching.py
+    python benchmarks/search_batching.py --synthetic 100000 --threads 1 --json search.json
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.embedding_batching import run_clients  # noqa: E402
+from src.retrieval.search_scheduler import FAISS_MAX_BATCH, FAISS_MAX_WAIT_MS, SearchScheduler  # noqa: E402
+from src.retrieval.store import DEFAULT_STORE_DIR, resolve_store_dir  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--store-dir", default=DEFAULT_STORE_DIR)
+    parser.add_argument("--synthetic", type=int, default=0, help="Search a random index with this many vectors instead.")
+    parser.add_argument("--dim", type=int, default=384, help="Vector size of the synthetic index.")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=2048, help="Searches per concurrency level.")
+    parser.add_argument("--max-batch", type=int, default=FAISS_MAX_BATCH)
+    parser.add_argument("--max-wait-ms", type=float, default=FAISS_MAX_WAIT_MS)
+    parser.add_argument("--threads", type=int, default=None, help="OpenMP threads for the scheduler's searches.")
+    parser.add_argument("--json", help="Write the results to this file.")
+    args = parser.parse_args()
+
+    import faiss
+
+    rng = np.random.default_rng(0)
+    if args.synthetic:
+        index = faiss.IndexFlatIP(args.dim)
+        vectors = rng.standard_normal((args.synthetic, args.dim)).astype(np.float32)
+        faiss.normalize_L2(vectors)
+        index.add(vectors)
+    else:
+        index = faiss.read_index(str(resolve_store_dir(args.store_dir) / "index.faiss"))
+    queries = rng.standard_normal((256, index.d)).astype(np.float32)
+    faiss.normalize_L2(queries)
+
+    scheduler = SearchScheduler(index, max_batch=args.max_batch, max_wait_ms=args.max_wait_ms, threads=args.threads)
+    counter = iter(range(10 ** 12))
+
+    def direct(_):
+        row = next(counter) % len(queries)
+        return index.search(queries[row:row + 1], args.k)
+
+    def scheduled(_):
+        row = next(counter) % len(queries)
+        return scheduler.search(queries[row:row + 1], args.k)
+
+    results = []
+    for concurrency in args.concurrency:
+        per_client = max(1, args.requests // concurrency)
+        for mode, search in (("direct", direct), ("batched", scheduled)):
+            results.append({"mode": mode, **run_clients(search, concurrency, per_client)})
+
+    print(f"index: {index.ntotal} x {index.d}, k={args.k}, max batch {args.max_batch}, max wait {args.max_wait_ms} ms\n")
+    print(f"{'clients':>8} {'mode':<8} {'searches/s':>11} {'p50 ms':>8} {'p95 ms':>8}")
+    for row in results:
+        print(f"{row['concurrency']:>8} {row['mode']:<8} {row['qps']:>11} {row['p50_ms']:>8} {row['p95_ms']:>8}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"ntotal": index.ntotal, "dim": index.d, "k": args.k, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
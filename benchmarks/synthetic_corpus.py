@@ -0,0 +1,251 @@
+"""
+Synthetic legal corpus of any size, for scaling tests of ingestion, the store build and retrieval.
+
+Writes markdown in the layout ingest_legal_docs.py parses (see documents/). Acts are split into
+chapter files with `## Section N — Title` headings, `**(1)**` sub-sections, `Illustrations.` lists
+and `**Explanation 1.—**` notes. SOP files hold `## **SOP ON ...**` topics with `**01. Step**`
+items. The output directory gets documents/, an ingest_manifest.json and a golden_set.json of
+section queries for benchmarks/retrieval/run.py. Everything is streamed to disk, and the
+same seed gives the same corpus.
+
+Usage:
+    python benchmarks/synthetic_corpus.py --chunks 100000 --out /tmp/synthetic
+    cd /tmp/synthetic && python <repo>/ingest_legal_docs.py --docs-dir documents --manifest ingest_manifest.json
+"""
+
+import argparse
+import json
+import random
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, TextIO
+
+SECTIONS_PER_CHAPTER = 25
+CHAPTERS_PER_ACT = 40
+STEPS_PER_TOPIC = (3, 10)
+TOPICS_PER_SOP_FILE = 50
+
+ACTORS = ["Whoever", "Any person who", "A police officer who", "Every public servant who", "Any Magistrate who",
+          "A person in charge of a place who", "Whoever, being entrusted with property,", "Any officer who"]
+ACTS = ["causes hurt to", "dishonestly takes movable property from", "threatens", "wrongfully restrains",
+        "makes a false statement to", "conceals evidence of an offence from", "refuses to assist",
+        "obstructs in the discharge of his duty", "forges a document in the name of", "cheats",
+        "voluntarily causes grievous hurt to", "intentionally insults", "abets the escape of"]
+OBJECTS = ["another person", "a public servant", "a woman", "a child", "the complainant", "a witness",
+           "any person in lawful custody", "the owner of the property", "a member of the armed forces"]
+PUNISHMENTS = ["shall be punished with imprisonment of either description for a term which may extend to {n} years, "
+               "or with fine, or with both",
+               "shall be punished with rigorous imprisonment for a term which shall not be less than {n} years, "
+               "and shall also be liable to fine",
+               "shall be punished with simple imprisonment for a term which may extend to {m} months",
+               "shall be liable to fine which may extend to {f} thousand rupees"]
+PROCEDURES = ["The officer in charge of the police station shall record the information in writing",
+              "A copy of the information so recorded shall be given forthwith, free of cost, to the informant",
+              "The Magistrate may, on receipt of the report, direct an investigation",
+              "The statement shall be recorded by audio-video electronic means",
+              "The investigation shall be completed within {d} days from the date of registration",
+              "The victim shall be informed of the progress of the investigation within {d} days",
+              "Every person arrested shall be produced before the nearest Magistrate within twenty-four hours",
+              "The medical examination shall be conducted by a registered medical practitioner"]
+QUALIFIERS = ["without lawful excuse", "with intent to cause alarm", "knowing it to be likely to cause injury",
+              "in the course of any investigation", "by means of an electronic communication",
+              "in any place to which the public have access", "with the consent of the person concerned"]
+NOUNS = ["hurt", "theft", "cheating", "criminal intimidation", "wrongful restraint", "forgery", "extortion",
+         "mischief", "trespass", "bribery", "false evidence", "public nuisance", "defamation", "dacoity",
+         "criminal breach of trust", "kidnapping", "stalking", "voyeurism", "abetment", "rioting"]
+TITLE_FORMS = ["Punishment for {noun}", "{Noun}", "{Noun} by a public servant", "Attempt to commit {noun}",
+               "Aggravated {noun}", "{Noun} in relation to property", "Procedure in cases of {noun}",
+               "Compensation to victims of {noun}"]
+SOP_TOPICS = ["REGISTRATION OF FIR", "ARREST", "SEARCH AND SEIZURE", "MEDICAL EXAMINATION OF VICTIM",
+              "RECORDING OF STATEMENTS", "DIGITAL EVIDENCE", "CUSTODY OF PROPERTY", "PROCLAIMED OFFENDERS",
+              "SERVICE OF SUMMONS", "INVESTIGATION TIMELINES"]
+TIME_LIMITS = ["Immediately", "Within 24 hours", "Within 7 days", "Within 60 days", "With care and honour"]
+
+ROMAN = [(1000, "M"), (900, "CM"), (500, "D"), (400, "CD"), (100, "C"), (90, "XC"), (50, "L"), (40, "XL"),
+         (10, "X"), (9, "IX"), (5, "V"), (4, "IV"), (1, "I")]
+
+
+def roman(number: int) -> str:
+    out = ""
+    for value, numeral in ROMAN:
+        while number >= value:
+            out += numeral
+            number -= value
+    return out
+
+
+class CorpusWriter:
+    """Writes acts and SOPs until the target chunk count is reached, tracking the chunks each unit makes."""
+
+    def __init__(self, out_dir, chunks: int, seed: int = 0, sop_share: float = 0.1, golden_queries: int = 50):
+        self.out_dir = Path(out_dir)
+        self.docs_dir = self.out_dir / "documents"
+        self.target = chunks
+        self.rng = random.Random(seed)
+        self.sop_share = sop_share
+        self.golden_size = golden_queries
+        self.chunks = 0
+        self.sop_chunks = 0
+        self.bytes = 0
+        self.files = 0
+        self.sources: List[Dict[str, Any]] = []
+        self.golden: List[Dict[str, Any]] = []
+        self.sections_seen = 0
+        self.acts = 0
+        self.sop_files = 0
+
+    # Text
+
+    def sentence(self) -> str:
+        rng = self.rng
+        kind = rng.random()
+        if kind < 0.5:
+            text = f"{rng.choice(ACTORS)} {rng.choice(ACTS)} {rng.choice(OBJECTS)} {rng.choice(QUALIFIERS)}, " \
+                   f"{rng.choice(PUNISHMENTS)}"
+        elif kind < 0.8:
+            text = rng.choice(PROCEDURES)
+        else:
+            text = f"Nothing in this section shall apply to {rng.choice(OBJECTS)} acting {rng.choice(QUALIFIERS)}"
+        return text.format(n=rng.randint(1, 14), m=rng.randint(1, 11), f=rng.randint(1, 50),
+                           d=rng.choice([14, 30, 60, 90])) + "."
+
+    def paragraph(self) -> str:
+        # Mostly short provisions, with the occasional long one, like the real acts
+        count = self.rng.choice([1, 1, 2, 2, 3, 4]) if self.rng.random() < 0.9 else self.rng.randint(6, 15)
+        return " ".join(self.sentence() for _ in range(count))
+
+    def title(self) -> str:
+        noun = self.rng.choice(NOUNS)
+        return self.rng.choice(TITLE_FORMS).format(noun=noun, Noun=noun[0].upper() + noun[1:])
+
+    # Files
+
+    def _open(self, path: Path) -> TextIO:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.files += 1
+        return open(path, "w", encoding="utf-8")
+
+    def _write(self, f: TextIO, text: str):
+        f.write(text)
+        self.bytes += len(text.encode("utf-8"))
+
+    def _remember(self, law: str, section: int, query: str):
+        """Reservoir sample of sections, as golden queries for the retrieval benchmark."""
+        self.sections_seen += 1
+        entry = {"query": query.lower(), "expected": [{"law": law, "section": str(section)}], "source": "synthetic"}
+        if len(self.golden) < self.golden_size:
+            self.golden.append(entry)
+        else:
+            slot = self.rng.randrange(self.sections_seen)
+            if slot < self.golden_size:
+                self.golden[slot] = entry
+
+    def write_section(self, f: TextIO, law: str, number: int):
+        rng = self.rng
+        title = self.title()
+        self._write(f, f"## Section {number} — {title}\n\n")
+        sub_sections = rng.choice([0, 0, 2, 3, 4, 6])
+        paragraphs = [self.paragraph() for _ in range(max(sub_sections, 1))]
+        # Titles repeat across a large corpus; the opening sentence narrows the query down
+        self._remember(law, number, f"{title} {paragraphs[0].split('.')[0]}")
+        if sub_sections:
+            for sub, paragraph in enumerate(paragraphs, 1):
+                self._write(f, f"**({sub})** {paragraph}\n\n")
+        else:
+            self._write(f, f"{paragraphs[0]}\n\n")
+        self.chunks += len(paragraphs)
+        if rng.random() < 0.25:
+            self._write(f, "Illustrations.\n\n")
+            for letter in "abcd"[:rng.randint(1, 4)]:
+                self._write(f, f"- **({letter})** A {rng.choice(ACTS)} Z {rng.choice(QUALIFIERS)}. "
+                               f"A has committed the offence of {rng.choice(NOUNS)}.\n\n")
+            self.chunks += 1
+        for n in range(1, (rng.randint(1, 2) if rng.random() < 0.2 else 0) + 1):
+            self._write(f, f"**Explanation {n}.—**\n{self.paragraph()}\n\n")
+            self.chunks += 1
+        self._write(f, "---\n\n")
+
+    def write_act(self, index: int):
+        law = f"SYN{index:03d}"
+        act_dir = self.docs_dir / law
+        self.sources.append({"path": law, "context": {"law": law, "law_name": f"Synthetic Act {index}",
+                                                      "year": 2000 + index % 25, "doc_type": "primary_legislation"}})
+        section = 1
+        for chapter in range(1, CHAPTERS_PER_ACT + 1):
+            # SOP files are written in between chapters to hold their share of the corpus
+            while self.sop_due() and not self.done():
+                self.write_sop()
+            if self.done():
+                return
+            chapter_title = self.title().upper()
+            name = f"chapter_{roman(chapter).lower()}_{chapter_title.lower().replace(' ', '_')}.md"
+            with self._open(act_dir / name) as f:
+                self._write(f, f"# CHAPTER {roman(chapter)}\n\n## {chapter_title}\n\n---\n\n")
+                for _ in range(SECTIONS_PER_CHAPTER):
+                    self.write_section(f, law, section)
+                    section += 1
+                    if self.done():
+                        return
+
+    def write_sop(self):
+        rng = self.rng
+        self.sop_files += 1
+        index = self.sop_files
+        path = self.docs_dir / f"sop_{index:03d}.md"
+        self.sources.append({"path": path.name, "context": {"law": "SOP", "law_name": f"Synthetic SOP {index}",
+                                                            "doc_type": "sop"}})
+        with self._open(path) as f:
+            for _ in range(TOPICS_PER_SOP_FILE):
+                self._write(f, f"## **SOP ON {rng.choice(SOP_TOPICS)} {index}-{rng.randint(1, 999)}**\n\n")
+                for step in range(1, rng.randint(*STEPS_PER_TOPIC) + 1):
+                    self._write(f, f"**{step:02d}. {self.title()} - Suggested time limit: {rng.choice(TIME_LIMITS)}**\n\n")
+                    for _ in range(rng.randint(1, 5)):
+                        self._write(f, f"- {self.sentence()}\n\n")
+                    self.chunks += 1
+                    self.sop_chunks += 1
+                if self.done():
+                    return
+
+    def done(self) -> bool:
+        return self.chunks >= self.target
+
+    def sop_due(self) -> bool:
+        return self.sop_chunks < self.sop_share * self.chunks
+
+    def write(self) -> Dict[str, Any]:
+        while not self.done():
+            self.acts += 1
+            self.write_act(self.acts)
+
+        with open(self.out_dir / "ingest_manifest.json", "w", encoding="utf-8") as f:
+            json.dump({"sources": self.sources}, f, indent=2)
+        golden = [{"id": f"s{i + 1:03d}", **entry} for i, entry in enumerate(self.golden)]
+        with open(self.out_dir / "golden_set.json", "w", encoding="utf-8") as f:
+            json.dump({"description": "Section queries sampled from the synthetic corpus.", "queries": golden},
+                      f, indent=2)
+        return {"chunks": self.chunks, "files": self.files, "bytes": self.bytes, "acts": self.acts,
+                "sops": self.sop_files}
+
+
+def generate_corpus(out_dir, chunks: int, seed: int = 0, sop_share: float = 0.1,
+                    golden_queries: int = 50) -> Dict[str, Any]:
+    """Writes a corpus of about `chunks` chunks to out_dir; returns its size (chunks as the parser will count them)."""
+    return CorpusWriter(out_dir, chunks, seed, sop_share, golden_queries).write()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=100_000, help="Approximate number of chunks to generate.")
+    parser.add_argument("--out", required=True, help="Output directory (documents/, manifest, golden set).")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--sop-share", type=float, default=0.1, help="Share of chunks that are SOP steps.")
+    parser.add_argument("--golden-queries", type=int, default=50)
+    args = parser.parse_args()
+
+    stats = generate_corpus(args.out, args.chunks, args.seed, args.sop_share, args.golden_queries)
+    print(f"Wrote {stats['chunks']} chunks in {stats['files']} files ({stats['bytes'] / 1e6:.1f} MB): "
+          f"{stats['acts']} acts, {stats['sops']} SOP files -> {args.out}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,179 @@
+"""
+Memory per worker: `uvicorn --workers N` versus the preload-then-fork server.
+
+For each mode the script starts the server on a free port, waits until /health reports
+hybrid retrieval, sends a burst of /api/v1/search requests (retrieval only, no LLM calls) so
+every worker has touched the index, and then reads /proc/<pid>/smaps_rollup for the server
+process tree (Linux only).
+
+- RSS counts shared pages in full in every process.
+- PSS splits each shared page between the processes mapping it, so the PSS total is the real
+  footprint of the deployment.
+- USS (private pages) is what one more worker costs.
+
+Usage (from a directory with a built data/vector_store and a GEMINI_API_KEY set; any value
+works, since /search makes no LLM calls):
+    python benchmarks/worker_memory.py --workers 4
+    python benchmarks/worker_memory.py --mode prefork --workers 4 --json memory.json
+"""
+
+import argparse
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from pathlib import Path
+from typing import Any, Dict, List
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+WARMUP_QUERIES = [
+    "zero FIR registration",
+    "punishment for theft",
+    "medical examination of rape victim",
+    "anticipatory bail",
+    "statement recorded by magistrate",
+]
+
+SMAPS_FIELDS = ("Rss", "Pss", "Private_Clean", "Private_Dirty", "Shared_Clean", "Shared_Dirty")
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def server_command(mode: str, workers: int, port: int) -> List[str]:
+    if mode == "uvicorn":
+        return [sys.executable, "-m", "uvicorn", "src.server.app:app", "--host", "127.0.0.1",
+                "--port", str(port), "--workers", str(workers), "--log-level", "warning"]
+    return [sys.executable, "-m", "src.server.prefork", "--host", "127.0.0.1",
+            "--port", str(port), "--workers", str(workers), "--log-level", "warning"]
+
+
+def http_json(url: str, body: Dict[str, Any] = None, timeout: float = 30) -> Dict[str, Any]:
+    data = json.dumps(body).encode("utf-8") if body is not None else None
+    request = urllib.request.Request(url, data=data, headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        return json.loads(response.read())
+
+
+def wait_until_ready(base_url: str, workers: int, timeout: float):
+    """Every worker loads on its own under plain uvicorn, so require a run of ready answers."""
+    deadline = time.monotonic() + timeout
+    streak = 0
+    while time.monotonic() < deadline:
+        try:
+            health = http_json(f"{base_url}/health", timeout=5)
+            streak = streak + 1 if health.get("retrieval_mode") == "hybrid" else 0
+        except OSError:
+            streak = 0
+        if streak >= workers * 5:
+            return
+        time.sleep(0.2)
+    raise TimeoutError(f"Server at {base_url} was not ready within {timeout}s")
+
+
+def children(pid: int) -> List[int]:
+    found = []
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", "r") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+        except OSError:
+            continue
+        if int(fields[1]) == pid:
+            found.append(int(entry))
+    return found
+
+
+def cmdline(pid: int) -> str:
+    with open(f"/proc/{pid}/cmdline", "rb") as f:
+        return f.read().replace(b"\0", b" ").decode("utf-8", "replace").strip()
+
+
+def smaps_rollup(pid: int) -> Dict[str, int]:
+    """Memory counters of one process in kB."""
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup", "r") as f:
+        for line in f:
+            name, _, rest = line.partition(":")
+            if name in SMAPS_FIELDS:
+                values[name] = int(rest.split()[0])
+    values["Uss"] = values.get("Private_Clean", 0) + values.get("Private_Dirty", 0)
+    return values
+
+
+def measure(mode: str, workers: int, requests: int, timeout: float, app_root: Path = REPO_ROOT) -> Dict[str, Any]:
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    env = {**os.environ, "STORE_WATCH_INTERVAL": "0", "PYTHONPATH": str(app_root)}
+    proc = subprocess.Popen(server_command(mode, workers, port), env=env)
+    try:
+        wait_until_ready(base_url, workers, timeout)
+        for i in range(requests):
+            http_json(f"{base_url}/api/v1/search", {"query": WARMUP_QUERIES[i % len(WARMUP_QUERIES)], "k": 5})
+        time.sleep(1)
+
+        worker_pids = [pid for pid in children(proc.pid) if "resource_tracker" not in cmdline(pid)]
+        processes = {"master": smaps_rollup(proc.pid)}
+        for pid in worker_pids:
+            processes[f"worker {pid}"] = smaps_rollup(pid)
+        helpers = [pid for pid in children(proc.pid) if pid not in worker_pids]
+        for pid in helpers:
+            processes[f"helper {pid}"] = smaps_rollup(pid)
+    finally:
+        proc.send_signal(signal.SIGTERM)
+        try:
+            proc.wait(timeout=60)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+    worker_stats = [v for k, v in processes.items() if k.startswith("worker")]
+    total_pss = sum(v["Pss"] for v in processes.values())
+    return {
+        "mode": mode,
+        "workers": len(worker_stats),
+        "processes": processes,
+        "total_pss_mb": round(total_pss / 1024, 1),
+        "pss_per_worker_mb": round(total_pss / 1024 / max(1, len(worker_stats)), 1),
+        "avg_worker_rss_mb": round(sum(v["Rss"] for v in worker_stats) / 1024 / max(1, len(worker_stats)), 1),
+        "avg_worker_uss_mb": round(sum(v["Uss"] for v in worker_stats) / 1024 / max(1, len(worker_stats)), 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=("uvicorn", "prefork", "both"), default="both")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--requests", type=int, default=50, help="Search requests sent before measuring.")
+    parser.add_argument("--timeout", type=float, default=900, help="Seconds to wait for the workers to load.")
+    parser.add_argument("--app-root", type=Path, default=REPO_ROOT,
+                        help="Source tree to serve, e.g. a git worktree of an older commit for a before/after comparison.")
+    parser.add_argument("--json", help="Write the full results to this file.")
+    args = parser.parse_args()
+
+    if not os.path.exists("/proc/self/smaps_rollup"):
+        sys.exit("This measurement needs Linux /proc/<pid>/smaps_rollup.")
+
+    modes = ("uvicorn", "prefork") if args.mode == "both" else (args.mode,)
+    results = [measure(mode, args.workers, args.requests, args.timeout, args.app_root) for mode in modes]
+
+    print(f"\n{'mode':<10}{'workers':>8}{'total PSS':>12}{'PSS/worker':>12}{'worker RSS':>12}{'worker USS':>12}  (MB)")
+    for r in results:
+        print(f"{r['mode']:<10}{r['workers']:>8}{r['total_pss_mb']:>12}{r['pss_per_worker_mb']:>12}"
+              f"{r['avg_worker_rss_mb']:>12}{r['avg_worker_uss_mb']:>12}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
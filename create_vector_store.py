@@ -1,86 +1,143 @@
 import json
 import os
+import time
 import faiss
 import numpy as np
-import pickle
+import shutil
 from tqdm import tqdm
 from pathlib import Path
-from sentence_transformers import SentenceTransformer
-from rank_bm25 import BM25Okapi
 from dotenv import load_dotenv
+from src.retrieval.bm25_arrays import BM25_ARRAYS_DIR, BM25Arrays
+from src.retrieval.chunk_stream import CHUNKS_FILE, batched, iter_chunks
+from src.retrieval.corpus_encoder import CorpusEncoder, encode_corpus
+from src.retrieval.embedding_cache import EmbeddingCache, text_hash
+from src.retrieval.store import (CHUNK_IDS_FILE, DEFAULT_STORE_DIR, faiss_ids, file_sha256, finalize_version,
+                                 new_staging_dir, prune_versions, publish_version, validate_store, write_manifest)
 
 load_dotenv()
 
+# Chunk embeddings from earlier builds, keyed by model name and chunk-text hash
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", "data/cache/embeddings.sqlite3")
+# Chunks read from the cache and added to the index per step
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BUILD_BATCH", 256))
+
 def create_vector_store():
-    # 1. Load Chunks
-    chunks_path = Path("legal_chunks.json")
+    started = time.perf_counter()
+    # 1. Stream chunks (JSONL from ingest_legal_docs.py; the whole corpus is never held in memory)
+    chunks_path = Path(CHUNKS_FILE)
     if not chunks_path.exists():
         print(f"Error: {chunks_path} not found. Run ingest_legal_docs.py first.")
         return
 
-    print(f"Loading chunks from {chunks_path}...")
-    with open(chunks_path, "r", encoding="utf-8") as f:
-        chunks = json.load(f)
+    # 2. Encode every chunk text the embedding cache does not have yet, sorted by length and
+    # spread over the encode processes. Each batch is committed to the cache as it finishes, so
+    # an interrupted build picks up where it stopped
+    model_name = os.getenv("EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+    cache = EmbeddingCache(EMBEDDING_CACHE_PATH)
+    try:
+        with CorpusEncoder(model_name) as encoder, tqdm(desc="Encoding", unit="chunk") as bar:
+            stats = encode_corpus((c["text"] for c in iter_chunks(chunks_path)), cache, encoder, progress=bar.update)
+    except BaseException:
+        cache.close()
+        raise
+    print(f"Embedding cache: {stats.cached} of {stats.total} chunks cached, {stats.encoded} encoded")
+    if stats.encoded:
+        print(f"Encoded {stats.encoded} chunks in {stats.seconds:.1f}s ({stats.chunks_per_second:.1f} chunks/s, "
+              f"{encoder.workers} process(es), batches of {encoder.batch_size})")
+
+    # 3. Save everything into a hidden staging directory; it only becomes a version once complete,
+    # and running servers keep using CURRENT until it is published
+    store_root = Path(DEFAULT_STORE_DIR)
+    save_dir = new_staging_dir(store_root)
+    print(f"Reading chunks from {chunks_path}, building store in {save_dir}...")
+
+    index = None
+    chunk_ids = []
+    try:
+        with open(save_dir / "metadata.json", "w", encoding="utf-8") as meta_file:
+            meta_file.write("[\n")
+            for batch in tqdm(batched(iter_chunks(chunks_path), EMBED_BATCH_SIZE), unit="batch"):
+                if not all(c.get("chunk_id") for c in batch):
+                    raise ValueError(f"{chunks_path} has chunks without a chunk_id. Re-run ingest_legal_docs.py.")
+
+                # 4. Every vector is in the cache now (L2-normalised for cosine similarity)
+                hashes = [text_hash(c["text"]) for c in batch]
+                vectors = cache.get_many(model_name, hashes)
+                if len(vectors) < len(set(hashes)):
+                    raise RuntimeError(f"{chunks_path} changed while the store was being built")
+
+                # Add to the FAISS index under each chunk's id, not its row
+                matrix = np.vstack([vectors[h] for h in hashes]).astype('float32')
+                if index is None:
+                    index = faiss.IndexIDMap(faiss.IndexFlatIP(matrix.shape[1]))
+                batch_ids = [c["chunk_id"] for c in batch]
+                index.add_with_ids(matrix, faiss_ids(batch_ids))
+
+                # Metadata (the chunks themselves, for retrieval) is written as it goes
+                for c in batch:
+                    meta_file.write(("" if not chunk_ids else ",\n") + json.dumps(c, ensure_ascii=False))
+                    chunk_ids.append(c["chunk_id"])
+            meta_file.write("\n]\n")
+    except BaseException:
+        shutil.rmtree(save_dir, ignore_errors=True)
+        raise
+    finally:
+        cache.close()
 
-    if not chunks:
+    if index is None:
         print("No chunks to process.")
+        shutil.rmtree(save_dir, ignore_errors=True)
         return
+    ids = faiss_ids(chunk_ids)  # also rejects duplicate ids across batches
+    embedding_dim = index.d
 
-    # 2. Initialize Models
-    # Using a fast local model for default. 
-    model_name = os.getenv("EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
-    print(f"Initializing embedding model: {model_name}...")
-    model = SentenceTransformer(model_name)
-    embedding_dim = model.get_sentence_embedding_dimension()
-
-    # 3. Generate Embeddings
-    texts = [c["text"] for c in chunks]
-    print(f"Generating embeddings for {len(texts)} chunks...")
-    
-    # Process in batches
-    batch_size = 64
-    all_embeddings = []
-    for i in tqdm(range(0, len(texts), batch_size)):
-        batch_texts = texts[i:i+batch_size]
-        embeddings = model.encode(batch_texts, convert_to_numpy=True)
-        all_embeddings.append(embeddings)
-    
-    embeddings_matrix = np.vstack(all_embeddings).astype('float32')
-    
-    # Normalize for cosine similarity
-    faiss.normalize_L2(embeddings_matrix)
-
-    # 4. Create FAISS Index
-    print("Building FAISS index...")
-    index = faiss.IndexFlatIP(embedding_dim)
-    index.add(embeddings_matrix)
-
-    # 5. Create BM25 Index
-    print("Building BM25 index...")
-    tokenized_corpus = [text.lower().split() for text in texts]
-    bm25 = BM25Okapi(tokenized_corpus)
-
-    # 6. Save Everything
-    save_dir = Path("data/vector_store")
-    save_dir.mkdir(parents=True, exist_ok=True)
-
-    print(f"Saving store to {save_dir}...")
-    
-    # Save FAISS index
+    # Save FAISS index (and free it before BM25 is built)
     faiss.write_index(index, str(save_dir / "index.faiss"))
-    
-    # Save BM25 index
-    with open(save_dir / "bm25.pkl", "wb") as f:
-        pickle.dump(bm25, f)
-    
-    # Save Metadata (Chunks themselves for retrieval)
-    with open(save_dir / "metadata.json", "w", encoding="utf-8") as f:
-        json.dump(chunks, f, indent=2)
+    del index
+
+    try:
+        # 5. Create BM25 Index from a second pass over the chunk file. Only the flat arrays are
+        # written (the server memory-maps them so workers share one copy); building a BM25Okapi
+        # for bm25.pkl would hold a dict per chunk
+        print("Building BM25 index...")
+        bm25 = BM25Arrays.build(c["text"].lower().split() for c in iter_chunks(chunks_path))
+        bm25.save(save_dir / BM25_ARRAYS_DIR)
+
+        with open(save_dir / CHUNK_IDS_FILE, "w", encoding="utf-8") as f:
+            json.dump({"chunk_ids": chunk_ids, "faiss_ids": ids.tolist()}, f)
+
+        # Ship the ingest-time lookup indexes (/rag/source offsets, timelines) alongside the store
+        for index_file in ("source_index.json", "timeline_index.json"):
+            if os.path.exists(index_file):
+                shutil.copy(index_file, save_dir / index_file)
+
+        # 6. Manifest last: checksums of every file and what the store was built from. The server
+        # checks it on load, so a store that does not match its chunks or its model is refused
+        write_manifest(save_dir, model_name, embedding_dim, len(chunk_ids), build={
+            "chunks_file": chunks_path.name,
+            "chunks_sha256": file_sha256(chunks_path),
+            "faiss_index": "IndexIDMap(IndexFlatIP)",
+            "bm25": {"k1": bm25.k1, "b": bm25.b, "tokenizer": "lower-whitespace"},
+            "encode_batch": encoder.batch_size,
+        })
+        del bm25
+        validate_store(save_dir)
+        save_dir = finalize_version(save_dir)
+    except BaseException:
+        shutil.rmtree(save_dir, ignore_errors=True)
+        raise
+
+    # 7. Publish: atomically point CURRENT at the new version (servers pick it up on reload)
+    publish_version(store_root, save_dir)
+    removed = prune_versions(store_root, keep=int(os.getenv("STORE_KEEP_VERSIONS", 3)))
+    if removed:
+        print(f"Removed old store versions: {', '.join(removed)}")
 
     print("\n✅ Vector store created successfully!")
-    print(f"Location: {save_dir}")
-    print(f"Total Chunks: {len(chunks)}")
+    print(f"Location: {save_dir} (published as {store_root / 'CURRENT'})")
+    print(f"Total Chunks: {len(chunk_ids)}")
     print(f"Embedding Dimension: {embedding_dim}")
+    print(f"Encoded {stats.encoded} chunks; build took {time.perf_counter() - started:.1f}s")
 
 if __name__ == "__main__":
     create_vector_store()
@@ -1,14 +1,50 @@
+import argparse
+import hashlib
 import os
 import re
 import json
-from dataclasses import dataclass, asdict
-from typing import List, Optional, Dict
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, asdict, field
+from functools import partial
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Dict, Tuple
+
+from src.retrieval.chunk_stream import CHUNKS_FILE, ChunkWriter, iter_chunks, read_chunk_range
+from src.retrieval.source_index import SOURCE_INDEX_FILE, build_source_index, write_source_index
+from src.retrieval.timeline_index import TIMELINE_INDEX_FILE, build_timeline_index, write_timeline_index
+
+# Line scanner. parse_line switches on the first character and then runs at most one combined
+# pattern per line type. Alternatives are tried in the order the rules take precedence, so the
+# first group that matches is the rule that applies (see _apply_heading).
+HEADING_RE = re.compile(
+    r"(?P<page>(?i:##\s+\d+\s+\|\s+Page))"                                      # PDF artifact: ## 1 | Page
+    r"|(?:#|##)\s+(?P<part>(?i:(?P<part_name>PART\s?[-–\s]?\s?[IVXLC]+.*)))"       # # PART II or ## PART-II
+    r"|(?:#|##)\s+(?P<chapter>(?i:(?P<chapter_name>CHAPTER\s+[IVXLC]+.*)))"        # # CHAPTER III
+    r"|(?P<section>(?i:##\s+Section\s+(?P<section_no>\d+[A-Z]*)\s*[—\-]\s*(?P<section_title>.*)))"  # ## Section 14 — Title
+    r"|(?P<clause>##\s+(?P<clause_no>\d+)\.\s*(?P<clause_title>.*))"               # NALSA: ## 2. DEFINITIONS
+    r"|(?P<sop_topic>(?i:##\s+\*\*(?P<sop_topic_name>SOP\s+ON\s+.*)\*\*))"          # ## **SOP ON ...**
+    r"|(?P<chapter_title>##\s+[^0-9]+)"                                             # ## GENERAL EXCEPTIONS
+)
+CHAPTER_TITLE_RE = re.compile(r"##\s+(.*)")
+BOLD_STEP_RE = re.compile(
+    r"(?P<rape_step>\*\*(?P<rape_step_no>\d+)\.\s*(?P<rape_step_title>.*?)(?:\s*[—\-]\s*Suggested.*?)?\*\*)"  # **01. FIR - Suggested...**
+    r"|\*\*(?P<gen_step>Step\s+\d+):\*\*"                                              # **Step 1:**
+)
+SUB_SECTION_RE = re.compile(r"(?:\*\*|\s)*\((\d+[a-z]?)\)(?:\*\*|\s)*")
+ILLUSTRATION_RE = re.compile(r"Illustration(s)?(\.|:)?", re.I)
+TABLE_RULE_RE = re.compile(r"[\|\-\s]+$")
+PAGE_MARKER_RE = re.compile(r"^\|?\s*\d+\s*\|\s*Page\s*\|?$", re.I)
 
 @dataclass
 class Chunk:
     text: str
     metadata: Dict
     canonical_header: str
+    chunk_id: str = ""  # stable id, assigned over the whole corpus by assign_chunk_ids
+    # Where the chunk's buffered lines are in the source file: path (relative to the documents
+    # root), start/end byte offsets and first/last line (1-based); empty for text fed line by line
+    source: Dict = field(default_factory=dict)
 
 @dataclass
 class ParserContext:
@@ -33,6 +69,12 @@ class StatefulParser:
         self.context = ParserContext()
         self.chunks: List[Chunk] = []
         self.current_buffer: List[str] = []
+        # Position of the line being scanned (set by parse_file) and the byte/line span buffered so far
+        self.source_path: Optional[str] = None
+        self._raw: Optional[bytes] = None
+        self._line_offset = 0
+        self._line_no = 0
+        self._span: Optional[List[int]] = None
 
     def flush_buffer(self):
         if not self.current_buffer:
@@ -41,11 +83,13 @@ class StatefulParser:
         text_content = "\n".join(self.current_buffer).strip()
         if not text_content:
             self.current_buffer = []
+            self._span = None
             return
 
         # Special case: skip page number markers or generic index entries
-        if re.match(r"^\|?\s*\d+\s*\|\s*Page\s*\|?$", text_content, re.I):
+        if PAGE_MARKER_RE.match(text_content):
             self.current_buffer = []
+            self._span = None
             return
 
         # Construct Canonical Header
@@ -95,8 +139,28 @@ class StatefulParser:
         meta = asdict(self.context)
         meta["unit_type"] = self.determine_unit_type()
 
-        self.chunks.append(Chunk(text=full_text, metadata=meta, canonical_header=canonical_header))
+        source = {}
+        if self._span is not None:
+            start, end, line_start, line_end = self._span
+            source = {"path": self.source_path, "start": start, "end": end, "line_start": line_start, "line_end": line_end}
+
+        self.chunks.append(Chunk(text=full_text, metadata=meta, canonical_header=canonical_header, source=source))
         self.current_buffer = []
+        self._span = None
+
+    def _buffer(self, text: str):
+        """Adds a line to the current chunk and extends its source span (trimmed of surrounding whitespace)."""
+        self.current_buffer.append(text)
+        raw = self._raw
+        if raw is None:
+            return
+        start = self._line_offset + len(raw) - len(raw.lstrip())
+        end = self._line_offset + len(raw.rstrip())
+        if self._span is None:
+            self._span = [start, end, self._line_no, self._line_no]
+        else:
+            self._span[1] = end
+            self._span[3] = self._line_no
 
     def determine_unit_type(self):
         if self.context.mode == "illustration": return "illustration"
@@ -110,217 +174,379 @@ class StatefulParser:
 
     def parse_line(self, line: str):
         stripped = line.strip()
-        
+        first = stripped[:1]
+
         # Flush on separator
         if stripped == "---":
             self.flush_buffer()
             return
 
-        # Skip PDF artifacts like "## 1 | Page"
-        if re.match(r"^##\s+\d+\s+\|\s+Page", stripped, re.I):
+        # Headings: PDF page artifacts, PART / CHAPTER / Section lines, NALSA clauses, SOP topics, chapter titles
+        if first == "#":
+            match = HEADING_RE.match(stripped)
+            if match and self._apply_heading(match, stripped):
+                return
+
+        # Bold SOP steps: **01. FIR - Suggested...** (Rape SOP) or **Step 1:** (General SOP)
+        bold = first == "*" and stripped.startswith("**")
+        if bold:
+            match = BOLD_STEP_RE.match(stripped)
+            if match:
+                self.flush_buffer()
+                if match.lastgroup == "rape_step":
+                    self.context.step = f"Step {match.group('rape_step_no')}"
+                    self.context.section_title = match.group("rape_step_title").strip()
+                else:
+                    self.context.step = match.group("gen_step")
+                self.context.mode = "step"
+                return
+
+        # Sub-section: **(1)** or (1) (usually at start of line)
+        if first == "(" or bold:
+            sub_sec_match = SUB_SECTION_RE.match(stripped)
+            if sub_sec_match:
+                self.flush_buffer()
+                self.context.sub_section = sub_sec_match.group(1)
+                self.context.mode = "normal" # Sub-sections reset illustration/explanation mode usually
+                # We don't return here because the text usually follows on same or next line
+
+        # Modes
+        if len(stripped) < 30 and ILLUSTRATION_RE.search(stripped):
             self.flush_buffer()
+            self.context.mode = "illustration"
             return
 
-        # Context updates
-        
-        # PART: # PART II or ## PART-II
-        part_match = re.match(r"^(?:#|##)\s+(PART\s?[-–\s]?\s?[IVXLC]+.*)", stripped, re.I)
-        if part_match:
+        if "Explanation" in stripped:
+            # Check if it's a standalone line or the start of a line
+            if stripped.startswith("**Explanation") or stripped.startswith("*Explanation") or "Explanation.—" in stripped:
+                self.flush_buffer()
+                self.context.mode = "explanation"
+
+        # Table Row
+        if first == "|" and not TABLE_RULE_RE.match(stripped) and not "Particulars" in stripped:
+            if not self.context.mode == "table":
+                self.flush_buffer()
+                self.context.mode = "table"
+            self._buffer(stripped)
             self.flush_buffer()
-            self.context.part = part_match.group(1).strip()
             return
 
-        # CHAPTER: # CHAPTER III or ## CHAPTER III
-        chapter_match = re.match(r"^(?:#|##)\s+(CHAPTER\s+[IVXLC]+.*)", stripped, re.I)
-        if chapter_match:
+        # Normal text
+        if stripped:
+            self._buffer(line)
+
+    def _apply_heading(self, match: "re.Match", stripped: str) -> bool:
+        """State transition for a HEADING_RE match; False when the line is not consumed as a heading."""
+        kind = match.lastgroup
+        if kind == "page":
+            self.flush_buffer()
+        elif kind == "part":
+            self.flush_buffer()
+            self.context.part = match.group("part_name").strip()
+        elif kind == "chapter":
             self.flush_buffer()
-            self.context.chapter = chapter_match.group(1).strip()
+            self.context.chapter = match.group("chapter_name").strip()
             self.context.chapter_title = None
             self.context.section = None
             self.context.sub_section = None
             self.context.mode = "normal"
-            return
-
-        # SECTION (BNS/BNSS/BSA): ## Section 14 — Title
-        section_match = re.match(r"^##\s+Section\s+(\d+[A-Z]*)\s*[—\-]\s*(.*)", stripped, re.I)
-        if section_match:
+        elif kind == "section":
             self.flush_buffer()
-            self.context.section = section_match.group(1).strip()
-            self.context.section_title = section_match.group(2).strip()
+            self.context.section = match.group("section_no").strip()
+            self.context.section_title = match.group("section_title").strip()
             self.context.sub_section = None
             self.context.clause = None
             self.context.step = None
             self.context.mode = "normal"
-            return
-
-        # NALSA Clause: ## 2. DEFINITIONS or ## 1. SHORT TITLE...
-        nalsa_clause_match = re.match(r"^##\s+(\d+)\.\s*(.*)", stripped)
-        if nalsa_clause_match and self.context.law == "NALSA":
+        elif kind == "clause":
+            # Numbered headings are clauses only in NALSA; elsewhere they are not chapter titles either
+            if self.context.law != "NALSA":
+                return False
             self.flush_buffer()
-            self.context.clause = nalsa_clause_match.group(1).strip()
-            self.context.clause_title = nalsa_clause_match.group(2).strip()
+            self.context.clause = match.group("clause_no").strip()
+            self.context.clause_title = match.group("clause_title").strip()
             self.context.section = None
             self.context.sub_section = None
             self.context.mode = "normal"
-            return
-
-        # SOP Topic: ## **SOP ON ...**
-        sop_topic_match = re.match(r"^##\s+\*\*(SOP\s+ON\s+.*)\*\*", stripped, re.I)
-        if sop_topic_match:
+        elif kind == "sop_topic":
             self.flush_buffer()
-            self.context.chapter_title = sop_topic_match.group(1).strip()
+            self.context.chapter_title = match.group("sop_topic_name").strip()
             self.context.mode = "sop"
-            return
-
-        # Chapter Title: ## GENERAL EXCEPTIONS (when chapter is already set)
-        # ONLY if not already matched as section/clause/sop
-        if self.context.chapter and not section_match and not nalsa_clause_match and not sop_topic_match:
-            if re.match(r"^##\s+[^0-9]+", stripped):
-                title_match = re.match(r"^##\s+(.*)", stripped)
-                if title_match:
-                    self.context.chapter_title = title_match.group(1).strip()
-                    return
-
-        # SOP Step (Rape): **01. FIR - Suggested...** or **22. Witness Protection**
-        sop_step_rape_match = re.match(r"^\*\*(\d+)\.\s*(.*?)(?:\s*[—\-]\s*Suggested.*?)?\*\*", stripped)
-        if sop_step_rape_match:
-            self.flush_buffer()
-            self.context.step = f"Step {sop_step_rape_match.group(1)}"
-            self.context.section_title = sop_step_rape_match.group(2).strip()
-            self.context.mode = "step"
-            return
-
-        # General SOP Step: **Step 1:**
-        gen_sop_step_match = re.match(r"^\*\*(Step\s+\d+):\*\*", stripped)
-        if gen_sop_step_match:
-            self.flush_buffer()
-            self.context.step = gen_sop_step_match.group(1)
-            self.context.mode = "step"
-            return
-
-        # Sub-section: **(1)** or (1) (usually at start of line)
-        sub_sec_match = re.match(r"^(?:\*\*|\s)*\((\d+[a-z]?)\)(?:\*\*|\s)*", stripped)
-        if sub_sec_match:
-            self.flush_buffer()
-            self.context.sub_section = sub_sec_match.group(1)
-            self.context.mode = "normal" # Sub-sections reset illustration/explanation mode usually
-            # We don't return here because the text usually follows on same or next line
-        
-        # Modes
-        if re.search(r"Illustration(s)?(\.|:)?", stripped, re.I) and len(stripped) < 30:
-            self.flush_buffer()
-            self.context.mode = "illustration"
-            return
-        
-        if re.search(r"Explanation(s)?(\s?\d+)?(\.|—)?", stripped, re.I) and "Explanation" in stripped:
-            # Check if it's a standalone line or the start of a line
-            if stripped.startswith("**Explanation") or stripped.startswith("*Explanation") or "Explanation.—" in stripped:
-                self.flush_buffer()
-                self.context.mode = "explanation"
-        
-        # Table Row
-        if stripped.startswith("|") and not re.match(r"^[\|\-\s]+$", stripped) and not "Particulars" in stripped:
-            if not self.context.mode == "table":
-                self.flush_buffer()
-                self.context.mode = "table"
-            self.current_buffer.append(stripped)
-            self.flush_buffer()
-            return
-
-        # Normal text
-        if stripped:
-            self.current_buffer.append(line)
-
-    def parse_file(self, file_path: str, context_overrides: Dict):
+        else:
+            # Chapter Title: ## GENERAL EXCEPTIONS (only when a chapter is already set)
+            if not self.context.chapter:
+                return False
+            self.context.chapter_title = CHAPTER_TITLE_RE.match(stripped).group(1).strip()
+        return True
+
+    def parse_file(self, file_path: str, context_overrides: Dict, source_path: Optional[str] = None):
         print(f"Processing: {file_path}")
         # Reset context but keep overrides
         self.context = ParserContext(source_file=os.path.basename(file_path))
         for k, v in context_overrides.items():
             setattr(self.context, k, v)
-        
-        with open(file_path, 'r', encoding='utf-8') as f:
-            for line in f:
+        self.source_path = source_path or Path(file_path).as_posix()
+
+        # Read as bytes so every line's offset in the file is known exactly
+        with open(file_path, 'rb') as f:
+            offset = 0
+            for line_no, raw in enumerate(f, 1):
+                self._raw, self._line_offset, self._line_no = raw, offset, line_no
+                line = raw.decode('utf-8')
+                if line.endswith("\r\n"):
+                    line = line[:-2] + "\n"
                 self.parse_line(line)
-        
+                offset += len(raw)
+        self._raw = None
+
         self.flush_buffer()
 
-def main():
+# Files to ingest and the law context each one starts with (see ingest_manifest.json)
+DEFAULT_MANIFEST = os.getenv("INGEST_MANIFEST", "ingest_manifest.json")
+DEFAULT_DOCS_DIR = os.getenv("LEGAL_DOCS_DIR", "documents")
+
+# Per-file content hashes and chunk ranges of the last run, so unchanged files are not re-parsed
+INGEST_STATE_FILE = os.getenv("INGEST_STATE_FILE", "ingest_state.json")
+# Any change to the parser invalidates every cached parse
+PARSER_FINGERPRINT = hashlib.sha256(Path(__file__).read_bytes()).hexdigest()[:16]
+
+
+def load_manifest(manifest_path: str) -> List[Dict]:
+    """
+    Manifest entries, in ingestion order. Each entry has a `path` relative to the documents
+    directory (a file, or a directory whose `pattern` files, default "*.md", are taken in sorted
+    order) and the `context` overrides every file under it starts with.
+    """
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    for entry in manifest["sources"]:
+        if "path" not in entry or not isinstance(entry.get("context", {}), dict):
+            raise ValueError(f"Invalid manifest entry in {manifest_path}: {entry}")
+    return manifest["sources"]
+
+
+def expand_manifest(sources: List[Dict], docs_dir: str) -> List[Tuple[str, Dict]]:
+    """(file path, context overrides) for every file the manifest covers, in manifest order."""
+    jobs = []
+    for entry in sources:
+        path = Path(docs_dir) / entry["path"]
+        context = entry.get("context", {})
+        if path.is_dir():
+            files = sorted(p for p in path.glob(entry.get("pattern", "*.md")) if p.is_file())
+            jobs.extend((str(p), context) for p in files)
+        elif path.is_file():
+            jobs.append((str(path), context))
+        else:
+            print(f"Skipping missing manifest path: {path}")
+    return jobs
+
+
+def parse_document(job: Tuple[str, Dict], docs_dir: Optional[str] = None) -> List[Chunk]:
+    """
+    Parses one file with its own parser state (runs in a worker process). Chunk source paths
+    are relative to `docs_dir` when given.
+    """
+    file_path, context_overrides = job
+    source_path = Path(os.path.relpath(file_path, docs_dir)).as_posix() if docs_dir else None
     parser = StatefulParser()
-    docs_dir = r"c:\Met4l.DSCode\Python\Embedding-Test-Py\documents"
-    
-    # Process BNS (Split)
-    bns_dir = os.path.join(docs_dir, "BNS")
-    if os.path.exists(bns_dir):
-        files = sorted(os.listdir(bns_dir))
-        for f in files:
-            if f.endswith(".md"):
-                parser.parse_file(os.path.join(bns_dir, f), {"law": "BNS", "law_name": "Bharatiya Nyaya Sanhita", "year": 2023, "doc_type": "primary_legislation"})
-
-    # Process BNSS (Split)
-    bnss_dir = os.path.join(docs_dir, "BNSS")
-    if os.path.exists(bnss_dir):
-        files = sorted(os.listdir(bnss_dir))
-        for f in files:
-            if f.endswith(".md"):
-                parser.parse_file(os.path.join(bnss_dir, f), {"law": "BNSS", "law_name": "Bharatiya Nagarik Suraksha Sanhita", "year": 2023, "doc_type": "primary_legislation"})
-
-    # Process BSA (Split)
-    bsa_dir = os.path.join(docs_dir, "BSA")
-    if os.path.exists(bsa_dir):
-        files = sorted(os.listdir(bsa_dir))
-        for f in files:
-            if f.endswith(".md"):
-                parser.parse_file(os.path.join(bsa_dir, f), {"law": "BSA", "law_name": "Bharatiya Sakshya Adhiniyam", "year": 2023, "doc_type": "primary_legislation"})
-
-    # Process NALSA
-    nalsa_file = os.path.join(docs_dir, "nalsa.md")
-    if os.path.exists(nalsa_file):
-        print(f"Processing: {nalsa_file}")
-        parser.parse_file(nalsa_file, {
-            "law": "NALSA",
-            "law_name": "NALSA Compensation Scheme",
-            "year": 2018,
-            "doc_type": "compensation_scheme"
-        })
-    
-    # Process NALSA Table
-    nalsa_table = os.path.join(docs_dir, "nalsa_table.md")
-    if os.path.exists(nalsa_table):
-        parser.parse_file(nalsa_table, {"law": "NALSA", "law_name": "NALSA Compensation Scheme", "year": 2018, "doc_type": "compensation_scheme", "chapter_title": "Schedule – Women Victims of Crimes"})
-
-    # Process SOPs
-    gen_sop = os.path.join(docs_dir, "General SOP.md")
-    if os.path.exists(gen_sop):
-        parser.parse_file(gen_sop, {"law": "SOP", "law_name": "General SOP", "doc_type": "sop"})
-    
-    rape_sop = os.path.join(docs_dir, "sop_rape_against_women.md")
-    if os.path.exists(rape_sop):
-        parser.parse_file(rape_sop, {"law": "SOP", "law_name": "SOP on Rape Against Women", "doc_type": "sop"})
+    parser.parse_file(file_path, context_overrides, source_path)
+    return parser.chunks
+
+
+def iter_parsed_files(jobs: List[Tuple[str, Dict]], workers: int = 1,
+                      docs_dir: Optional[str] = None) -> Iterator[List[Chunk]]:
+    """One chunk list per job, in job order, as files finish parsing (in parallel when workers > 1)."""
+    parse = partial(parse_document, docs_dir=docs_dir)
+    if workers <= 1 or len(jobs) <= 1:
+        for job in jobs:
+            yield parse(job)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield from pool.map(parse, jobs)
+
+
+def parse_documents_by_file(jobs: List[Tuple[str, Dict]], workers: int = 1,
+                            docs_dir: Optional[str] = None) -> List[List[Chunk]]:
+    return list(iter_parsed_files(jobs, workers, docs_dir))
 
-    # Dry Run Output
-    with open("debug_chunks.txt", "w", encoding="utf-8") as f:
-        for i, chunk in enumerate(parser.chunks):
+
+def parse_documents(jobs: List[Tuple[str, Dict]], workers: int = 1, docs_dir: Optional[str] = None) -> List[Chunk]:
+    chunks = [chunk for chunks in parse_documents_by_file(jobs, workers, docs_dir) for chunk in chunks]
+    return assign_chunk_ids(chunks)
+
+
+def _id_part(value) -> str:
+    return re.sub(r"[^A-Za-z0-9.]+", "-", str(value)).strip("-")
+
+
+def make_chunk_id(metadata: Dict, text: str) -> str:
+    """
+    Content-addressed id: law, section path and unit type, then a hash of the chunk text,
+    e.g. "BNS/s103/ss2/sub_section:3f9a1c2b7d4e". It stays the same across rebuilds and
+    re-orderings for as long as the chunk's text and position in the law do.
+    """
+    path = [_id_part(metadata.get("law") or "DOC")]
+    if metadata.get("section"):
+        path.append(f"s{_id_part(metadata['section'])}")
+    elif metadata.get("clause"):
+        path.append(f"c{_id_part(metadata['clause'])}")
+    if metadata.get("sub_section"):
+        path.append(f"ss{_id_part(metadata['sub_section'])}")
+    if metadata.get("step"):
+        path.append(_id_part(metadata["step"]).lower())
+    path.append(metadata.get("unit_type") or "general")
+    return "/".join(path) + ":" + hashlib.sha256(text.encode("utf-8")).hexdigest()[:12]
+
+
+class ChunkIdAssigner:
+    """Sets chunk ids in corpus order; identical chunks at the same path get -2, -3, ..."""
+
+    def __init__(self):
+        self.seen: Dict[str, int] = {}
+
+    def __call__(self, chunk: Chunk) -> Chunk:
+        base = make_chunk_id(chunk.metadata, chunk.text)
+        self.seen[base] = self.seen.get(base, 0) + 1
+        chunk.chunk_id = base if self.seen[base] == 1 else f"{base}-{self.seen[base]}"
+        return chunk
+
+
+def assign_chunk_ids(chunks: List[Chunk]) -> List[Chunk]:
+    assign = ChunkIdAssigner()
+    for chunk in chunks:
+        assign(chunk)
+    return chunks
+
+
+def sha256_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def file_fingerprint(file_path: str, context_overrides: Dict) -> str:
+    """Hash of a source file's bytes and the context it is parsed with."""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        digest.update(f.read())
+    digest.update(json.dumps(context_overrides, sort_keys=True, ensure_ascii=False).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def load_previous_run(state_path: str = INGEST_STATE_FILE, chunks_path: str = CHUNKS_FILE) -> Optional[Dict]:
+    """The last run's state, if it and the chunk file it describes still belong together."""
+    if not (os.path.exists(state_path) and os.path.exists(chunks_path)):
+        return None
+    with open(state_path, "r", encoding="utf-8") as f:
+        state = json.load(f)
+    if state.get("parser") != PARSER_FINGERPRINT or state.get("output_sha256") != sha256_file(chunks_path):
+        return None
+    return state
+
+
+def ingest_documents(jobs: List[Tuple[str, Dict]], docs_dir: str, chunks_path: str = CHUNKS_FILE, workers: int = 1,
+                     previous: Optional[Dict] = None) -> Tuple[Dict, int]:
+    """
+    Writes the chunks of every job, in job order, to the JSONL file `chunks_path`, one file's
+    chunks at a time. Files whose content and context are unchanged since the `previous` run
+    (see load_previous_run) are copied from the old output instead of being parsed again.
+    Returns (new state, files parsed).
+    """
+    fingerprints = [file_fingerprint(path, context) for path, context in jobs]
+    rel_paths = [Path(os.path.relpath(path, docs_dir)).as_posix() for path, _ in jobs]
+
+    reusable: Dict[str, Dict] = {}
+    if previous is not None:
+        reusable = {entry["sha256"] + entry["path"]: entry for entry in previous["files"]}
+
+    to_parse = [i for i, key in enumerate(zip(fingerprints, rel_paths)) if "".join(key) not in reusable]
+    parsed = iter_parsed_files([jobs[i] for i in to_parse], workers, docs_dir)
+    to_parse_set = set(to_parse)
+
+    assign = ChunkIdAssigner()
+    files = []
+    chunk_hashes = []
+    with ChunkWriter(chunks_path) as writer:
+        for i, (fingerprint, rel) in enumerate(zip(fingerprints, rel_paths)):
+            if i in to_parse_set:
+                file_chunks = next(parsed)
+            else:
+                entry = reusable[fingerprint + rel]
+                file_chunks = [Chunk(**c) for c in read_chunk_range(chunks_path, entry["offset"], entry["count"])]
+            files.append({"path": rel, "sha256": fingerprint, "start": writer.count, "offset": writer.offset,
+                          "count": len(file_chunks)})
+            for chunk in file_chunks:
+                writer.write(asdict(assign(chunk)))
+                chunk_hashes.append(hashlib.sha256(chunk.text.encode("utf-8")).hexdigest())
+
+    new_state = {
+        "parser": PARSER_FINGERPRINT,
+        "files": files,
+        "chunk_sha256": chunk_hashes,
+        "output_sha256": writer.sha256,
+    }
+    return new_state, len(to_parse)
+
+
+def write_debug_chunks(chunks: Iterable[Chunk], path: str):
+    """Human-readable dump of every chunk and its (non-null) metadata."""
+    with open(path, "w", encoding="utf-8") as f:
+        for i, chunk in enumerate(chunks):
             f.write(f"--- CHUNK {i+1} ---\n")
             # Filter None values from metadata for cleaner log
             meta_clean = {k: v for k, v in chunk.metadata.items() if v is not None}
             f.write(f"METADATA: {json.dumps(meta_clean)}\n")
             f.write(f"CONTENT:\n{chunk.text}\n\n")
 
-    # Save to JSON for embedding stage
-    chunks_data = [asdict(c) for c in parser.chunks]
-    with open("legal_chunks.json", "w", encoding="utf-8") as f:
-        json.dump(chunks_data, f, indent=2)
+
+def main(argv: Optional[List[str]] = None):
+    arg_parser = argparse.ArgumentParser(description=f"Parse the legal documents into {CHUNKS_FILE}.")
+    arg_parser.add_argument("--docs-dir", default=DEFAULT_DOCS_DIR)
+    arg_parser.add_argument("--manifest", default=DEFAULT_MANIFEST)
+    arg_parser.add_argument("--workers", type=int, default=int(os.getenv("INGEST_WORKERS", os.cpu_count() or 1)),
+                            help="Parser processes (1 parses in this process).")
+    arg_parser.add_argument("--full", action="store_true", help="Re-parse every file, ignoring the last run.")
+    arg_parser.add_argument("--debug-dump", nargs="?", const="debug_chunks.txt", default=os.getenv("INGEST_DEBUG_DUMP"),
+                            help="Also write a human-readable dump of every chunk (default path: debug_chunks.txt).")
+    args = arg_parser.parse_args(argv)
+    docs_dir = args.docs_dir
+
+    jobs = expand_manifest(load_manifest(args.manifest), docs_dir)
+    started = time.perf_counter()
+    previous = None if args.full else load_previous_run()
+    # Chunks are streamed to the JSONL file as each file is parsed; nothing below holds the whole corpus
+    state, parsed = ingest_documents(jobs, docs_dir, CHUNKS_FILE, args.workers, previous)
+    with open(INGEST_STATE_FILE, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2)
+    print(f"Parsed {parsed} of {len(jobs)} files ({len(jobs) - parsed} unchanged) "
+          f"with {args.workers} worker(s) in {time.perf_counter() - started:.2f}s")
+
+    # Dry Run Output (opt-in; it is nearly as large as the chunks themselves)
+    if args.debug_dump:
+        write_debug_chunks((Chunk(**c) for c in iter_chunks(CHUNKS_FILE)), args.debug_dump)
+
+    # Offsets of every section/SOP block for the verbatim /rag/source endpoint
+    source_index = build_source_index(docs_dir)
+    write_source_index(source_index, SOURCE_INDEX_FILE)
+
+    # Stage/deadline entries from SOP steps and BNSS time limits, looked up per case type at query time
+    timeline_index = build_timeline_index(iter_chunks(CHUNKS_FILE))
+    write_timeline_index(timeline_index, TIMELINE_INDEX_FILE)
 
     # Final summary
     stats = {}
-    for c in parser.chunks:
-        law = c.metadata.get("law", "Unknown")
+    for c in iter_chunks(CHUNKS_FILE):
+        law = c["metadata"].get("law", "Unknown")
         stats[law] = stats.get(law, 0) + 1
     
-    print(f"\nParsing complete. Total chunks: {len(parser.chunks)}")
+    print(f"\nParsing complete. Total chunks: {len(state['chunk_sha256'])}")
     for law, count in stats.items():
         print(f" - {law}: {count} chunks")
-    print(f"Chunks saved to legal_chunks.json and debug_chunks.txt")
+    print(f"Chunks saved to {CHUNKS_FILE}" + (f" and {args.debug_dump}" if args.debug_dump else ""))
+    print(f"Source index ({len(source_index['entries'])} entries) saved to {SOURCE_INDEX_FILE}")
+    print(f"Timeline index ({timeline_index['size']} entries) saved to {TIMELINE_INDEX_FILE}")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,172 @@
+import json
+import math
+import os
+from array import array
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+BM25_ARRAYS_DIR = "bm25"
+BM25_ARRAYS_VERSION = 1
+ARRAY_FILES = ("terms", "idf", "ptr", "docs", "tfs", "doc_len")
+
+
+class BM25Arrays:
+    """
+    BM25Okapi scoring over flat numpy arrays instead of one dict per document.
+
+    Postings are stored CSR-style: for the term at `terms[i]` (sorted), its documents are
+    `docs[ptr[i]:ptr[i + 1]]` with term frequencies `tfs[...]`. Scores are identical to
+    `rank_bm25.BM25Okapi.get_scores`, but a query only touches the postings of its own terms,
+    and the arrays can be memory-mapped so forked workers share them instead of copying them.
+    """
+
+    def __init__(self, terms: np.ndarray, idf: np.ndarray, ptr: np.ndarray, docs: np.ndarray,
+                 tfs: np.ndarray, doc_len: np.ndarray, k1: float, b: float, avgdl: float):
+        self.terms = terms
+        self.idf = idf
+        self.ptr = ptr
+        self.docs = docs
+        self.tfs = tfs
+        self.doc_len = doc_len
+        self.k1 = k1
+        self.b = b
+        self.avgdl = avgdl
+        self.corpus_size = len(doc_len)
+
+    @classmethod
+    def from_okapi(cls, bm25) -> "BM25Arrays":
+        """Converts a fitted rank_bm25.BM25Okapi (e.g. the store's bm25.pkl)."""
+        postings = {}
+        for doc_id, freqs in enumerate(bm25.doc_freqs):
+            for term, tf in freqs.items():
+                postings.setdefault(term, []).append((doc_id, tf))
+
+        vocab = sorted(postings)
+        ptr = np.zeros(len(vocab) + 1, dtype=np.int64)
+        docs, tfs = [], []
+        for i, term in enumerate(vocab):
+            for doc_id, tf in postings[term]:
+                docs.append(doc_id)
+                tfs.append(tf)
+            ptr[i + 1] = len(docs)
+
+        return cls(
+            terms=np.array(vocab, dtype=str) if vocab else np.array([], dtype="<U1"),
+            idf=np.array([bm25.idf.get(term) or 0 for term in vocab], dtype=np.float64),
+            ptr=ptr,
+            docs=np.array(docs, dtype=np.int32),
+            tfs=np.array(tfs, dtype=np.int32),
+            doc_len=np.array(bm25.doc_len, dtype=np.int64),
+            k1=bm25.k1,
+            b=bm25.b,
+            avgdl=bm25.avgdl,
+        )
+
+    @classmethod
+    def build(cls, documents: Iterable[List[str]], k1: float = 1.5, b: float = 0.75,
+              epsilon: float = 0.25) -> "BM25Arrays":
+        """
+        Fits the index straight from a stream of tokenized documents, scoring exactly like
+        BM25Okapi(documents). Only the postings are kept while reading (three ints per distinct
+        term of a document), not rank_bm25's dict per document, so the builder's memory is the
+        size of the index itself.
+        """
+        vocab: Dict[str, int] = {}  # term -> id in order of first occurrence, the order rank_bm25 sums idf in
+        term_ids, doc_ids, tfs, doc_len = array("i"), array("i"), array("i"), array("q")
+        for doc_id, document in enumerate(documents):
+            doc_len.append(len(document))
+            frequencies: Dict[str, int] = {}
+            for word in document:
+                frequencies[word] = frequencies.get(word, 0) + 1
+            for word, tf in frequencies.items():
+                term_ids.append(vocab.setdefault(word, len(vocab)))
+                doc_ids.append(doc_id)
+                tfs.append(tf)
+        corpus_size = len(doc_len)
+        if not corpus_size:
+            raise ValueError("Cannot build a BM25 index from an empty corpus")
+
+        term_ids = np.frombuffer(term_ids, dtype=np.int32)
+        # Same idf (and epsilon floor for terms in over half the documents) as BM25Okapi._calc_idf
+        idf = [math.log(corpus_size - df + 0.5) - math.log(df + 0.5)
+               for df in np.bincount(term_ids, minlength=len(vocab)).tolist()]
+        eps = epsilon * (sum(idf) / len(idf))
+        idf = np.array([eps if value < 0 else value for value in idf], dtype=np.float64)
+
+        terms = sorted(vocab)
+        by_rank = np.array([vocab[term] for term in terms], dtype=np.int64)
+        rank = np.empty(len(vocab), dtype=np.int64)
+        rank[by_rank] = np.arange(len(vocab))
+        ranked_terms = rank[term_ids]
+        order = np.argsort(ranked_terms, kind="stable")  # postings were appended in document order
+        ptr = np.zeros(len(vocab) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(ranked_terms, minlength=len(vocab)), out=ptr[1:])
+
+        return cls(
+            terms=np.array(terms, dtype=str),
+            idf=idf[by_rank],
+            ptr=ptr,
+            docs=np.frombuffer(doc_ids, dtype=np.int32)[order],
+            tfs=np.frombuffer(tfs, dtype=np.int32)[order],
+            doc_len=np.frombuffer(doc_len, dtype=np.int64).copy(),
+            k1=k1,
+            b=b,
+            avgdl=sum(doc_len) / corpus_size,
+        )
+
+    def save(self, directory):
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        for name in ARRAY_FILES:
+            np.save(directory / f"{name}.npy", getattr(self, name))
+        with open(directory / "params.json", "w", encoding="utf-8") as f:
+            json.dump({"version": BM25_ARRAYS_VERSION, "k1": self.k1, "b": self.b, "avgdl": self.avgdl}, f)
+
+    @classmethod
+    def load(cls, directory, mmap: bool = True) -> Optional["BM25Arrays"]:
+        """Loads saved arrays (memory-mapped by default); None if missing or in an old format."""
+        directory = Path(directory)
+        params_path = directory / "params.json"
+        if not params_path.exists():
+            return None
+        with open(params_path, "r", encoding="utf-8") as f:
+            params = json.load(f)
+        if params.get("version") != BM25_ARRAYS_VERSION:
+            return None
+        arrays = {
+            name: np.load(directory / f"{name}.npy", mmap_mode="r" if mmap else None)
+            for name in ARRAY_FILES
+        }
+        return cls(**arrays, k1=params["k1"], b=params["b"], avgdl=params["avgdl"])
+
+    def get_scores(self, query: Iterable[str]) -> np.ndarray:
+        score = np.zeros(self.corpus_size)
+        for term in query:
+            i = int(np.searchsorted(self.terms, term))
+            if i == len(self.terms) or self.terms[i] != term:
+                continue  # unseen term: rank_bm25 adds 0 for every document
+            start, end = self.ptr[i], self.ptr[i + 1]
+            docs = self.docs[start:end]
+            tf = self.tfs[start:end]
+            score[docs] += self.idf[i] * (tf * (self.k1 + 1) /
+                                          (tf + self.k1 * (1 - self.b + self.b * self.doc_len[docs] / self.avgdl)))
+        return score
+
+
+def load_bm25(store_dir, mmap: bool = None):
+    """
+    The store's BM25 index as BM25Arrays: the prebuilt `bm25/` arrays when present, otherwise
+    converted in memory from bm25.pkl (stores built before the arrays were written).
+    """
+    import pickle
+
+    if mmap is None:
+        mmap = os.getenv("BM25_MMAP", "true").lower() not in ("0", "false", "no")
+    store_dir = Path(store_dir)
+    arrays = BM25Arrays.load(store_dir / BM25_ARRAYS_DIR, mmap=mmap)
+    if arrays is not None:
+        return arrays
+    with open(store_dir / "bm25.pkl", "rb") as f:
+        return BM25Arrays.from_okapi(pickle.load(f))
@@ -0,0 +1,182 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+import weakref
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+logger = logging.getLogger("LegalRAG-Cache")
+
+# SQLite connections must not cross a fork; forked workers reopen their own
+_live_caches: "weakref.WeakSet[ResponseCache]" = weakref.WeakSet()
+
+
+def _forget_connections_after_fork():
+    for cache in list(_live_caches):
+        cache._local = threading.local()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_forget_connections_after_fork)
+
+
+def normalize_query(query: str) -> str:
+    """Lowercase, collapse whitespace and drop trailing punctuation so trivial variants share a key."""
+    normalized = re.sub(r"\s+", " ", query.strip().lower())
+    return normalized.rstrip(" ?!.")
+
+
+def build_cache_key(normalized_query: str, chunk_ids: Iterable[str], model_id: str, prompt_version: str) -> str:
+    payload = json.dumps({
+        "query": normalized_query,
+        "chunks": sorted(chunk_ids),
+        "model": model_id,
+        "prompt": prompt_version,
+    }, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    Disk-backed response cache shared by all workers on the same host.
+
+    SQLite in WAL mode lets several uvicorn workers read concurrently while writes are
+    serialized by SQLite's own file locking. Entries expire after `ttl_seconds` and the
+    least recently used ones are evicted once the table grows past `max_entries`.
+    """
+
+    # Run eviction every N writes rather than on every insert
+    EVICT_EVERY = 50
+
+    def __init__(self, path: str = "data/cache/responses.sqlite3", ttl_seconds: int = 7 * 24 * 3600, max_entries: int = 5000):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._writes = 0
+        _live_caches.add(self)
+
+        # A short-lived connection: the engine (and this cache) is built before the prefork master
+        # forks, and no connection should be open across that fork
+        conn = self._open()
+        try:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    store_version TEXT NOT NULL,
+                    model_id TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_version ON responses(store_version)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_access ON responses(last_access)")
+        finally:
+            conn.close()
+
+    @classmethod
+    def from_env(cls) -> Optional["ResponseCache"]:
+        if os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() in ("0", "false", "no"):
+            return None
+        return cls(
+            path=os.getenv("RESPONSE_CACHE_PATH", "data/cache/responses.sqlite3"),
+            ttl_seconds=int(os.getenv("RESPONSE_CACHE_TTL", 7 * 24 * 3600)),
+            max_entries=int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", 5000)),
+        )
+
+    def _open(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(str(self.path), timeout=5.0, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _connect(self) -> sqlite3.Connection:
+        # sqlite3 connections must not be shared across threads or processes, so keep one per
+        # thread, opened on first use and reopened in a forked child (the pid check backs up the
+        # fork hook on platforms without os.register_at_fork)
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = self._open()
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        conn = self._connect()
+        row = conn.execute("SELECT payload, created_at FROM responses WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+
+        payload, created_at = row
+        now = time.time()
+        if now - created_at > self.ttl_seconds:
+            conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            return None
+
+        conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+        return json.loads(payload)
+
+    def set(self, key: str, payload: Dict[str, Any], store_version: str, model_id: str):
+        conn = self._connect()
+        now = time.time()
+        conn.execute(
+            "INSERT OR REPLACE INTO responses (key, store_version, model_id, payload, created_at, last_access) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (key, store_version, model_id, json.dumps(payload, ensure_ascii=False), now, now),
+        )
+
+        self._writes += 1
+        if self._writes % self.EVICT_EVERY == 0:
+            self.evict()
+
+    def evict(self) -> int:
+        """Drops expired entries, then the least recently used ones above `max_entries`."""
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            removed = conn.execute(
+                "DELETE FROM responses WHERE created_at < ?", (time.time() - self.ttl_seconds,)
+            ).rowcount
+            (count,) = conn.execute("SELECT COUNT(*) FROM responses").fetchone()
+            overflow = count - self.max_entries
+            if overflow > 0:
+                removed += conn.execute(
+                    "DELETE FROM responses WHERE key IN "
+                    "(SELECT key FROM responses ORDER BY last_access ASC LIMIT ?)",
+                    (overflow,),
+                ).rowcount
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return removed
+
+    def invalidate(self, store_version: Optional[str] = None, keep_version: Optional[str] = None) -> int:
+        """
+        Deletes entries built from `store_version`.
+        Without a version, deletes everything not built from `keep_version` (or everything).
+        """
+        conn = self._connect()
+        if store_version is not None:
+            return conn.execute("DELETE FROM responses WHERE store_version = ?", (store_version,)).rowcount
+        if keep_version is not None:
+            return conn.execute("DELETE FROM responses WHERE store_version != ?", (keep_version,)).rowcount
+        return conn.execute("DELETE FROM responses").rowcount
+
+    def stats(self) -> Dict[str, Any]:
+        conn = self._connect()
+        rows = conn.execute("SELECT store_version, COUNT(*) FROM responses GROUP BY store_version").fetchall()
+        return {
+            "path": str(self.path),
+            "entries": sum(count for _, count in rows),
+            "by_store_version": {version: count for version, count in rows},
+            "ttl_seconds": self.ttl_seconds,
+            "max_entries": self.max_entries,
+        }
@@ -0,0 +1,83 @@
+import hashlib
+import json
+import os
+from itertools import islice
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List
+
+# Ingestion output: one chunk per line, written as files are parsed and read back in batches
+CHUNKS_FILE = os.getenv("CHUNKS_FILE", "legal_chunks.jsonl")
+
+
+class ChunkWriter:
+    """
+    Writes chunks to a JSONL file one line at a time.
+
+    Lines go to a temporary file next to `path` that replaces it on a clean close, so readers
+    (including the next incremental run, which copies unchanged files out of the old output)
+    never see a half-written file. `count`, `offset` and `sha256` describe what has been written.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.tmp_path = self.path.with_name(f".{self.path.name}.tmp")
+        self.file = open(self.tmp_path, "wb")
+        self.digest = hashlib.sha256()
+        self.count = 0
+        self.offset = 0
+
+    def write(self, chunk: Dict):
+        line = (json.dumps(chunk, ensure_ascii=False) + "\n").encode("utf-8")
+        self.file.write(line)
+        self.digest.update(line)
+        self.count += 1
+        self.offset += len(line)
+
+    @property
+    def sha256(self) -> str:
+        return self.digest.hexdigest()
+
+    def close(self):
+        self.file.close()
+        os.replace(self.tmp_path, self.path)
+
+    def abort(self):
+        self.file.close()
+        self.tmp_path.unlink(missing_ok=True)
+
+    def __enter__(self) -> "ChunkWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def iter_chunks(path) -> Iterator[Dict]:
+    """Chunks of a JSONL file, one at a time. A `.json` array (the pre-JSONL format) is loaded whole."""
+    if str(path).endswith(".json"):
+        with open(path, "r", encoding="utf-8") as f:
+            yield from json.load(f)
+        return
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def read_chunk_range(path, offset: int, count: int) -> List[Dict]:
+    """`count` chunks starting at byte `offset` of a JSONL file (one source file's chunks)."""
+    with open(path, "rb") as f:
+        f.seek(offset)
+        return [json.loads(f.readline()) for _ in range(count)]
+
+
+def batched(items: Iterable, size: int) -> Iterator[List]:
+    items = iter(items)
+    while True:
+        batch = list(islice(items, size))
+        if not batch:
+            return
+        yield batch
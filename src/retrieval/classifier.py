@@ -2,9 +2,8 @@ import os
 import json
 from typing import List, Optional
 from pydantic import BaseModel, Field
-from google import genai
-from google.genai import types
 from dotenv import load_dotenv
+from .json_repair import parse_model_json
 
 load_dotenv()
 
@@ -34,7 +33,9 @@ class QueryClassifier:
         if not api_key:
             raise ValueError("API Key (GEMINI_API_KEY or GOOGLE_API_KEY) not found in environment variables.")
         
-        self.client = genai.Client(api_key=api_key)
+        # google.genai is slow to import; the client is created on the first LLM call
+        self.api_key = api_key
+        self._client = None
         
         # Default model list if not provided
         default_models = [ "gemma-3-1b-it", "gemma-3-2b-it" , "gemma-3-4b-it" ]
@@ -45,7 +46,16 @@ class QueryClassifier:
         else:
             self.model_ids = model_ids or default_models
 
+    @property
+    def client(self):
+        if self._client is None:
+            from google import genai
+            self._client = genai.Client(api_key=self.api_key)
+        return self._client
+
     def classify(self, query: str) -> QueryIntent:
+        from google.genai import types as genai_types
+
         prompt = f"""
         Analyze the following user query and categorize it into one of the following types:
         {", ".join(self.QUERY_TYPES)}
@@ -81,18 +91,13 @@ class QueryClassifier:
                         model=model_id,
                         contents=prompt + "\nIMPORTANT: Return ONLY valid JSON.",
                     )
-                    # Simple JSON cleaner
-                    text = response.text.strip()
-                    if "```json" in text:
-                        text = text.split("```json")[-1].split("```")[0].strip()
-                    elif "```" in text:
-                        text = text.split("```")[-1].split("```")[0].strip()
-                    return QueryIntent.model_validate_json(text)
+                    # Tolerant JSON parsing: a repairable response beats a retry on the next model
+                    return parse_model_json(response.text, QueryIntent, fallbacks={"confidence": 0.5})
                 else:
                     response = self.client.models.generate_content(
                         model=model_id,
                         contents=prompt,
-                        config=types.GenerateContentConfig(
+                        config=genai_types.GenerateContentConfig(
                             response_mime_type="application/json",
                             response_schema=QueryIntent,
                         ),
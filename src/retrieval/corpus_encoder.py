@@ -0,0 +1,223 @@
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .embedding_cache import EmbeddingCache, text_hash
+
+# Encode processes for the store build (0: one per EMBED_WORKER_THREADS usable cores)
+EMBED_WORKERS = int(os.getenv("EMBED_WORKERS", 0))
+# torch threads per encode process (0: the usable cores split evenly between the processes)
+EMBED_WORKER_THREADS = int(os.getenv("EMBED_WORKER_THREADS", 0))
+# Texts per model.encode call; every batch holds texts of similar length, so little of it is padding
+EMBED_ENCODE_BATCH = int(os.getenv("EMBED_ENCODE_BATCH", 64))
+# Uncached texts collected and sorted by length before they are cut into batches
+EMBED_SORT_WINDOW = int(os.getenv("EMBED_SORT_WINDOW", 8192))
+# Pin each encode process to its own cores (on one socket where possible)
+EMBED_PIN_CORES = os.getenv("EMBED_PIN_CORES", "true").lower() == "true"
+
+# Cores per process when neither the process count nor the thread count is set
+_DEFAULT_THREADS_PER_WORKER = 4
+
+
+def usable_cores() -> List[int]:
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def core_socket(core: int) -> int:
+    """Physical package (socket) of a core, or 0 where the topology is not exposed."""
+    try:
+        with open(f"/sys/devices/system/cpu/cpu{core}/topology/physical_package_id") as f:
+            return int(f.read())
+    except (OSError, ValueError):
+        return 0
+
+
+def partition_cores(cores: Sequence[int], workers: int,
+                    socket_of: Callable[[int], int] = core_socket) -> List[List[int]]:
+    """
+    Splits the cores into one set per worker. Cores are grouped by socket first, so with as many
+    workers as sockets (or a multiple) no worker's threads straddle two sockets' caches and memory.
+    """
+    ordered = sorted(cores, key=lambda core: (socket_of(core), core))
+    workers = max(1, min(workers, len(ordered)))
+    size, extra = divmod(len(ordered), workers)
+    sets, start = [], 0
+    for i in range(workers):
+        end = start + size + (1 if i < extra else 0)
+        sets.append(ordered[start:end])
+        start = end
+    return sets
+
+
+def plan_workers(workers: int = EMBED_WORKERS, threads: int = EMBED_WORKER_THREADS,
+                 cores: Optional[Sequence[int]] = None) -> List[List[int]]:
+    """Core set of every encode process for the given (or automatic) process and thread counts."""
+    cores = list(cores) if cores is not None else usable_cores()
+    if workers <= 0:
+        workers = max(1, len(cores) // (threads or _DEFAULT_THREADS_PER_WORKER))
+    sets = partition_cores(cores, workers)
+    if threads:
+        sets = [core_set[:threads] for core_set in sets]
+    return sets
+
+
+def length_batches(items: Sequence[Tuple[str, str]], batch_size: int) -> List[List[Tuple[str, str]]]:
+    """
+    (hash, text) pairs sorted longest first and cut into batches.
+
+    A batch is padded to its longest text, so in corpus order a one-line table row next to a long
+    section costs as much as the section. The longest batches come first, so a batch size that does
+    not fit in memory fails at once rather than at the end of the build.
+    """
+    ordered = sorted(items, key=lambda item: len(item[1]), reverse=True)
+    return [ordered[i:i + batch_size] for i in range(0, len(ordered), batch_size)]
+
+
+def load_model(model_name: str):
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(model_name)
+
+
+def _set_threads(threads: int):
+    if "torch" in sys.modules:
+        sys.modules["torch"].set_num_threads(threads)
+
+
+# Per-process state of the encode pool (set by _init_worker)
+_worker_model = None
+
+
+def _init_worker(model_name: str, loader: Callable, core_sets, pin: bool):
+    global _worker_model
+    cores = core_sets.get()
+    if pin and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cores)
+    _worker_model = loader(model_name)
+    _set_threads(len(cores))
+
+
+def _encode_in_worker(texts: List[str], batch_size: int) -> np.ndarray:
+    return encode_texts(_worker_model, texts, batch_size)
+
+
+def encode_texts(model, texts: List[str], batch_size: int) -> np.ndarray:
+    vectors = model.encode(texts, convert_to_numpy=True, batch_size=batch_size, show_progress_bar=False)
+    return np.asarray(vectors, dtype=np.float32)
+
+
+class CorpusEncoder:
+    """
+    Encodes batches of texts with the embedding model, in this process or a pool of processes.
+
+    With one worker the model is loaded here, on first use. With more, every process loads its
+    own copy, gets its own cores (`plan_workers`) and sizes torch's thread pool to them, so the
+    processes do not oversubscribe the CPU. The pool is started with `spawn`: a forked child of a
+    process that has already used torch's thread pool can hang.
+    """
+
+    def __init__(self, model_name: str, core_sets: Optional[List[List[int]]] = None,
+                 batch_size: int = EMBED_ENCODE_BATCH, loader: Callable = load_model, pin: bool = EMBED_PIN_CORES):
+        self.model_name = model_name
+        self.core_sets = core_sets if core_sets is not None else plan_workers()
+        self.batch_size = batch_size
+        self.loader = loader
+        self.pin = pin
+        self.model = None
+        self.pool: Optional[ProcessPoolExecutor] = None
+
+    @property
+    def workers(self) -> int:
+        return len(self.core_sets)
+
+    def map(self, batches: List[List[str]]) -> Iterator[np.ndarray]:
+        """Embeddings of each batch, in order, as they finish."""
+        if self.workers == 1:
+            if self.model is None:
+                print(f"Initializing embedding model: {self.model_name}...")
+                self.model = self.loader(self.model_name)
+                _set_threads(len(self.core_sets[0]))
+            for texts in batches:
+                yield encode_texts(self.model, texts, self.batch_size)
+            return
+
+        if self.pool is None:
+            print(f"Starting {self.workers} embedding processes for {self.model_name} "
+                  f"(cores: {'; '.join(','.join(map(str, s)) for s in self.core_sets)})...")
+            context = multiprocessing.get_context("spawn")
+            core_sets = context.Queue()
+            for core_set in self.core_sets:
+                core_sets.put(core_set)
+            self.pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=context, initializer=_init_worker,
+                                            initargs=(self.model_name, self.loader, core_sets, self.pin))
+        yield from self.pool.map(_encode_in_worker, batches, [self.batch_size] * len(batches))
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown(cancel_futures=True)
+            self.pool = None
+
+    def __enter__(self) -> "CorpusEncoder":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+@dataclass
+class EncodeStats:
+    total: int = 0
+    cached: int = 0
+    encoded: int = 0
+    seconds: float = 0.0
+
+    @property
+    def chunks_per_second(self) -> float:
+        return self.encoded / self.seconds if self.seconds else 0.0
+
+
+def encode_corpus(texts: Iterable[str], cache: EmbeddingCache, encoder: CorpusEncoder,
+                  window: int = EMBED_SORT_WINDOW, progress: Optional[Callable[[int], None]] = None) -> EncodeStats:
+    """
+    Makes sure the cache holds an embedding for every text, encoding only those it lacks.
+
+    Texts are streamed: each window of `window` uncached texts is sorted by length, batched and
+    encoded. Every batch is written to the cache as soon as it is back, so the cache doubles as the
+    build's checkpoint; an interrupted build resumes where it stopped, and the vectors of texts that
+    occur more than once are only computed once. Vectors are L2-normalised for cosine similarity.
+    """
+    stats = EncodeStats()
+    started = time.perf_counter()
+    pending: Dict[str, str] = {}
+
+    def flush():
+        missing = set(cache.missing(encoder.model_name, list(pending)))
+        batches = length_batches([(h, t) for h, t in pending.items() if h in missing], encoder.batch_size)
+        pending.clear()
+        if not batches:
+            return
+        for batch, vectors in zip(batches, encoder.map([[t for _, t in batch] for batch in batches])):
+            vectors = vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+            cache.put_many(encoder.model_name, {h: v for (h, _), v in zip(batch, vectors)})
+            stats.encoded += len(batch)
+            if progress:
+                progress(len(batch))
+
+    for text in texts:
+        stats.total += 1
+        pending.setdefault(text_hash(text), text)
+        if len(pending) >= window:
+            flush()
+    if pending:
+        flush()
+
+    stats.cached = stats.total - stats.encoded
+    stats.seconds = time.perf_counter() - started
+    return stats
@@ -0,0 +1,170 @@
+import logging
+import os
+import queue
+import sys
+import threading
+import time
+import weakref
+from typing import Any, List, Optional
+
+import numpy as np
+
+from .metrics import metrics
+
+logger = logging.getLogger("LegalRAG-EmbeddingBatcher")
+
+# How long the worker keeps collecting after the first queued text, and the batch size that ends the wait early
+EMBED_MAX_WAIT_MS = float(os.getenv("EMBED_MAX_WAIT_MS", 2))
+EMBED_MAX_BATCH = int(os.getenv("EMBED_MAX_BATCH", 32))
+# torch intra-op threads for the encode calls (unset: torch's default, or the prefork per-worker setting)
+EMBED_THREADS = int(os.getenv("EMBED_THREADS", 0)) or None
+# An idle worker thread exits (and is restarted on the next request), so a retired engine can be freed
+EMBED_IDLE_SECONDS = float(os.getenv("EMBED_IDLE_SECONDS", 30))
+
+# Threads and locks do not survive fork(); forked workers start their own worker threads
+_live_batchers: "weakref.WeakSet[MicroBatcher]" = weakref.WeakSet()
+
+
+def _reset_after_fork():
+    for batcher in list(_live_batchers):
+        batcher._lock = threading.Lock()
+        batcher._queue = None
+        batcher._thread = None
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+class _Request:
+    def __init__(self, payload: Any, size: int):
+        self.payload = payload
+        self.size = size
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class MicroBatcher:
+    """
+    Coalesces work from concurrent callers into batches run on one worker thread.
+
+    Callers queue a request and block. The worker takes the first queued request and keeps
+    collecting for up to `max_wait_ms` or until `max_batch` rows. It then hands the whole batch
+    to `_process`, which sets every request's result. Only that thread runs the underlying
+    library, so concurrent requests do not compete for its thread pool.
+
+    The worker waits only while requests actually arrive together, i.e. when the previous batch
+    had more than one caller. A lone client gets whatever is already queued, with no delay.
+    """
+
+    name = "batcher"
+
+    def __init__(self, max_batch: int, max_wait_ms: float, threads: Optional[int] = None,
+                 idle_seconds: float = EMBED_IDLE_SECONDS):
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self.threads = threads
+        self.idle_seconds = idle_seconds
+        self._lock = threading.Lock()
+        self._queue: Optional[queue.Queue] = None
+        self._thread: Optional[threading.Thread] = None
+        self._last_batch_requests = 1
+        _live_batchers.add(self)
+
+    def submit(self, payload: Any, size: int, timeout: Optional[float] = None) -> Any:
+        request = _Request(payload, size)
+        with self._lock:
+            if self._thread is None:
+                self._queue = queue.Queue()
+                self._thread = threading.Thread(target=self._run, args=(self._queue,), name=self.name, daemon=True)
+                self._thread.start()
+            self._queue.put(request)
+
+        if not request.done.wait(timeout):
+            raise TimeoutError(f"{self.name} did not finish within {timeout}s")
+        if request.error is not None:
+            raise request.error
+        return request.result
+
+    def _setup_thread(self):
+        """Runs once on the worker thread before its first batch (e.g. to size thread pools)."""
+
+    def _process(self, batch: List[_Request]):
+        raise NotImplementedError
+
+    def _run(self, requests: queue.Queue):
+        self._setup_thread()
+        while True:
+            try:
+                first = requests.get(timeout=self.idle_seconds)
+            except queue.Empty:
+                # Exit under the lock so a request queued right now cannot be stranded
+                with self._lock:
+                    if requests.empty():
+                        if self._queue is requests:
+                            self._thread = None
+                        return
+                continue
+
+            batch = [first]
+            size = first.size
+            wait = self.max_wait if self._last_batch_requests > 1 else 0.0
+            deadline = time.monotonic() + wait
+            while size < self.max_batch:
+                try:
+                    request = requests.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                batch.append(request)
+                size += request.size
+            self._last_batch_requests = len(batch)
+
+            try:
+                self._process(batch)
+            except BaseException as e:
+                logger.error(f"{self.name}: batch of {size} rows failed: {e}")
+                for request in batch:
+                    request.error = e
+            metrics.incr(f"{self.name}.batches")
+            metrics.incr(f"{self.name}.rows", size)
+            for request in batch:
+                request.done.set()
+
+
+class EmbeddingBatcher(MicroBatcher):
+    """
+    Micro-batches encode calls from concurrent requests into one forward pass.
+
+    `encode` takes the same arguments the repo passes to SentenceTransformer.encode, so the
+    batcher can be used wherever the model was.
+    """
+
+    name = "embedding"
+
+    def __init__(self, model, max_batch: int = EMBED_MAX_BATCH, max_wait_ms: float = EMBED_MAX_WAIT_MS,
+                 threads: Optional[int] = EMBED_THREADS, idle_seconds: float = EMBED_IDLE_SECONDS):
+        super().__init__(max_batch, max_wait_ms, threads, idle_seconds)
+        self.model = model
+
+    def encode(self, sentences: List[str], convert_to_numpy: bool = True, timeout: Optional[float] = None) -> np.ndarray:
+        texts = list(sentences)
+        if not texts:
+            return self.model.encode([], convert_to_numpy=True)
+        return self.submit(texts, len(texts), timeout)
+
+    def _setup_thread(self):
+        if self.threads and "torch" in sys.modules:
+            sys.modules["torch"].set_num_threads(self.threads)
+
+    def _process(self, batch: List[_Request]):
+        texts = [text for request in batch for text in request.payload]
+        vectors = np.asarray(
+            self.model.encode(texts, convert_to_numpy=True, batch_size=len(texts), show_progress_bar=False),
+            dtype=np.float32,
+        )
+        offset = 0
+        for request in batch:
+            # Copies, so a caller normalising its rows in place cannot touch another caller's
+            request.result = vectors[offset:offset + request.size].copy()
+            offset += request.size
@@ -0,0 +1,84 @@
+import hashlib
+import sqlite3
+from pathlib import Path
+from typing import Dict, Iterable, List
+
+import numpy as np
+
+# SQLite's default limit on bound parameters per statement is 999 on older builds
+_LOOKUP_BATCH = 500
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    Persistent chunk embeddings keyed by (model name, sha256 of the chunk text).
+
+    Used by create_vector_store.py so a rebuild only encodes chunks whose text is new or
+    changed; everything else comes from here. Vectors are stored L2-normalised as float32.
+    """
+
+    def __init__(self, path: str = "data/cache/embeddings.sqlite3"):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.path), isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS embeddings (
+                model TEXT NOT NULL,
+                text_hash TEXT NOT NULL,
+                dim INTEGER NOT NULL,
+                vector BLOB NOT NULL,
+                PRIMARY KEY (model, text_hash)
+            )
+        """)
+
+    def get_many(self, model: str, hashes: Iterable[str]) -> Dict[str, np.ndarray]:
+        hashes = list(dict.fromkeys(hashes))
+        found: Dict[str, np.ndarray] = {}
+        for i in range(0, len(hashes), _LOOKUP_BATCH):
+            batch = hashes[i:i + _LOOKUP_BATCH]
+            placeholders = ",".join("?" * len(batch))
+            rows = self.conn.execute(
+                f"SELECT text_hash, dim, vector FROM embeddings WHERE model = ? AND text_hash IN ({placeholders})",
+                (model, *batch),
+            )
+            for key, dim, blob in rows:
+                found[key] = np.frombuffer(blob, dtype=np.float32, count=dim)
+        return found
+
+    def missing(self, model: str, hashes: Iterable[str]) -> List[str]:
+        """The hashes with no stored vector (only the keys are read)."""
+        hashes = list(dict.fromkeys(hashes))
+        present = set()
+        for i in range(0, len(hashes), _LOOKUP_BATCH):
+            batch = hashes[i:i + _LOOKUP_BATCH]
+            placeholders = ",".join("?" * len(batch))
+            rows = self.conn.execute(
+                f"SELECT text_hash FROM embeddings WHERE model = ? AND text_hash IN ({placeholders})",
+                (model, *batch),
+            )
+            present.update(key for (key,) in rows)
+        return [key for key in hashes if key not in present]
+
+    def put_many(self, model: str, vectors: Dict[str, np.ndarray]):
+        self.conn.execute("BEGIN")
+        try:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, text_hash, dim, vector) VALUES (?, ?, ?, ?)",
+                [(model, key, len(v), np.asarray(v, dtype=np.float32).tobytes()) for key, v in vectors.items()],
+            )
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+
+    def count(self, model: str) -> int:
+        (n,) = self.conn.execute("SELECT COUNT(*) FROM embeddings WHERE model = ?", (model,)).fetchone()
+        return n
+
+    def close(self):
+        self.conn.close()
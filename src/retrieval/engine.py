@@ -1,14 +1,54 @@
 import os
 import json
-from typing import Dict, Any
+import logging
+from typing import Dict, Any, List
 from .orchestrator import LegalOrchestrator
-from .responder import LegalResponder
+from .responder import LegalResponder, PROMPT_VERSION
+from .cache import ResponseCache, build_cache_key, normalize_query
+from .metrics import metrics
+from .singleflight import SingleFlight
+
+logger = logging.getLogger("LegalRAG-Engine")
 
 class LegalEngine:
-    def __init__(self, store_dir: str = "data/vector_store"):
-        self.orchestrator = LegalOrchestrator(store_dir)
+    def __init__(self, store_dir: str = "data/vector_store", defer_semantic: bool = False):
+        # With defer_semantic, queries run on BM25 alone until load_semantic() finishes
+        self.orchestrator = LegalOrchestrator(store_dir, defer_semantic=defer_semantic)
         # We can force a model if needed, e.g. gemini-1.5-flash for speed/quota
         self.responder = LegalResponder()
+        # Disk-backed answer cache shared across restarts and workers (None when disabled)
+        self.cache = ResponseCache.from_env()
+        # Identical concurrent queries share one classification/retrieval/generation
+        self.inflight = SingleFlight("engine.query")
+        self.coalesce_timeout = float(os.getenv("QUERY_COALESCE_TIMEOUT", 60))
+
+    @property
+    def store_version(self) -> str:
+        return self.orchestrator.engine.store_version
+
+    @property
+    def retrieval_mode(self) -> str:
+        return self.orchestrator.engine.retrieval_mode
+
+    @property
+    def components(self) -> Dict[str, Dict[str, Any]]:
+        """Per-component load status and timings (metadata, bm25, embedding_model, faiss)."""
+        return self.orchestrator.engine.components
+
+    def load_semantic(self):
+        """Second load phase: embedding model and FAISS, then the LLM clients (google.genai is slow to import)."""
+        self.orchestrator.engine.load_semantic()
+        _ = self.orchestrator.classifier.client, self.responder.client
+
+    @property
+    def model_id(self) -> str:
+        return ",".join(self.responder.model_ids)
+
+    def _cache_key(self, query_text: str, orchestration: Dict[str, Any]) -> str:
+        # The rendered prompt also depends on the detected user context, so it is part of the query key
+        user_context = orchestration["intent"].get("user_context", "informational")
+        chunk_ids = [c["chunk"].get("chunk_id") or c["chunk"]["canonical_header"] for c in orchestration["results"]]
+        return build_cache_key(f"{user_context}|{normalize_query(query_text)}", chunk_ids, self.model_id, PROMPT_VERSION)
 
     def query(self, query_text: str) -> Dict[str, Any]:
         """
@@ -17,24 +57,64 @@ class LegalEngine:
         2. Hybrid Retrieval (Semantic + Keywords)
         3. Priority Filtering & Parent Expansion
         4. Structured Answer Generation
+
+        Concurrent calls with the same normalized query wait for the in-flight one.
         """
+        result = self.inflight.do(
+            normalize_query(query_text),
+            lambda: self._run_query(query_text),
+            timeout=self.coalesce_timeout,
+        )
+        return {**result, "query": query_text}
+
+    def _run_query(self, query_text: str) -> Dict[str, Any]:
         # 1. Orchestrate
         orchestration = self.orchestrator.orchestrate(query_text)
         
         # 2. Respond
-        response_data = self.responder.generate_response(
-            query=query_text,
-            context=orchestration["results"],
-            intent=orchestration["intent"]
-        )
+        return self.respond(query_text, orchestration)
+
+    def orchestrate(self, query_text: str) -> Dict[str, Any]:
+        """Classification and retrieval for one query, without generating the answer."""
+        return self.orchestrator.orchestrate(query_text)
+
+    def orchestrate_batch(self, queries: List[str], max_workers: int = 8) -> List[Dict[str, Any]]:
+        """Classification and retrieval for a batch of queries (batched encode + FAISS search)."""
+        return self.orchestrator.orchestrate_batch(queries, max_workers=max_workers)
+
+    def respond(self, query_text: str, orchestration: Dict[str, Any]) -> Dict[str, Any]:
+        """Generates (or reuses a cached answer built from the same evidence) for an orchestrated query."""
+        cache_key = None
+        response = None
+        if self.cache:
+            try:
+                cache_key = self._cache_key(query_text, orchestration)
+                response = self.cache.get(cache_key)
+            except Exception as e:
+                logger.warning(f"Response cache lookup failed: {e}")
+            metrics.incr("response_cache.hit" if response is not None else "response_cache.miss")
+
+        if response is None:
+            response_data = self.responder.generate_response(
+                query=query_text,
+                context=orchestration["results"],
+                intent=orchestration["intent"]
+            )
+            response = response_data.model_dump()
+            if cache_key:
+                try:
+                    self.cache.set(cache_key, response, store_version=self.store_version, model_id=self.model_id)
+                except Exception as e:
+                    logger.warning(f"Response cache write failed: {e}")
         
         return {
             "query": query_text,
             "intent": orchestration["intent"],
-            "response": response_data.model_dump(),
+            "response": response,
             "context_used": [
                 {
                     "citation": c["chunk"]["canonical_header"],
+                    "chunk_id": c["chunk"].get("chunk_id"),
                     "expanded": "parent_context" in c
                 } for c in orchestration["results"]
             ]
@@ -0,0 +1,174 @@
+import json
+import logging
+from typing import Any, Dict, Optional, Type, TypeVar
+
+from pydantic import BaseModel, ValidationError
+
+from .metrics import metrics
+
+logger = logging.getLogger("LegalRAG-JSONRepair")
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+# How many cut points to try when a truncated object still fails to parse
+MAX_TRUNCATION_CUTS = 20
+
+
+def strip_code_fences(text: str) -> str:
+    """Removes a surrounding ```json fence, the way well-behaved responses are formatted."""
+    text = text.strip()
+    if "```json" in text:
+        text = text.split("```json")[-1].split("```")[0].strip()
+    elif "```" in text:
+        text = text.split("```")[-1].split("```")[0].strip()
+    return text
+
+
+def extract_json_block(text: str) -> Optional[str]:
+    """
+    Returns the first JSON object in an LLM response.
+
+    Skips prose preambles and code fences by scanning from the first '{' and tracking
+    string/escape state, so braces inside strings don't end the object early.
+    If the object is never closed (truncated output), everything from the '{' is returned.
+    """
+    start = text.find("{")
+    if start == -1:
+        return None
+
+    depth = 0
+    in_string = False
+    escaped = False
+    for i in range(start, len(text)):
+        ch = text[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+            continue
+
+        if ch == '"':
+            in_string = True
+        elif ch in "{[":
+            depth += 1
+        elif ch in "}]":
+            depth -= 1
+            if depth == 0:
+                return text[start:i + 1]
+
+    return text[start:].rstrip().rstrip("`").rstrip()
+
+
+def _scan(text: str):
+    """Drops trailing commas and returns (cleaned text, comma cut points, open brackets, in_string)."""
+    out = []
+    cuts = []
+    stack = []
+    in_string = False
+    escaped = False
+    n = len(text)
+    for i, ch in enumerate(text):
+        if in_string:
+            out.append(ch)
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+            continue
+
+        if ch == '"':
+            in_string = True
+        elif ch in "{[":
+            stack.append(ch)
+        elif ch in "}]":
+            if stack:
+                stack.pop()
+        elif ch == ",":
+            j = i + 1
+            while j < n and text[j].isspace():
+                j += 1
+            if j == n or text[j] in "}]":
+                continue  # trailing comma
+            cuts.append((len(out), list(stack)))
+        out.append(ch)
+
+    return "".join(out), cuts, stack, in_string
+
+
+def _close(text: str, stack, in_string: bool) -> str:
+    closers = "".join("}" if opener == "{" else "]" for opener in reversed(stack))
+    return text + ('"' if in_string else "") + closers
+
+
+def repair_json(text: str) -> Optional[Dict[str, Any]]:
+    """
+    Best-effort parse of a malformed JSON object.
+
+    Handles trailing commas and truncated output: open strings and brackets are closed,
+    and if the last member is incomplete (dangling key, half-written literal) the object
+    is cut back to the previous complete member.
+    """
+    cleaned, cuts, stack, in_string = _scan(text)
+
+    candidates = [_close(cleaned, stack, in_string)]
+    for pos, cut_stack in reversed(cuts[-MAX_TRUNCATION_CUTS:]):
+        candidates.append(_close(cleaned[:pos], cut_stack, False))
+
+    for candidate in candidates:
+        try:
+            value = json.loads(candidate)
+        except json.JSONDecodeError:
+            continue
+        if isinstance(value, dict):
+            return value
+    return None
+
+
+def parse_model_json(text: str, model_cls: Type[ModelT], fallbacks: Optional[Dict[str, Any]] = None) -> ModelT:
+    """
+    Validates an LLM JSON response into `model_cls`, repairing it if needed.
+
+    The fenced strict path is tried first. If it fails, the object is extracted and repaired,
+    missing fields are filled from `fallbacks`, and the result is accepted as long as the
+    remaining required fields validate. Each accepted repair is one model retry avoided.
+    """
+    try:
+        return model_cls.model_validate_json(strip_code_fences(text))
+    except ValidationError:
+        pass
+
+    block = extract_json_block(text)
+    if block is None:
+        metrics.incr("llm.json_repair.failed")
+        raise ValueError("No JSON object found in model output.")
+
+    try:
+        result = model_cls.model_validate_json(block)
+        metrics.incr("llm.json_repair.retries_avoided")
+        return result
+    except ValidationError:
+        pass
+
+    data = repair_json(block)
+    if data is None:
+        metrics.incr("llm.json_repair.failed")
+        raise ValueError("Model output is not repairable JSON.")
+
+    for key, value in (fallbacks or {}).items():
+        if data.get(key) is None:
+            data[key] = value
+
+    try:
+        result = model_cls.model_validate(data)
+    except ValidationError:
+        metrics.incr("llm.json_repair.failed")
+        raise
+
+    logger.info(f"Repaired malformed JSON for {model_cls.__name__}")
+    metrics.incr("llm.json_repair.retries_avoided")
+    return result
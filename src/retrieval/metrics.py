@@ -0,0 +1,28 @@
+import threading
+from typing import Dict
+
+
+class Metrics:
+    """
+    Process-local counters for the engine and server.
+    Each uvicorn worker keeps its own set; they are exposed via /api/v1/metrics.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, int] = {}
+
+    def incr(self, name: str, value: int = 1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def get(self, name: str) -> int:
+        with self._lock:
+            return self._counters.get(name, 0)
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._counters)
+
+
+metrics = Metrics()
@@ -1,19 +1,23 @@
-import json
 import os
-from typing import List, Dict, Any
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Tuple
 from pathlib import Path
 from .classifier import QueryClassifier, QueryIntent
 from .retrieval_engine import RetrievalEngine
+from .store import resolve_store_dir
+
+# Act / scheme codes as they appear in chunk metadata
+KNOWN_LAWS = ("BNS", "BNSS", "BSA", "NALSA", "SOP")
 
 class LegalOrchestrator:
-    def __init__(self, store_dir: str = "data/vector_store"):
-        self.engine = RetrievalEngine(store_dir)
+    def __init__(self, store_dir: str = "data/vector_store", defer_semantic: bool = False):
+        # Resolved once so the retrieval engine and the lookup tables read the same store version
+        self.store_dir = resolve_store_dir(store_dir)
+        self.engine = RetrievalEngine(self.store_dir, defer_semantic=defer_semantic)
         self.classifier = QueryClassifier()
-        self.store_dir = Path(store_dir)
         
-        # Load metadata into a lookup table for expansion
-        with open(self.store_dir / "metadata.json", "r", encoding="utf-8") as f:
-            self.all_chunks = json.load(f)
+        # Section lookup for expansion, built from the metadata the retrieval engine already loaded
+        self.all_chunks = self.engine.chunks
         
         # Build a lookup for sections: (law, section) -> chunk
         self.section_lookup = {}
@@ -28,14 +32,64 @@ class LegalOrchestrator:
 
     def orchestrate(self, query: str, k: int = 5) -> Dict[str, Any]:
         # 1. Classify Intent
+        intent = self.classify(query)
+
+        # 2. Retrieval with Concept Expansion
+        search_queries = self.build_search_queries(query, intent)
+        results = self.engine.search_batch(
+            [q for q, _ in search_queries], k=k, hybrid_weights=[w for _, w in search_queries]
+        )
+
+        return self.assemble(intent, results, k)
+
+    def orchestrate_batch(self, queries: List[str], k: int = 5, max_workers: int = 8) -> List[Dict[str, Any]]:
+        """
+        Orchestrates many queries together.
+        Classification calls run concurrently (bounded by `max_workers`), and the search
+        queries of the whole batch go through a single batched encode + FAISS search.
+        """
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            intents = list(pool.map(self.classify, queries))
+
+        plans = [self.build_search_queries(q, intent) for q, intent in zip(queries, intents)]
+        flat = [sq for plan in plans for sq in plan]
+        flat_results = self.engine.search_batch([q for q, _ in flat], k=k, hybrid_weights=[w for _, w in flat])
+
+        orchestrations = []
+        offset = 0
+        for intent, plan in zip(intents, plans):
+            orchestrations.append(self.assemble(intent, flat_results[offset:offset + len(plan)], k))
+            offset += len(plan)
+        return orchestrations
+
+    def search(self, query: str, k: int = 5, hybrid_weight: float = 0.5,
+               filters: Optional[Dict[str, Any]] = None) -> List[Dict]:
+        """
+        Retrieval-only path: hybrid search, priority rules and parent expansion without any LLM call.
+        """
+        results = self.engine.search(query, k=k, hybrid_weight=hybrid_weight, filters=filters)
+        return self.expand_results(self.prioritize_results(results, self.search_intent(query)))
+
+    def search_intent(self, query: str) -> QueryIntent:
+        """Neutral informational intent for the retrieval-only path; acts named in the query still get their boost."""
+        mentioned_laws = [law for law in KNOWN_LAWS if law in query.upper().split()]
+        return QueryIntent(
+            category="general_explanation",
+            key_entities=mentioned_laws,
+            user_context="informational",
+            confidence=1.0
+        )
+
+    def classify(self, query: str) -> QueryIntent:
         print(f"Classifying query: {query}")
         try:
-            intent = self.classifier.classify(query)
+            return self.classifier.classify(query)
         except Exception as e:
             print(f"Classification failed: {e}. Falling back to general.")
-            intent = QueryIntent(category="general_explanation", confidence=0.5, key_entities=[], user_context="informational")
+            return QueryIntent(category="general_explanation", confidence=0.5, key_entities=[], user_context="informational")
 
-        # 2. Retrieval with Concept Expansion
+    def build_search_queries(self, query: str, intent: QueryIntent) -> List[Tuple[str, float]]:
+        """Returns the (search query, hybrid weight) pairs to run for a classified query."""
         search_queries = [query]
         
         # If victim in distress, force-inject procedural and compensation queries
@@ -47,16 +101,21 @@ class LegalOrchestrator:
             search_queries.append(f"Victim compensation rights for {offence} NALSA scheme")
             search_queries.append("Zero FIR registration procedure BNSS")
 
+        # Shift hybrid weight for procedural queries
+        return [
+            (q, 0.6 if intent.category == "procedure" or "procedure" in q.lower() else 0.5)
+            for q in search_queries
+        ]
+
+    def assemble(self, intent: QueryIntent, results_per_query: List[List[Dict]], k: int = 5) -> Dict[str, Any]:
         # Combine results from all queries
         all_raw_results = []
         seen_chunks = set()
         
-        for q in search_queries:
-            # Shift hybrid weight for procedural queries
-            q_weight = 0.6 if intent.category == "procedure" or "procedure" in q.lower() else 0.5
-            results = self.engine.search(q, k=k, hybrid_weight=q_weight)
+        for results in results_per_query:
             for r in results:
-                chunk_id = r["chunk"].get("canonical_header")
+                # Stores built before chunk ids only have the header to tell chunks apart
+                chunk_id = r["chunk"].get("chunk_id") or r["chunk"].get("canonical_header")
                 if chunk_id and chunk_id not in seen_chunks:
                     all_raw_results.append(r)
                     seen_chunks.add(chunk_id)
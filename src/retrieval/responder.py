@@ -1,10 +1,10 @@
 import os
 import json
+import hashlib
 from typing import List, Optional, Dict, Any
 from pydantic import BaseModel, Field
-from google import genai
-from google.genai import types
 from dotenv import load_dotenv
+from .json_repair import parse_model_json
 
 load_dotenv()
 
@@ -24,12 +24,63 @@ class LegalResponse(BaseModel):
     sources: List[LegalSource] = Field(..., description="Exact sources used from the provided context.")
     disclaimer: str = Field(..., description="Mandatory non-advisory legal disclaimer.")
 
+SYSTEM_INSTRUCTION_TEMPLATE = """
+You are a supportive and highly precise Indian Legal Assistant. Your primary goal is to assist users, particularly victims of crimes, by providing clear, actionable, and empathetic guidance.
+
+USER CONTEXT: {user_context}
+
+VICTIM-CENTRIC RULES (Priority if context is 'victim_distress'):
+1. FIRST PRIORITY: User safety. Use the 'safety_alert' field for critical advice (e.g., "Call 112 immediately", "Move to a secure location").
+2. SECOND PRIORITY: Immediate Action. List 3-5 clear steps in 'immediate_action_plan'. Use simple verbs. Use Grade 8 reading level (no complex words).
+3. TONE: Supportive, direct, and empathetic. Address the user as 'You'. Avoid cold, passive language.
+4. ANSWER FORMATTING: The 'answer' field MUST be formatted in Markdown. Merge the content of 'important_notes' seamlessly into the answer where relevant to create a comprehensive response. Use bolding and bullet points for readability.
+5. ACCESSIBILITY: If you use terms like 'Cognizable' or 'Bailable', explain them in simple terms in parentheses (e.g., 'Cognizable (a serious crime where police can arrest without a warrant)').
+
+GENERAL / INFORMATIONAL RULES (if context is 'informational' or 'professional'):
+1. DO NOT generate 'safety_alert' or 'immediate_action_plan'. Leave them null/empty.
+2. ANSWER FORMATTING: The 'answer' field MUST be formatted in Markdown. Organize complex information into bullet points. Merge 'important_notes' into the answer text flow.
+3. Only use the provided context. If the answer is not in the context, state it clearly.
+4. Citations must be exact. Cite the canonical header.
+5. Do not give personalized legal advice.
+6. Always include the mandatory disclaimer.
+"""
+
+RESPONSE_PROMPT_TEMPLATE = """
+User Query: {query}
+Intent Category: {category}
+Key Entities: {key_entities}
+
+Legal Context:
+{context_str}
+
+Task: Provide a structured legal response in JSON format with these EXACT keys:
+1. "safety_alert": (string or null, e.g., "Dial 112 immediately if you are in danger.")
+2. "immediate_action_plan": (list of strings, e.g., ["Go to nearest police station", "Register Zero FIR"])
+3. "answer": (string, prioritized by user urgency)
+4. "legal_basis": (string)
+5. "procedure_steps": (list of strings)
+6. "important_notes": (list of strings)
+7. "sources": (list of objects with keys: "law", "section", "content", "citation")
+8. "disclaimer": (string)
+"""
+
+# Used when a repaired model response is missing its disclaimer
+DEFAULT_DISCLAIMER = (
+    "This information is for general awareness only and is not legal advice. "
+    "Please consult a qualified lawyer or contact local authorities (Dial 112 in an emergency)."
+)
+
+# Changes whenever either template changes; used to key cached responses
+PROMPT_VERSION = hashlib.sha256((SYSTEM_INSTRUCTION_TEMPLATE + RESPONSE_PROMPT_TEMPLATE).encode("utf-8")).hexdigest()[:16]
+
 class LegalResponder:
     def __init__(self, model_ids: Optional[List[str]] = None):
         api_key = os.getenv("GEMINI_API_KEY") or os.getenv("GOOGLE_API_KEY")
         if not api_key:
             raise ValueError("API Key (GEMINI_API_KEY or GOOGLE_API_KEY) not found in environment variables.")
-        self.client = genai.Client(api_key=api_key)
+        # google.genai is slow to import; the client is created on the first LLM call
+        self.api_key = api_key
+        self._client = None
         
         # Default model list if not provided
         default_models = ["gemma-3-4b-it", "gemini-2.5-flash-lite", "gemma-3-12b-it"]
@@ -40,29 +91,19 @@ class LegalResponder:
         else:
             self.model_ids = model_ids or default_models
 
+    @property
+    def client(self):
+        if self._client is None:
+            from google import genai
+            self._client = genai.Client(api_key=self.api_key)
+        return self._client
+
     def generate_response(self, query: str, context: List[Dict[str, Any]], intent: Dict[str, Any]) -> LegalResponse:
+        from google.genai import types as genai_types
+
         user_context = intent.get("user_context", "informational")
         
-        system_instruction = f"""
-        You are a supportive and highly precise Indian Legal Assistant. Your primary goal is to assist users, particularly victims of crimes, by providing clear, actionable, and empathetic guidance.
-        
-        USER CONTEXT: {user_context}
-        
-        VICTIM-CENTRIC RULES (Priority if context is 'victim_distress'):
-        1. FIRST PRIORITY: User safety. Use the 'safety_alert' field for critical advice (e.g., "Call 112 immediately", "Move to a secure location").
-        2. SECOND PRIORITY: Immediate Action. List 3-5 clear steps in 'immediate_action_plan'. Use simple verbs. Use Grade 8 reading level (no complex words).
-        3. TONE: Supportive, direct, and empathetic. Address the user as 'You'. Avoid cold, passive language.
-        4. ANSWER FORMATTING: The 'answer' field MUST be formatted in Markdown. Merge the content of 'important_notes' seamlessly into the answer where relevant to create a comprehensive response. Use bolding and bullet points for readability.
-        5. ACCESSIBILITY: If you use terms like 'Cognizable' or 'Bailable', explain them in simple terms in parentheses (e.g., 'Cognizable (a serious crime where police can arrest without a warrant)').
-        
-        GENERAL / INFORMATIONAL RULES (if context is 'informational' or 'professional'):
-        1. DO NOT generate 'safety_alert' or 'immediate_action_plan'. Leave them null/empty.
-        2. ANSWER FORMATTING: The 'answer' field MUST be formatted in Markdown. Organize complex information into bullet points. Merge 'important_notes' into the answer text flow.
-        3. Only use the provided context. If the answer is not in the context, state it clearly.
-        4. Citations must be exact. Cite the canonical header.
-        5. Do not give personalized legal advice.
-        6. Always include the mandatory disclaimer.
-        """
+        system_instruction = SYSTEM_INSTRUCTION_TEMPLATE.format(user_context=user_context)
 
         # Format context for the prompt
         context_items = []
@@ -86,24 +127,12 @@ class LegalResponder:
                 
                 is_gemma = "gemma" in model_id.lower()
                 
-                prompt = f"""
-                User Query: {query}
-                Intent Category: {intent.get('category')}
-                Key Entities: {', '.join(intent.get('key_entities', []))}
-
-                Legal Context:
-                {context_str}
-
-                Task: Provide a structured legal response in JSON format with these EXACT keys:
-                1. "safety_alert": (string or null, e.g., "Dial 112 immediately if you are in danger.")
-                2. "immediate_action_plan": (list of strings, e.g., ["Go to nearest police station", "Register Zero FIR"])
-                3. "answer": (string, prioritized by user urgency)
-                4. "legal_basis": (string)
-                5. "procedure_steps": (list of strings)
-                6. "important_notes": (list of strings)
-                7. "sources": (list of objects with keys: "law", "section", "content", "citation")
-                8. "disclaimer": (string)
-                """
+                prompt = RESPONSE_PROMPT_TEMPLATE.format(
+                    query=query,
+                    category=intent.get('category'),
+                    key_entities=', '.join(intent.get('key_entities', [])),
+                    context_str=context_str,
+                )
                 
                 if is_gemma:
                     full_prompt = f"{system_instruction}\n\n{prompt}\nIMPORTANT: Return ONLY valid JSON."
@@ -111,17 +140,16 @@ class LegalResponder:
                         model=model_id,
                         contents=full_prompt,
                     )
-                    text = response.text.strip()
-                    if "```json" in text:
-                        text = text.split("```json")[-1].split("```")[0].strip()
-                    elif "```" in text:
-                        text = text.split("```")[-1].split("```")[0].strip()
-                    result = LegalResponse.model_validate_json(text)
+                    # Sources are replaced with the real context below, so they can be defaulted
+                    result = parse_model_json(response.text, LegalResponse, fallbacks={
+                        "sources": [],
+                        "disclaimer": DEFAULT_DISCLAIMER,
+                    })
                 else:
                     response = self.client.models.generate_content(
                         model=model_id,
                         contents=prompt,
-                        config=types.GenerateContentConfig(
+                        config=genai_types.GenerateContentConfig(
                             system_instruction=system_instruction,
                             response_mime_type="application/json",
                             response_schema=LegalResponse,
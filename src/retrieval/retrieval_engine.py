@@ -8,75 +8,278 @@ import logging
 os.environ["HF_HOME"] = os.path.join(os.getcwd(), ".hf_cache")
 os.environ["TRANSFORMERS_CACHE"] = os.path.join(os.getcwd(), ".hf_cache")
 
-import faiss
 import numpy as np
-import pickle
+import time
+from contextlib import contextmanager
 from pathlib import Path
-from sentence_transformers import SentenceTransformer
-from rank_bm25 import BM25Okapi
+from typing import Any, Dict, List, Optional, Union
 from dotenv import load_dotenv
+from .bm25_arrays import load_bm25
+from .embedding_batcher import EmbeddingBatcher
+from .search_scheduler import SearchScheduler
+from .store import (CHUNK_IDS_FILE, StoreValidationError, check_embedding_model, resolve_store_dir, store_version,
+                    validate_store)
 
 load_dotenv()
 
 logger = logging.getLogger("LegalRAG-RetrievalEngine")
 
+# Read-only memory maps let every worker process share one copy of the index pages
+FAISS_MMAP = os.getenv("FAISS_MMAP", "true").lower() not in ("0", "false", "no")
+
+# Coalesce query embeddings from concurrent requests into shared encode calls
+EMBED_BATCHING = os.getenv("EMBED_BATCHING", "true").lower() not in ("0", "false", "no")
+# Coalesce concurrent FAISS lookups into shared multi-row searches on one thread
+FAISS_BATCHING = os.getenv("FAISS_BATCHING", "true").lower() not in ("0", "false", "no")
+
+# Load order: the lexical phase (metadata + BM25) is enough to answer queries; the semantic
+# phase (embedding model + FAISS) upgrades retrieval to hybrid once it finishes
+LEXICAL_COMPONENTS = ("metadata", "bm25")
+SEMANTIC_COMPONENTS = ("embedding_model", "faiss")
+
 class RetrievalEngine:
-    def __init__(self, store_dir: str = "data/vector_store"):
-        self.store_dir = Path(store_dir)
-        
-        # 1. Load Model
+    def __init__(self, store_dir: str = "data/vector_store", defer_semantic: bool = False):
+        """
+        Loads the lexical phase immediately. With `defer_semantic` the caller must call
+        `load_semantic()` later; until then searches are BM25-only.
+        """
+        self.store_dir = resolve_store_dir(store_dir)
+        self.store_version = store_version(self.store_dir)
+        self.components: Dict[str, Dict[str, Any]] = {
+            name: {"status": "pending", "seconds": None} for name in LEXICAL_COMPONENTS + SEMANTIC_COMPONENTS
+        }
+        self.model = None
+        self.encoder = None
+        self.index = None
+        self.searcher = None
+        self.semantic_ready = False
+
+        # 1. Load Metadata (after checking the build against its manifest: sizes and headers only)
+        with self._phase("metadata"):
+            self.manifest = validate_store(self.store_dir)
+            if self.manifest is None:
+                logger.warning(f"{self.store_dir} has no manifest (built before manifests); it is not validated")
+            with open(self.store_dir / "metadata.json", "r", encoding="utf-8") as f:
+                self.chunks = json.load(f)
+            self._check_count("metadata.json", len(self.chunks))
+            self._load_id_map()
+        logger.info(f"Metadata loaded! {len(self.chunks)} chunks.")
+
+        # 2. Load BM25
+        with self._phase("bm25"):
+            # Flat (memory-mapped) postings arrays; faiss and sentence_transformers wait for the semantic phase
+            self.bm25 = load_bm25(self.store_dir)
+            self._check_count("the BM25 index", self.bm25.corpus_size)
+        logger.info("BM25 index loaded! Lexical retrieval is available.")
+        sys.stdout.flush()
+
+        if not defer_semantic:
+            self.load_semantic()
+
+    def _load_id_map(self):
+        """
+        Row <-> chunk id <-> FAISS id. Stores built before chunk ids have no map; their FAISS ids
+        are the rows themselves.
+        """
+        id_map_path = self.store_dir / CHUNK_IDS_FILE
+        if id_map_path.exists():
+            with open(id_map_path, "r", encoding="utf-8") as f:
+                id_map = json.load(f)
+            if len(id_map["faiss_ids"]) != len(self.chunks):
+                raise ValueError(f"{id_map_path} has {len(id_map['faiss_ids'])} ids for {len(self.chunks)} chunks")
+            self.chunk_ids = id_map["chunk_ids"]
+            self.faiss_ids = np.asarray(id_map["faiss_ids"], dtype="int64")
+        else:
+            self.chunk_ids = [c.get("chunk_id") for c in self.chunks]
+            self.faiss_ids = np.arange(len(self.chunks), dtype="int64")
+        self._id_order = np.argsort(self.faiss_ids, kind="stable")
+        self._sorted_ids = self.faiss_ids[self._id_order]
+
+    def _check_count(self, what: str, count: int):
+        if self.manifest is not None and count != self.manifest["chunk_count"]:
+            raise StoreValidationError(f"{what} in {self.store_dir} has {count} chunks, "
+                                       f"the manifest says {self.manifest['chunk_count']}")
+
+    def rows_for_ids(self, ids: np.ndarray) -> np.ndarray:
+        """Metadata rows of FAISS result ids; -1 (no result) and unknown ids map to -1."""
+        ids = np.asarray(ids, dtype="int64")
+        pos = np.searchsorted(self._sorted_ids, ids).clip(0, len(self._sorted_ids) - 1)
+        return np.where(self._sorted_ids[pos] == ids, self._id_order[pos], -1)
+
+    @contextmanager
+    def _phase(self, name: str):
+        state = self.components[name]
+        state["status"] = "loading"
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception as e:
+            state.update(status="error", error=str(e), seconds=round(time.perf_counter() - start, 3))
+            raise
+        state.update(status="ready", seconds=round(time.perf_counter() - start, 3))
+
+    @property
+    def retrieval_mode(self) -> str:
+        return "hybrid" if self.semantic_ready else "lexical"
+
+    def load_semantic(self):
+        """Loads the embedding model and FAISS index, then switches searches to hybrid."""
+        # 3. Load Model (sentence_transformers pulls in torch, so it is only imported here)
         model_name = os.getenv("EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
         logger.info(f"Loading SentenceTransformer model: {model_name}...")
         sys.stdout.flush()
-        self.model = SentenceTransformer(model_name)
+        with self._phase("embedding_model"):
+            # Vectors from another model would load fine and return nonsense, so refuse them
+            check_embedding_model(self.manifest, model_name)
+            from sentence_transformers import SentenceTransformer
+            model = SentenceTransformer(model_name)
+            if self.manifest is not None:
+                # get_embedding_dimension in newer sentence-transformers releases
+                dimension = getattr(model, "get_embedding_dimension", None) or model.get_sentence_embedding_dimension
+                check_embedding_model(self.manifest, model_name, dimension())
         logger.info("SentenceTransformer model loaded!")
-        sys.stdout.flush()
-        
-        # 2. Load FAISS
+
+        # 4. Load FAISS
         index_path = self.store_dir / "index.faiss"
         logger.info(f"Loading FAISS index from {index_path}...")
+        with self._phase("faiss"):
+            import faiss
+            index = None
+            if FAISS_MMAP and hasattr(faiss, "IO_FLAG_MMAP_IFC"):
+                try:
+                    index = faiss.read_index(str(index_path), faiss.IO_FLAG_MMAP_IFC)
+                except RuntimeError as e:
+                    logger.warning(f"Could not memory-map {index_path}, reading it into memory: {e}")
+            if index is None:
+                index = faiss.read_index(str(index_path))
+        logger.info("FAISS index loaded! Hybrid retrieval is available.")
         sys.stdout.flush()
-        self.index = faiss.read_index(str(index_path))
-        logger.info("FAISS index loaded!")
-        sys.stdout.flush()
-        
-        # 3. Load BM25
-        logger.info("Loading BM25 index...")
-        sys.stdout.flush()
-        with open(self.store_dir / "bm25.pkl", "rb") as f:
-            self.bm25 = pickle.load(f)
-        logger.info("BM25 index loaded!")
-        sys.stdout.flush()
-            
-        # 4. Load Metadata
-        logger.info("Loading metadata...")
-        sys.stdout.flush()
-        with open(self.store_dir / "metadata.json", "r", encoding="utf-8") as f:
-            self.chunks = json.load(f)
-        logger.info(f"Metadata loaded! {len(self.chunks)} chunks.")
-        sys.stdout.flush()
 
-    def search(self, query: str, k: int = 5, hybrid_weight: float = 0.5):
+        self.model = model
+        self.encoder = EmbeddingBatcher(model) if EMBED_BATCHING else model
+        self.index = index
+        self.searcher = SearchScheduler(index) if FAISS_BATCHING else None
+        self.semantic_ready = True
+
+    # Metadata fields that search results can be filtered on
+    FILTER_FIELDS = ("law", "doc_type", "unit_type", "chapter", "section", "source_file", "year")
+
+    def search(self, query: str, k: int = 5, hybrid_weight: float = 0.5, filters: Optional[Dict[str, Any]] = None):
+        return self.search_batch([query], k=k, hybrid_weights=hybrid_weight, filters=filters)[0]
+
+    def search_batch(self, queries: List[str], k: int = 5, hybrid_weights: Union[float, List[float]] = 0.5,
+                     filters: Optional[Dict[str, Any]] = None) -> List[List[Dict]]:
+        """
+        Hybrid search for several queries at once.
+        All queries are embedded in one encode call and looked up in one multi-row FAISS search
+        (shared with concurrent requests by the embedding batcher and the search scheduler).
+        `filters` maps metadata fields to a value or list of accepted values (e.g. {"law": ["BNSS", "SOP"]}).
+        """
+        if not queries:
+            return []
+        if not isinstance(hybrid_weights, (list, tuple)):
+            hybrid_weights = [hybrid_weights] * len(queries)
+
+        allowed = self.filter_rows(filters) if filters else None
+        if allowed is not None and len(allowed) == 0:
+            return [[] for _ in queries]
+
+        if not self.semantic_ready:
+            return [self._lexical(query, k, allowed) for query in queries]
+
         # Semantic Search
-        query_vector = self.model.encode([query], convert_to_numpy=True)
-        faiss.normalize_L2(query_vector)
-        
-        distances, indices = self.index.search(query_vector, k * 2)
-        
-        # BM25 Search
-        tokenized_query = query.lower().split()
-        bm25_scores = self.bm25.get_scores(tokenized_query)
+        import faiss
+        query_vectors = self.encoder.encode(list(queries), convert_to_numpy=True)
+        faiss.normalize_L2(query_vectors)
+        # The index stores vectors under their chunk's FAISS id, so filters select by id too
+        allowed_ids = None if allowed is None else self.faiss_ids[allowed]
+
+        if self.searcher is not None:
+            distances, ids = self.searcher.search(query_vectors, k * 2, allowed_ids)
+        elif allowed is None:
+            distances, ids = self.index.search(query_vectors, k * 2)
+        else:
+            params = faiss.SearchParameters(sel=faiss.IDSelectorBatch(allowed_ids))
+            distances, ids = self.index.search(query_vectors, k * 2, params=params)
+        indices = self.rows_for_ids(ids)
+
+        return [
+            self._fuse(query, distances[row], indices[row], k, hybrid_weights[row], allowed)
+            for row, query in enumerate(queries)
+        ]
+
+    def filter_rows(self, filters: Dict[str, Any]) -> np.ndarray:
+        """Rows whose metadata matches every filter field (any of the listed values per field)."""
+        unknown = set(filters) - set(self.FILTER_FIELDS)
+        if unknown:
+            raise ValueError(f"Unsupported filter field(s): {', '.join(sorted(unknown))}")
+
+        field_values = self.filter_columns()
+        mask = np.ones(len(self.chunks), dtype=bool)
+        for field, values in filters.items():
+            if not isinstance(values, (list, tuple, set)):
+                values = [values]
+            mask &= np.isin(field_values[field], [str(v).lower() for v in values])
+        return np.flatnonzero(mask).astype("int64")
+
+    def chunk_by_id(self, chunk_id: str) -> Optional[Dict]:
+        """The chunk with this stable id (see chunk_ids.json), or None."""
+        if not hasattr(self, "_rows_by_id"):
+            self._rows_by_id = {cid: row for row, cid in enumerate(self.chunk_ids) if cid}
+        row = self._rows_by_id.get(chunk_id)
+        return None if row is None else self.chunks[row]
+
+    def filter_columns(self) -> Dict[str, np.ndarray]:
+        """Column view of the filterable metadata, built once on first use."""
+        if not hasattr(self, "_field_values"):
+            self._field_values = {
+                field: np.array([str(c.get("metadata", {}).get(field) or "").lower() for c in self.chunks])
+                for field in self.FILTER_FIELDS
+            }
+        return self._field_values
+
+    def bm25_scores(self, query: str) -> np.ndarray:
+        return np.asarray(self.bm25.get_scores(query.lower().split()))
+
+    def _lexical(self, query: str, k: int, allowed: Optional[np.ndarray] = None,
+                 bm25_scores: Optional[np.ndarray] = None) -> List[Dict]:
+        """BM25-only ranking, used until the semantic phase has loaded."""
+        if bm25_scores is None:
+            bm25_scores = self.bm25_scores(query)
+        candidates = np.arange(len(bm25_scores)) if allowed is None else allowed
+        candidate_scores = bm25_scores[candidates]
+        max_bm25 = candidate_scores.max() if len(candidate_scores) and candidate_scores.max() > 0 else 1.0
+
+        results = []
+        for row in np.argsort(-candidate_scores, kind="stable")[:k]:
+            if candidate_scores[row] <= 0:
+                break
+            keyword = float(candidate_scores[row] / max_bm25)
+            results.append({
+                "chunk": self.chunks[candidates[row]],
+                "score": keyword,
+                "semantic": 0.0,
+                "keyword": keyword
+            })
+        return results
+
+    def _fuse(self, query: str, distances, indices, k: int, hybrid_weight: float, allowed: Optional[np.ndarray] = None,
+              bm25_scores: Optional[np.ndarray] = None) -> List[Dict]:
+        # BM25 Search (unless the caller already scored the query)
+        if bm25_scores is None:
+            bm25_scores = self.bm25_scores(query)
         
         # Hybrid Ranking
         combined_results = []
         
-        # Normalize BM25 scores
-        max_bm25 = max(bm25_scores) if max(bm25_scores) > 0 else 1.0
+        # Normalize BM25 scores (over the filtered rows only, when filtering)
+        candidate_scores = bm25_scores if allowed is None else bm25_scores[allowed]
+        max_bm25 = max(candidate_scores) if max(candidate_scores) > 0 else 1.0
         
         seen_indices = set()
         
         # Add Semantic hits
-        for dist, idx in zip(distances[0], indices[0]):
+        for dist, idx in zip(distances, indices):
             if idx == -1: continue
             semantic_score = float(dist)
             bm25_score = bm25_scores[idx] / max_bm25
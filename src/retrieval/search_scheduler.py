@@ -0,0 +1,102 @@
+import os
+import sys
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .embedding_batcher import EMBED_IDLE_SECONDS, MicroBatcher, _Request
+
+# How long pending query vectors are collected before one matrix search, and the rows that end the wait early
+FAISS_MAX_WAIT_MS = float(os.getenv("FAISS_MAX_WAIT_MS", 1))
+FAISS_MAX_BATCH = int(os.getenv("FAISS_MAX_BATCH", 64))
+# OpenMP threads for the scheduler's searches (unset: FAISS's default, or the prefork per-worker setting)
+FAISS_THREADS = int(os.getenv("FAISS_THREADS", 0)) or None
+# Coalesced searches with at least this many rows use FAISS's BLAS (matrix-multiply) path on exact
+# indexes (0 keeps FAISS's own choice). FAISS 1.15 defaults to a threshold so high that batches
+# stay on the one-query-at-a-time loop, and any fixed lower value also moves single queries onto
+# the slower BLAS path, so it is set per search
+FAISS_BLAS_MIN_ROWS = int(os.getenv("FAISS_BLAS_MIN_ROWS", 8))
+
+# The threshold is one process-wide FAISS variable, and during a reload the old and new engine's
+# schedulers search at the same time. Setting it and the search it applies to happen under one lock.
+_blas_lock = threading.Lock()
+_default_blas_threshold: Optional[int] = None
+
+
+def _reset_after_fork():
+    global _blas_lock
+    _blas_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def _set_blas_threshold(faiss, rows: int, blas_min_rows: int):
+    """Call with `_blas_lock` held. Big batches take the BLAS path; everything else FAISS's default."""
+    global _default_blas_threshold
+    if _default_blas_threshold is None:
+        _default_blas_threshold = faiss.cvar.distance_compute_blas_threshold
+    use_blas = blas_min_rows and rows >= blas_min_rows
+    faiss.cvar.distance_compute_blas_threshold = 1 if use_blas else _default_blas_threshold
+
+
+class SearchScheduler(MicroBatcher):
+    """
+    Coalesces concurrent FAISS lookups into one multi-row `index.search`.
+
+    Every request's query vectors are stacked into one matrix and searched for the largest k
+    in the batch; each caller gets its own rows cut to its k. The index is exact, so a shorter
+    top-k is a prefix of a longer one. Requests restricted to a subset of ids (metadata
+    filters) are grouped by that subset, and each group is one search.
+
+    The searches all run on the scheduler's thread, so `omp_set_num_threads` there caps FAISS's
+    OpenMP pool for this index's searches instead of per request.
+    """
+
+    name = "faiss"
+
+    def __init__(self, index, max_batch: int = FAISS_MAX_BATCH, max_wait_ms: float = FAISS_MAX_WAIT_MS,
+                 threads: Optional[int] = FAISS_THREADS, blas_min_rows: int = FAISS_BLAS_MIN_ROWS,
+                 idle_seconds: float = EMBED_IDLE_SECONDS):
+        super().__init__(max_batch, max_wait_ms, threads, idle_seconds)
+        self.index = index
+        self.blas_min_rows = blas_min_rows
+
+    def search(self, vectors: np.ndarray, k: int, allowed: Optional[np.ndarray] = None,
+               timeout: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Same result as `index.search(vectors, k)`, restricted to the `allowed` ids if given."""
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        return self.submit((vectors, k, allowed), len(vectors), timeout)
+
+    def _setup_thread(self):
+        # OpenMP thread counts are per calling thread, so this only sizes the scheduler's own searches
+        if self.threads and "faiss" in sys.modules:
+            sys.modules["faiss"].omp_set_num_threads(self.threads)
+
+    def _process(self, batch: List[_Request]):
+        import faiss
+
+        groups: Dict[Optional[bytes], List[_Request]] = {}
+        for request in batch:
+            allowed = request.payload[2]
+            groups.setdefault(None if allowed is None else allowed.tobytes(), []).append(request)
+
+        for key, requests in groups.items():
+            matrix = np.vstack([r.payload[0] for r in requests])
+            k = max(r.payload[1] for r in requests)
+            params = None if key is None else faiss.SearchParameters(sel=faiss.IDSelectorBatch(requests[0].payload[2]))
+            with _blas_lock:
+                _set_blas_threshold(faiss, len(matrix), self.blas_min_rows)
+                if params is None:
+                    distances, indices = self.index.search(matrix, k)
+                else:
+                    distances, indices = self.index.search(matrix, k, params=params)
+
+            offset = 0
+            for request in requests:
+                rows = slice(offset, offset + request.size)
+                request_k = request.payload[1]
+                request.result = (distances[rows, :request_k].copy(), indices[rows, :request_k].copy())
+                offset += request.size
@@ -0,0 +1,97 @@
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from .metrics import metrics
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    Deduplicates concurrent calls with the same key across threads.
+
+    The first caller runs the function; callers arriving while it is in flight wait for
+    its result (or exception) instead of repeating the work. Each waiter has its own
+    timeout, and a waiter timing out does not affect the running call.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+
+    def do(self, key: str, fn: Callable[[], Any], timeout: Optional[float] = None) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+
+        if not leader:
+            metrics.incr(f"{self.name}.coalesced")
+            if not call.done.wait(timeout):
+                metrics.incr(f"{self.name}.wait_timeout")
+                raise TimeoutError(f"Timed out after {timeout}s waiting for in-flight '{self.name}' call.")
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+
+class AsyncSingleFlight:
+    """
+    asyncio counterpart of SingleFlight for the server's event loop.
+
+    The shared computation is shielded, so a waiter that times out (or disconnects)
+    never cancels it for the others.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._futures: Dict[Tuple[int, str], asyncio.Future] = {}
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]], timeout: Optional[float] = None) -> Any:
+        # Futures can only be awaited on the loop that created them
+        flight_key = (id(asyncio.get_running_loop()), key)
+        future = self._futures.get(flight_key)
+        if future is None:
+            future = asyncio.ensure_future(fn())
+            self._futures[flight_key] = future
+            future.add_done_callback(lambda f: self._finish(flight_key, f))
+        else:
+            metrics.incr(f"{self.name}.coalesced")
+
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), timeout)
+        except asyncio.TimeoutError:
+            metrics.incr(f"{self.name}.wait_timeout")
+            raise
+
+    def _finish(self, flight_key: Tuple[int, str], future: asyncio.Future):
+        self._futures.pop(flight_key, None)
+        if not future.cancelled():
+            future.exception()  # mark as retrieved even if every waiter already timed out
+
+    def in_flight(self) -> int:
+        return len(self._futures)
@@ -0,0 +1,299 @@
+import json
+import logging
+import mmap
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .store import file_sha256
+
+logger = logging.getLogger("LegalRAG-SourceIndex")
+
+SOURCE_INDEX_FILE = "source_index.json"
+SOURCE_INDEX_VERSION = 2
+
+# Statute directories under the documents folder, keyed by source type
+STATUTE_DIRS = {"bns": "BNS", "bnss": "BNSS", "bsa": "BSA"}
+GENERAL_SOP_FILE = "General SOP.md"
+
+# A '###' sub-heading only starts a new SOP block once the current block is at least this long,
+# so one-paragraph sub-headings stay with their neighbours
+MIN_SOP_BLOCK_BYTES = 800
+
+# First matching keyword (in the block's heading path) decides the procedural stage
+SOP_STAGE_KEYWORDS = [
+    ("zero fir", "fir_registration"),
+    ("non-cognizable", "complaint"),
+    ("non cognizable", "complaint"),
+    ("fir", "fir_registration"),
+    ("cognizable", "fir_registration"),
+    ("petition", "complaint"),
+    ("complaint", "complaint"),
+    ("medical", "medical_examination"),
+    ("witness", "statement_recording"),
+    ("statement", "statement_recording"),
+    ("handcuff", "arrest"),
+    ("custody", "arrest"),
+    ("arrest", "arrest"),
+    ("digital evidence", "evidence_collection"),
+    ("evidence", "evidence_collection"),
+    ("search", "search_and_seizure"),
+    ("seizure", "search_and_seizure"),
+    ("proclaimed", "property_attachment"),
+    ("attachment", "property_attachment"),
+    ("suret", "bail"),
+    ("bail", "bail"),
+    ("investigation", "investigation_commencement"),
+]
+
+CHAPTER_RE = re.compile(rb"^#\s+CHAPTER\s+([IVXLC]+)", re.I)
+SECTION_RE = re.compile(rb"^##\s+Section\s+(\d+[A-Z]*)\s*(?:\xe2\x80\x94|-)\s*(.*)", re.I)
+H2_RE = re.compile(rb"^##\s+(.*)")
+H3_RE = re.compile(rb"^###\s+(.*)")
+
+
+def _lines_with_offsets(data: bytes) -> Iterator[Tuple[int, bytes]]:
+    offset = 0
+    for line in data.splitlines(keepends=True):
+        yield offset, line
+        offset += len(line)
+
+
+def _trim(data: bytes, start: int, end: int) -> Tuple[int, int]:
+    """Shrinks [start, end) to drop surrounding blank lines and trailing '---' separators."""
+    while start < end and data[start:start + 1] in (b"\n", b"\r", b" ", b"\t"):
+        start += 1
+    while True:
+        stripped = data[start:end].rstrip()
+        end = start + len(stripped)
+        if stripped.endswith(b"---"):
+            end -= 3
+            continue
+        return start, end
+
+
+def _clean_heading(raw: bytes) -> str:
+    return raw.decode("utf-8").strip().strip("*").strip()
+
+
+def stage_for(heading_path: str) -> str:
+    lowered = heading_path.lower()
+    for keyword, stage in SOP_STAGE_KEYWORDS:
+        if keyword in lowered:
+            return stage
+    return "general"
+
+
+def _index_statute(docs_dir: Path, source_type: str, folder: str, entries: Dict[str, Dict[str, Any]]):
+    law = folder
+    for path in sorted((docs_dir / folder).glob("*.md")):
+        rel = path.relative_to(docs_dir).as_posix()
+        data = path.read_bytes()
+        chapter_no = chapter_title = None
+        expect_chapter_title = False
+        current = None
+
+        def close(end: int):
+            start, stop = _trim(data, current["offset"], end)
+            current.update(offset=start, length=stop - start)
+            entries[f"{source_type}:{current['section_id']}"] = current
+
+        for offset, line in _lines_with_offsets(data):
+            stripped = line.strip()
+            chapter_match = CHAPTER_RE.match(stripped)
+            if chapter_match:
+                if current:
+                    close(offset)
+                    current = None
+                chapter_no = chapter_match.group(1).decode("ascii").upper()
+                chapter_title = None
+                expect_chapter_title = True
+                continue
+
+            section_match = SECTION_RE.match(stripped)
+            if section_match:
+                if current:
+                    close(offset)
+                section_id = section_match.group(1).decode("ascii").upper()
+                section_title = section_match.group(2).decode("utf-8").strip()
+                current = {
+                    "section_id": section_id,
+                    "title": f"{law} Section {section_id} – {section_title}",
+                    "file": rel,
+                    "offset": offset,
+                    "metadata": {
+                        "law": law,
+                        "section": section_id,
+                        "section_title": section_title,
+                        "chapter_no": chapter_no,
+                        "chapter_title": chapter_title,
+                        "source_file": path.name,
+                    },
+                }
+                expect_chapter_title = False
+                continue
+
+            if expect_chapter_title and current is None:
+                title_match = H2_RE.match(stripped)
+                if title_match:
+                    chapter_title = _clean_heading(title_match.group(1))
+                    expect_chapter_title = False
+
+        if current:
+            close(len(data))
+
+
+def _index_general_sop(docs_dir: Path, entries: Dict[str, Dict[str, Any]]):
+    path = docs_dir / GENERAL_SOP_FILE
+    if not path.exists():
+        return
+    rel = path.relative_to(docs_dir).as_posix()
+    data = path.read_bytes()
+
+    blocks: List[Dict[str, Any]] = []
+    topic = None
+    for offset, line in _lines_with_offsets(data):
+        stripped = line.strip()
+        h2 = H2_RE.match(stripped) if not stripped.startswith(b"###") else None
+        h3 = H3_RE.match(stripped) if not stripped.startswith(b"####") else None
+
+        if h2:
+            topic = _clean_heading(h2.group(1))
+            blocks.append({"offset": offset, "topic": topic, "subsection": None})
+        elif h3 and blocks and offset - blocks[-1]["offset"] >= MIN_SOP_BLOCK_BYTES:
+            blocks.append({"offset": offset, "topic": topic, "subsection": _clean_heading(h3.group(1))})
+        elif not blocks and stripped:
+            blocks.append({"offset": offset, "topic": None, "subsection": None})
+
+    for i, block in enumerate(blocks):
+        end = blocks[i + 1]["offset"] if i + 1 < len(blocks) else len(data)
+        start, stop = _trim(data, block["offset"], end)
+        if stop <= start:
+            continue
+        block_id = f"GSOP_{i + 1:03d}"
+        heading_path = " – ".join(h for h in (block["topic"], block["subsection"]) if h)
+        entries[f"general_sop:{block_id}"] = {
+            "section_id": block_id,
+            "title": heading_path or "General SOP",
+            "file": rel,
+            "offset": start,
+            "length": stop - start,
+            "metadata": {
+                "law": "SOP",
+                "sop_title": block["topic"],
+                "subsection": block["subsection"],
+                "procedural_stage": stage_for(heading_path),
+                "source_file": path.name,
+            },
+        }
+
+
+def _source_files(docs_dir: Path) -> List[Path]:
+    """The markdown files the index is built from: statute chapters and the General SOP."""
+    paths = [path for folder in STATUTE_DIRS.values() for path in sorted((docs_dir / folder).glob("*.md"))]
+    if (docs_dir / GENERAL_SOP_FILE).exists():
+        paths.append(docs_dir / GENERAL_SOP_FILE)
+    return paths
+
+
+def build_source_index(docs_dir: str) -> Dict[str, Any]:
+    """
+    Scans the source documents once and records where every statute section and General SOP
+    block lives: normalized id -> (file, byte offset, byte length) plus display metadata.
+    """
+    docs_dir = Path(docs_dir)
+    if not docs_dir.exists():
+        logger.warning(f"Documents directory {docs_dir} not found; source index will be empty")
+    entries: Dict[str, Dict[str, Any]] = {}
+    for source_type, folder in STATUTE_DIRS.items():
+        if (docs_dir / folder).exists():
+            _index_statute(docs_dir, source_type, folder, entries)
+    _index_general_sop(docs_dir, entries)
+
+    # Every scanned file, including ones without entries, so added or removed files are noticed
+    files = {}
+    for path in _source_files(docs_dir):
+        stat = path.stat()
+        files[path.relative_to(docs_dir).as_posix()] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns,
+                                                        "sha256": file_sha256(path)}
+
+    return {
+        "version": SOURCE_INDEX_VERSION,
+        "docs_dir": str(docs_dir),
+        "files": files,
+        "entries": entries,
+    }
+
+
+def write_source_index(index: Dict[str, Any], path: str):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(index, f, ensure_ascii=False)
+
+
+class SourceIndex:
+    """
+    O(1) lookup of verbatim source text.
+    Entries point into the original markdown files, which are memory-mapped once and sliced
+    on demand, so no text is searched or copied until a section is actually requested.
+    """
+
+    def __init__(self, index: Dict[str, Any], docs_dir: Optional[str] = None):
+        self.docs_dir = Path(docs_dir or index["docs_dir"])
+        self.entries: Dict[str, Dict[str, Any]] = index["entries"]
+        self.files: Dict[str, Dict[str, Any]] = index.get("files", {})
+        self._maps: Dict[str, mmap.mmap] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, index_path: Optional[str], docs_dir: str) -> "SourceIndex":
+        """
+        Loads a prebuilt index, falling back to building one from `docs_dir` when the file is
+        missing or the documents changed since it was built (offsets would be stale).
+        """
+        if index_path and os.path.exists(index_path):
+            with open(index_path, "r", encoding="utf-8") as f:
+                index = json.load(f)
+            root = Path(index["docs_dir"]) if Path(index["docs_dir"]).exists() else Path(docs_dir)
+            if index.get("version") == SOURCE_INDEX_VERSION and cls._files_unchanged(root, index.get("files", {})):
+                return cls(index, str(root))
+            logger.warning(f"Source index {index_path} is stale; rebuilding from {docs_dir}")
+        return cls(build_source_index(docs_dir))
+
+    @staticmethod
+    def _files_unchanged(root: Path, files: Dict[str, Dict[str, Any]]) -> bool:
+        # A chapter file added (or removed) since the build has sections the index can't resolve
+        if {path.relative_to(root).as_posix() for path in _source_files(root)} != set(files):
+            return False
+        # A same-length edit keeps the size but shifts the text under the recorded offsets. A file
+        # whose mtime moved (an edit, or just a fresh checkout) is trusted only if its hash matches.
+        for rel, info in files.items():
+            path = root / rel
+            if not path.exists():
+                return False
+            stat = path.stat()
+            if stat.st_size != info["size"]:
+                return False
+            if stat.st_mtime_ns != info.get("mtime_ns") and file_sha256(path) != info.get("sha256"):
+                return False
+        return True
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        return self.entries.get(key)
+
+    def _map(self, rel: str) -> mmap.mmap:
+        with self._lock:
+            mapped = self._maps.get(rel)
+            if mapped is None:
+                with open(self.docs_dir / rel, "rb") as f:
+                    mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                self._maps[rel] = mapped
+            return mapped
+
+    def read(self, entry: Dict[str, Any]) -> str:
+        return self.read_range(entry["file"], entry["offset"], entry["offset"] + entry["length"])
+
+    def read_range(self, rel: str, start: int, end: int) -> str:
+        """Verbatim text of bytes [start, end) of a source file, e.g. a chunk's recorded span."""
+        return self._map(rel)[start:end].decode("utf-8")
@@ -0,0 +1,242 @@
+import hashlib
+import json
+import os
+import shutil
+import struct
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Files that together make up one vector store build
+STORE_FILES = ("index.faiss", "bm25.pkl", "metadata.json", "chunk_ids.json")
+
+# Row -> chunk id and FAISS id of every chunk in metadata.json (stores built before chunk ids lack it)
+CHUNK_IDS_FILE = "chunk_ids.json"
+
+# Written last into a store build: what it was built from, and the size and sha256 of every file
+MANIFEST_FILE = "manifest.json"
+STORE_SCHEMA_VERSION = 1
+
+
+class StoreValidationError(ValueError):
+    """A store build is incomplete, inconsistent, or was built for a different embedding model."""
+
+
+def faiss_id(chunk_id: str) -> int:
+    """The int64 id a chunk's vector is stored under in the FAISS IndexIDMap (63 bits of sha256)."""
+    return int.from_bytes(hashlib.sha256(chunk_id.encode("utf-8")).digest()[:8], "big") >> 1
+
+
+def faiss_ids(chunk_ids: Sequence[str]) -> np.ndarray:
+    ids = np.array([faiss_id(c) for c in chunk_ids], dtype="int64")
+    if len(np.unique(ids)) != len(ids):
+        raise ValueError("Duplicate chunk ids; re-run ingest_legal_docs.py")
+    return ids
+
+
+def store_version(store_dir) -> str:
+    """
+    Cheap fingerprint of a vector store build.
+    Derived from the manifest (which holds every file's checksum) or, for stores built before
+    manifests, from file names, sizes and modification times, so it changes on every rebuild
+    without reading the (potentially large) files themselves.
+    """
+    store_dir = Path(store_dir)
+    manifest_path = store_dir / MANIFEST_FILE
+    if manifest_path.exists():
+        return hashlib.sha1(manifest_path.read_bytes()).hexdigest()[:12]
+    digest = hashlib.sha1()
+    for name in STORE_FILES:
+        path = store_dir / name
+        if path.exists():
+            stat = path.stat()
+            digest.update(f"{name}:{stat.st_size}:{stat.st_mtime_ns};".encode("utf-8"))
+        else:
+            digest.update(f"{name}:missing;".encode("utf-8"))
+    return digest.hexdigest()[:12]
+
+
+# Versioned layout: <root>/versions/<version>/{STORE_FILES...} with <root>/CURRENT naming the live one.
+# A flat <root>/{STORE_FILES...} (no CURRENT) is still supported.
+DEFAULT_STORE_DIR = os.getenv("VECTOR_STORE_DIR", "data/vector_store")
+CURRENT_FILE = "CURRENT"
+VERSIONS_DIR = "versions"
+
+
+def resolve_store_dir(store_dir) -> Path:
+    """Directory holding the live store files: the CURRENT version if the layout is versioned."""
+    store_dir = Path(store_dir)
+    current = store_dir / CURRENT_FILE
+    if current.exists():
+        name = current.read_text(encoding="utf-8").strip()
+        if name:
+            return store_dir / VERSIONS_DIR / name
+    return store_dir
+
+
+def file_sha256(path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _store_files(store_dir: Path) -> List[str]:
+    return sorted(p.relative_to(store_dir).as_posix() for p in store_dir.rglob("*")
+                  if p.is_file() and p.name != MANIFEST_FILE)
+
+
+def write_manifest(store_dir, embedding_model: str, dimension: int, chunk_count: int,
+                   build: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Records every file of a finished build (size and sha256) with what it was built from."""
+    store_dir = Path(store_dir)
+    manifest = {
+        "schema_version": STORE_SCHEMA_VERSION,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "embedding": {"model": embedding_model, "dimension": dimension, "normalized": True},
+        "chunk_count": chunk_count,
+        "files": {
+            name: {"size": (store_dir / name).stat().st_size, "sha256": file_sha256(store_dir / name)}
+            for name in _store_files(store_dir)
+        },
+        "build": build or {},
+    }
+    tmp = store_dir / f".{MANIFEST_FILE}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp, store_dir / MANIFEST_FILE)
+    return manifest
+
+
+def read_manifest(store_dir) -> Optional[Dict[str, Any]]:
+    path = Path(store_dir) / MANIFEST_FILE
+    if not path.exists():
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def read_faiss_header(path) -> Tuple[str, int, int]:
+    """Index type tag, dimension and vector count from the first 16 bytes of a FAISS index file."""
+    with open(path, "rb") as f:
+        header = f.read(16)
+    if len(header) < 16:
+        raise StoreValidationError(f"{path} is truncated")
+    fourcc, dimension, count = struct.unpack("<4siq", header)
+    return fourcc.decode("ascii", "replace"), dimension, count
+
+
+def validate_store(store_dir) -> Optional[Dict[str, Any]]:
+    """
+    Checks a build against its manifest without reading the files: the schema version, that every
+    listed file exists with its recorded size, and the dimension and vector count in the FAISS
+    index header. Checksums are not recomputed (see `verify_checksums`). Returns the manifest, or
+    None for stores built before manifests, which cannot be checked.
+    """
+    store_dir = Path(store_dir)
+    manifest = read_manifest(store_dir)
+    if manifest is None:
+        return None
+    if manifest.get("schema_version") != STORE_SCHEMA_VERSION:
+        raise StoreValidationError(f"{store_dir} has store schema {manifest.get('schema_version')}, "
+                                   f"this version reads {STORE_SCHEMA_VERSION}. Re-run create_vector_store.py.")
+    for name, entry in manifest["files"].items():
+        path = store_dir / name
+        if not path.exists():
+            raise StoreValidationError(f"{path} is missing")
+        if path.stat().st_size != entry["size"]:
+            raise StoreValidationError(f"{path} is {path.stat().st_size} bytes, the manifest says {entry['size']}")
+    if "index.faiss" in manifest["files"]:
+        _, dimension, count = read_faiss_header(store_dir / "index.faiss")
+        if (dimension, count) != (manifest["embedding"]["dimension"], manifest["chunk_count"]):
+            raise StoreValidationError(
+                f"{store_dir / 'index.faiss'} holds {count} vectors of dimension {dimension}; the manifest says "
+                f"{manifest['chunk_count']} of dimension {manifest['embedding']['dimension']}")
+    return manifest
+
+
+def check_embedding_model(manifest: Optional[Dict[str, Any]], model_name: str, dimension: Optional[int] = None):
+    """Raises if the store's vectors were built with another model (or one of another size)."""
+    if manifest is None:
+        return
+    built = manifest["embedding"]
+    if built["model"] != model_name:
+        raise StoreValidationError(f"Store vectors were built with {built['model']}, "
+                                   f"but EMBEDDING_MODEL is {model_name}")
+    if dimension is not None and dimension != built["dimension"]:
+        raise StoreValidationError(f"{model_name} produces {dimension}-d vectors, the store holds {built['dimension']}-d")
+
+
+def verify_checksums(store_dir) -> List[str]:
+    """Files whose sha256 differs from the manifest (reads every file; for tooling, not the load path)."""
+    store_dir = Path(store_dir)
+    manifest = read_manifest(store_dir)
+    if manifest is None:
+        raise StoreValidationError(f"{store_dir} has no {MANIFEST_FILE}")
+    return [name for name, entry in manifest["files"].items()
+            if not (store_dir / name).exists() or file_sha256(store_dir / name) != entry["sha256"]]
+
+
+def _unused_version_path(root) -> Path:
+    name = time.strftime("%Y%m%d-%H%M%S")
+    path = Path(root) / VERSIONS_DIR / name
+    suffix = 1
+    while path.exists():
+        path = Path(root) / VERSIONS_DIR / f"{name}-{suffix}"
+        suffix += 1
+    return path
+
+
+def new_version_dir(root) -> Path:
+    """Creates an empty directory for a new build; nothing reads it until it is published."""
+    path = _unused_version_path(root)
+    path.mkdir(parents=True)
+    return path
+
+
+def new_staging_dir(root) -> Path:
+    """
+    Hidden directory a build is written into. `finalize_version` renames it to a version name once
+    it is complete, so a crashed build never shows up as a version.
+    """
+    versions_dir = Path(root) / VERSIONS_DIR
+    versions_dir.mkdir(parents=True, exist_ok=True)
+    path = versions_dir / f".{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}.tmp"
+    path.mkdir()
+    return path
+
+
+def finalize_version(staging_dir) -> Path:
+    """Atomically renames a finished staging directory to a new version directory and returns it."""
+    staging_dir = Path(staging_dir)
+    target = _unused_version_path(staging_dir.parent.parent)
+    os.rename(staging_dir, target)
+    return target
+
+
+def publish_version(root, version_dir):
+    """Atomically points CURRENT at `version_dir` (write-then-rename, so readers never see a partial file)."""
+    root = Path(root)
+    tmp = root / f".{CURRENT_FILE}.tmp"
+    tmp.write_text(Path(version_dir).name + "\n", encoding="utf-8")
+    os.replace(tmp, root / CURRENT_FILE)
+
+
+def prune_versions(root, keep: int = 3) -> List[str]:
+    """Deletes all but the newest `keep` versions, never the CURRENT one. Returns removed names."""
+    root = Path(root)
+    versions_dir = root / VERSIONS_DIR
+    if not versions_dir.exists():
+        return []
+    current = resolve_store_dir(root).name
+    versions = sorted((p for p in versions_dir.iterdir() if p.is_dir() and not p.name.startswith(".")),
+                      key=lambda p: p.name, reverse=True)
+    removed = []
+    for path in versions[keep:]:
+        if path.name != current:
+            shutil.rmtree(path)
+            removed.append(path.name)
+    return removed
@@ -0,0 +1,209 @@
+import json
+import logging
+import os
+import re
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from .chunk_stream import iter_chunks
+
+logger = logging.getLogger("LegalRAG-TimelineIndex")
+
+TIMELINE_INDEX_FILE = "timeline_index.json"
+TIMELINE_INDEX_VERSION = 2
+
+# Entries from the rape SOP only apply to sexual offences; statute clauses apply to every case type
+SCOPE_ALL = "*"
+SCOPE_SEXUAL_OFFENCE = "sexual_offence"
+SOP_SCOPES = {"sop_rape_against_women.md": SCOPE_SEXUAL_OFFENCE}
+
+# First matching keyword (whole words) in a step/section title decides the stage
+STAGE_KEYWORDS = [
+    ("information in cognizable", "fir_registration"),
+    ("fir", "fir_registration"),
+    ("to accused", "trial"),
+    ("bond", "trial"),
+    ("accused", "arrest"),
+    ("medical", "medical_examination"),
+    ("dying declaration", "statement_recording"),
+    ("statements?", "statement_recording"),
+    ("treatment of victims?", "victim_protection"),
+    ("witness protection", "victim_protection"),
+    ("rehabilitation", "victim_protection"),
+    ("media", "victim_protection"),
+    ("completion of investigation", "chargesheet"),
+    ("charge sheet", "chargesheet"),
+    ("cannot be completed", "arrest"),
+    ("investigation", "investigation_commencement"),
+    ("scene", "evidence_collection"),
+    ("evidence", "evidence_collection"),
+    ("exhibits", "evidence_collection"),
+    ("property", "property_attachment"),
+    ("attachment", "property_attachment"),
+    ("arrest(?:ed)?", "arrest"),
+    ("detained", "arrest"),
+    ("custody", "arrest"),
+    ("bail", "bail"),
+    ("trial", "trial"),
+]
+STAGE_PATTERNS = [(re.compile(rf"\b{keyword}\b", re.I), stage) for keyword, stage in STAGE_KEYWORDS]
+
+STAGE_AUDIENCE = {
+    "fir_registration": "victim",
+    "medical_examination": "victim",
+    "statement_recording": "victim",
+    "victim_protection": "victim",
+    "investigation_commencement": "police",
+    "evidence_collection": "police",
+    "arrest": "police",
+    "chargesheet": "police",
+    "property_attachment": "police",
+    "bail": "court",
+    "trial": "court",
+}
+
+NUMBER_WORDS = {
+    "one": 1, "two": 2, "three": 3, "seven": 7, "ten": 10, "twelve": 12, "fourteen": 14,
+    "fifteen": 15, "twenty-four": 24, "thirty": 30, "forty-eight": 48, "sixty": 60, "ninety": 90,
+}
+TIME_LIMIT_RE = re.compile(
+    r"\bwithin\s+(?:a\s+period\s+of\s+)?(\d+|" + "|".join(NUMBER_WORDS) + r")\s+(hours?|days?|months?)"
+    r"|\b(immediately|forthwith|without\s+(?:any\s+)?(?:unnecessary\s+)?delay)\b",
+    re.I
+)
+
+
+def extract_time_limit(text: str) -> Optional[str]:
+    """First explicit deadline in a clause, normalized ("within 24 hours", "immediately")."""
+    match = TIME_LIMIT_RE.search(text)
+    if not match:
+        return None
+    if match.group(3):
+        return "immediately"
+    amount = match.group(1).lower()
+    amount = int(amount) if amount.isdigit() else NUMBER_WORDS[amount]
+    unit = match.group(2).lower().rstrip("s")
+    return f"within {amount} {unit}{'s' if amount != 1 else ''}"
+
+
+def stage_for_title(title: str) -> Optional[str]:
+    for pattern, stage in STAGE_PATTERNS:
+        if pattern.search(title or ""):
+            return stage
+    return None
+
+
+def _citation(meta: Dict[str, Any]) -> str:
+    if meta.get("unit_type") == "step":
+        return f"{meta.get('law_name', 'SOP')}, {meta.get('step')}: {meta.get('section_title')}"
+    return f"{meta.get('law')} Section {meta.get('section')}: {meta.get('section_title')}"
+
+
+def build_timeline_index(chunks: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Extracts timeline entries from SOP step chunks and BNSS clauses that carry a time limit.
+    Each entry is (stage, time_limit, audience, scope, chunk id, citation); columns are stored as
+    small-integer codes into per-column vocabularies so the index stays compact. Chunk ids are
+    the stable ids from ingestion, so entries keep pointing at the same chunk across rebuilds.
+    """
+    rows: List[Dict[str, Any]] = []
+    for chunk in chunks:
+        meta = chunk.get("metadata", {})
+        if meta.get("unit_type") == "step":
+            scope = SOP_SCOPES.get(meta.get("source_file"), SCOPE_ALL)
+        elif meta.get("law") == "BNSS":
+            scope = SCOPE_ALL
+        else:
+            continue
+
+        stage = stage_for_title(meta.get("section_title"))
+        if stage is None:
+            continue
+        time_limit = extract_time_limit(chunk.get("text", ""))
+        if time_limit is None and meta.get("unit_type") != "step":
+            continue  # statute clauses only matter when they set a deadline
+
+        rows.append({
+            "stage": stage,
+            "time_limit": time_limit,
+            "audience": STAGE_AUDIENCE.get(stage, "police"),
+            "scope": scope,
+            "chunk_id": chunk.get("chunk_id"),
+            "citation": _citation(meta),
+        })
+
+    index: Dict[str, Any] = {"version": TIMELINE_INDEX_VERSION, "size": len(rows)}
+    for column in ("stage", "time_limit", "audience", "scope", "citation"):
+        vocab: List[Any] = []
+        codes: Dict[Any, int] = {}
+        column_codes = []
+        for row in rows:
+            value = row[column]
+            if value is None:
+                column_codes.append(-1)
+                continue
+            if value not in codes:
+                codes[value] = len(vocab)
+                vocab.append(value)
+            column_codes.append(codes[value])
+        index[f"{column}_vocab"] = vocab
+        index[column] = column_codes
+    index["chunk_id"] = [row["chunk_id"] for row in rows]
+    return index
+
+
+def write_timeline_index(index: Dict[str, Any], path: str):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(index, f, ensure_ascii=False, separators=(",", ":"))
+
+
+class TimelineIndex:
+    """Column arrays of timeline entries with lookups by scope and stage."""
+
+    def __init__(self, index: Dict[str, Any]):
+        self.vocab = {column: index.get(f"{column}_vocab", []) for column in ("stage", "time_limit", "audience", "scope", "citation")}
+        self.columns = {
+            column: np.asarray(index.get(column, []), dtype=np.int32)
+            for column in ("stage", "time_limit", "audience", "scope", "citation")
+        }
+        self.chunk_ids: List[Optional[str]] = list(index.get("chunk_id", []))
+
+    def __len__(self) -> int:
+        return len(self.chunk_ids)
+
+    @classmethod
+    def load(cls, index_path: Optional[str], chunks_paths: Sequence[str] = ()) -> "TimelineIndex":
+        """Loads the prebuilt index, or builds one from the first chunk file that exists."""
+        if index_path and os.path.exists(index_path):
+            with open(index_path, "r", encoding="utf-8") as f:
+                index = json.load(f)
+            if index.get("version") == TIMELINE_INDEX_VERSION:
+                return cls(index)
+            logger.warning(f"Timeline index {index_path} has an old format; rebuilding")
+        for path in chunks_paths:
+            if os.path.exists(path):
+                return cls(build_timeline_index(iter_chunks(path)))
+        logger.warning("No timeline index or chunk file found; timelines will use anchor defaults only")
+        return cls({})
+
+    def lookup(self, scopes: Sequence[str]) -> Dict[str, List[Dict[str, Any]]]:
+        """Entries visible to the given scopes, grouped by stage (in index order)."""
+        scope_codes = [self.vocab["scope"].index(s) for s in scopes if s in self.vocab["scope"]]
+        rows = np.flatnonzero(np.isin(self.columns["scope"], scope_codes))
+
+        def value(column: str, row: int):
+            code = int(self.columns[column][row])
+            return self.vocab[column][code] if code >= 0 else None
+
+        grouped: Dict[str, List[Dict[str, Any]]] = {}
+        for row in rows:
+            stage = value("stage", row)
+            grouped.setdefault(stage, []).append({
+                "stage": stage,
+                "time_limit": value("time_limit", row),
+                "audience": value("audience", row),
+                "chunk_id": self.chunk_ids[row],
+                "citation": value("citation", row),
+            })
+        return grouped
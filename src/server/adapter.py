@@ -0,0 +1,310 @@
+"""
+Adapts RAG results into victim-facing structured responses (timeline, confidence, notices).
+
+Timelines are built in two passes. Pass 1 always emits the anchor stages for the case type
+(a rape victim must see FIR, medical examination, statement and protection even if retrieval
+missed them), backing each with sources from the retrieved blocks or the ingest-time timeline
+index. Pass 2 appends any other retrieved stages as secondary items.
+"""
+
+import logging
+import os
+import re
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from ..retrieval.chunk_stream import CHUNKS_FILE
+from ..retrieval.timeline_index import (
+    SCOPE_ALL,
+    SCOPE_SEXUAL_OFFENCE,
+    STAGE_AUDIENCE,
+    TIMELINE_INDEX_FILE,
+    TimelineIndex,
+)
+from ..retrieval.store import DEFAULT_STORE_DIR, resolve_store_dir
+from .schemas import AdaptedResponse, ConfidenceLevel, SystemNotice, TierType, TimelineItem
+
+logger = logging.getLogger("LegalRAG-Adapter")
+
+# Defaults to the index shipped with the live store version
+TIMELINE_INDEX_PATH = os.getenv("TIMELINE_INDEX_PATH")
+# Used to build the index on the fly when no prebuilt one is shipped with the store
+TIMELINE_CHUNK_FILES = ("metadata.json",)
+FALLBACK_CHUNK_PATHS = (CHUNKS_FILE,)
+
+MAX_SOURCES_PER_ITEM = 3
+
+_FIR_ANCHOR = {
+    "stage": "fir_registration",
+    "title": "Register an FIR (Zero FIR at any police station)",
+    "deadline": "Immediately",
+    "audience": "victim",
+    "legal_basis": "Section 173 BNSS",
+}
+
+SEXUAL_OFFENCE_ANCHORS = [
+    _FIR_ANCHOR,
+    {
+        "stage": "medical_examination",
+        "title": "Medical examination by a registered medical practitioner",
+        "deadline": "Within 24 hours",
+        "audience": "victim",
+        "legal_basis": "Section 184 BNSS",
+    },
+    {
+        "stage": "statement_recording",
+        "title": "Statement recorded by police and before a Magistrate",
+        "deadline": "As soon as possible",
+        "audience": "victim",
+        "legal_basis": "Sections 180 and 183 BNSS",
+    },
+    {
+        "stage": "victim_protection",
+        "title": "Protection, free medical treatment and compensation",
+        "deadline": "Throughout the case",
+        "audience": "victim",
+        "legal_basis": "Section 397 BNSS",
+    },
+    {
+        "stage": "chargesheet",
+        "title": "Investigation completed and charge sheet filed",
+        "deadline": "Within 2 months",
+        "audience": "police",
+        "legal_basis": "Section 193 BNSS",
+    },
+]
+
+PROPERTY_OFFENCE_ANCHORS = [
+    _FIR_ANCHOR,
+    {
+        "stage": "investigation_commencement",
+        "title": "Police begin investigation",
+        "deadline": "Immediately after FIR",
+        "audience": "police",
+        "legal_basis": "Section 176 BNSS",
+    },
+]
+
+TIMELINE_ANCHORS: Dict[str, List[Dict[str, str]]] = {
+    "general": PROPERTY_OFFENCE_ANCHORS,
+    "rape": SEXUAL_OFFENCE_ANCHORS,
+    "sexual_assault": SEXUAL_OFFENCE_ANCHORS,
+    "pocso": SEXUAL_OFFENCE_ANCHORS,
+    "robbery": PROPERTY_OFFENCE_ANCHORS,
+    "theft": PROPERTY_OFFENCE_ANCHORS,
+}
+
+TIER1_CASE_TYPES = ("rape", "sexual_assault", "pocso")
+TIER3_CASE_TYPES = ("robbery", "theft")
+
+CASE_TYPE_ALIASES = {
+    "sexual_harassment": "sexual_assault",
+    "molestation": "sexual_assault",
+    "outraging_modesty": "sexual_assault",
+    "child_sexual_abuse": "pocso",
+    "gang_rape": "rape",
+    "snatching": "robbery",
+    "dacoity": "robbery",
+    "burglary": "theft",
+    "house_breaking": "theft",
+}
+
+# Keyword detection for free-text queries, most specific first
+CASE_TYPE_KEYWORDS = [
+    (re.compile(r"\b(pocso|child sexual|minor .*(rape|abuse|assault))", re.I), "pocso"),
+    (re.compile(r"\b(rape[sd]?|raping)\b", re.I), "rape"),
+    (re.compile(r"\b(sexual(ly)? (assault|harass)|molest|groped|outrag\w* (the )?modesty)", re.I), "sexual_assault"),
+    (re.compile(r"\b(robbe(d|ry)|mugg(ed|ing)|snatch\w*|dacoity)\b", re.I), "robbery"),
+    (re.compile(r"\b(theft|stolen|stole|burglary|pickpocket\w*)\b", re.I), "theft"),
+]
+
+CASE_TYPE_SCOPES = {
+    "rape": (SCOPE_ALL, SCOPE_SEXUAL_OFFENCE),
+    "sexual_assault": (SCOPE_ALL, SCOPE_SEXUAL_OFFENCE),
+    "pocso": (SCOPE_ALL, SCOPE_SEXUAL_OFFENCE),
+}
+
+_index: Optional[TimelineIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_timeline_index() -> TimelineIndex:
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                store_dir = resolve_store_dir(DEFAULT_STORE_DIR)
+                index_path = TIMELINE_INDEX_PATH or str(store_dir / TIMELINE_INDEX_FILE)
+                chunk_paths = [str(store_dir / name) for name in TIMELINE_CHUNK_FILES] + list(FALLBACK_CHUNK_PATHS)
+                _index = TimelineIndex.load(index_path, chunk_paths)
+                logger.info(f"Timeline index ready: {len(_index)} entries")
+    return _index
+
+
+def reset_timeline_index():
+    """Drops the cached index so the next lookup loads the one from the new store version."""
+    global _index
+    with _index_lock:
+        _index = None
+
+
+def _normalize_case_type(case_type: Optional[str]) -> str:
+    if not case_type or not str(case_type).strip():
+        return "general"
+    normalized = re.sub(r"[\s\-]+", "_", str(case_type).strip().lower())
+    return CASE_TYPE_ALIASES.get(normalized, normalized)
+
+
+def detect_case_type(text: str) -> Optional[str]:
+    for pattern, case_type in CASE_TYPE_KEYWORDS:
+        if pattern.search(text or ""):
+            return case_type
+    return None
+
+
+def tier_for_case_type(case_type: Optional[str]) -> TierType:
+    normalized = _normalize_case_type(case_type)
+    if normalized in TIER1_CASE_TYPES:
+        return TierType.TIER1
+    if normalized in TIER3_CASE_TYPES:
+        return TierType.TIER3
+    return TierType.STANDARD
+
+
+def _block_stage(block: Dict[str, Any]) -> Optional[str]:
+    meta = block.get("metadata") or {}
+    return meta.get("stage") or meta.get("procedural_stage")
+
+
+def _block_citation(block: Dict[str, Any]) -> str:
+    meta = block.get("metadata") or {}
+    return meta.get("citation") or meta.get("title") or (block.get("text") or "")[:80]
+
+
+def _dedupe(items: Sequence[str]) -> List[str]:
+    return list(dict.fromkeys(item for item in items if item))
+
+
+def extract_timeline_with_anchors(
+    rag_result: Dict[str, Any],
+    case_type: Optional[str],
+    tier: TierType
+) -> Tuple[List[TimelineItem], Optional[SystemNotice]]:
+    """
+    Returns (timeline, system_notice). Anchors always come first, in their defined order.
+    For Tier-1 cases an ANCHOR_MISSING notice is returned if any anchor has no supporting source.
+    """
+    normalized = _normalize_case_type(case_type)
+    anchors = TIMELINE_ANCHORS.get(normalized) or TIMELINE_ANCHORS["general"]
+
+    retrieval = rag_result.get("retrieval") or {}
+    retrieved: Dict[str, Dict[str, Any]] = {}
+    for block in list(retrieval.get("sop_blocks") or []) + list(retrieval.get("general_sop_blocks") or []):
+        stage = _block_stage(block)
+        if stage and stage not in retrieved:
+            retrieved[stage] = block
+
+    indexed = get_timeline_index().lookup(CASE_TYPE_SCOPES.get(normalized, (SCOPE_ALL,)))
+
+    timeline: List[TimelineItem] = []
+    missing: List[str] = []
+    for anchor in anchors:
+        stage = anchor["stage"]
+        sources = []
+        if stage in retrieved:
+            sources.append(_block_citation(retrieved[stage]))
+        sources.extend(entry["citation"] for entry in indexed.get(stage, []))
+        sources = _dedupe(sources)[:MAX_SOURCES_PER_ITEM]
+        if not sources:
+            missing.append(stage)
+        timeline.append(TimelineItem(
+            stage=stage,
+            title=anchor["title"],
+            deadline=anchor["deadline"],
+            audience=anchor["audience"],
+            is_anchor=True,
+            legal_basis=anchor.get("legal_basis"),
+            sources=sources,
+        ))
+
+    anchor_stages = {anchor["stage"] for anchor in anchors}
+    for stage, block in retrieved.items():
+        if stage in anchor_stages:
+            continue
+        meta = block.get("metadata") or {}
+        timeline.append(TimelineItem(
+            stage=stage,
+            title=meta.get("title") or stage.replace("_", " ").capitalize(),
+            deadline=meta.get("time_limit"),
+            audience=STAGE_AUDIENCE.get(stage, "police"),
+            is_anchor=False,
+            sources=_dedupe([_block_citation(block)]),
+        ))
+
+    notice = None
+    if tier == TierType.TIER1 and missing:
+        logger.warning(f"Unresolved timeline anchors for {normalized}: {missing}")
+        notice = SystemNotice(
+            type="ANCHOR_MISSING",
+            message="Some critical steps could not be matched to a legal source. Please verify them with the police or a lawyer.",
+            details={"case_type": normalized, "missing_stages": missing},
+        )
+    return timeline, notice
+
+
+def calculate_confidence(
+    tier: TierType,
+    case_type: Optional[str],
+    detected_stages: List[str],
+    has_citations: bool,
+    has_answer: bool,
+    anchors_resolved: bool,
+    has_system_notice: bool,
+    clarification_needed: bool,
+    timeline_count: int,
+) -> ConfidenceLevel:
+    """
+    LOW when the answer needs clarification or an anchor failed; HIGH only when anchors are
+    resolved and the answer is backed by citations; MEDIUM when anchors alone are resolved.
+    """
+    if clarification_needed or has_system_notice:
+        return ConfidenceLevel.LOW
+    if anchors_resolved and has_citations and has_answer:
+        return ConfidenceLevel.HIGH
+    if anchors_resolved:
+        return ConfidenceLevel.MEDIUM
+    return ConfidenceLevel.LOW
+
+
+def adapt_response(rag_result: Dict[str, Any], query: str) -> AdaptedResponse:
+    case_type = _normalize_case_type(rag_result.get("case_type") or detect_case_type(query))
+    tier = tier_for_case_type(case_type)
+    timeline, notice = extract_timeline_with_anchors(rag_result, case_type, tier)
+
+    answer = rag_result.get("answer") or ""
+    citations = [str(c) for c in rag_result.get("citations") or []]
+    clarification_needed = bool(rag_result.get("clarification_needed"))
+    confidence = calculate_confidence(
+        tier=tier,
+        case_type=case_type,
+        detected_stages=list(rag_result.get("detected_stages") or []),
+        has_citations=bool(citations),
+        has_answer=bool(answer.strip()),
+        # Resolved only when every anchor was backed by a retrieved block or a timeline index entry
+        anchors_resolved=all(item.sources for item in timeline if item.is_anchor),
+        has_system_notice=notice is not None,
+        clarification_needed=clarification_needed,
+        timeline_count=len(timeline),
+    )
+
+    return AdaptedResponse(
+        query=query,
+        answer=answer,
+        case_type=case_type,
+        tier=tier,
+        timeline=timeline,
+        citations=citations,
+        confidence=confidence,
+        system_notice=notice,
+        clarification_needed=clarification_needed,
+    )
@@ -0,0 +1,372 @@
+"""
+Span-based attribution.
+
+The LLM writes its answer as units that are either "verbatim" (a quote that can be
+highlighted in the source) or "derived" (synthesized, never highlighted). Verbatim quotes
+are mapped back to exact character ranges in the retrieved chunks; quotes that cannot be
+found are downgraded to derived so no fake highlight reaches the UI.
+"""
+
+import json
+import logging
+import re
+import time
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from difflib import SequenceMatcher
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from ..retrieval.json_repair import extract_json_block, repair_json, strip_code_fences
+
+logger = logging.getLogger("LegalRAG-AnswerUnits")
+
+FUZZY_THRESHOLD = 0.85
+# Wall-clock budget for the fuzzy fallback across all unresolved quotes in one answer
+FUZZY_BUDGET_SECONDS = 0.05
+# Length of the needle snippets that anchor fuzzy candidate windows in a chunk
+FUZZY_SHINGLE = 8
+MAX_SOURCE_ID_LENGTH = 25
+
+GSOP_ID_RE = re.compile(r"\bGSOP[_\s-]?(\d+)", re.I)
+SECTION_RE = re.compile(r"\bsection\s+(\d+[A-Z]?)\b", re.I)
+LAW_CODE_RE = re.compile(r"\b(?:BNSS|BNS|BSA)[_\s-]+(\d+[A-Z]?)\b", re.I)
+PLAIN_NUMBER_RE = re.compile(r"^\s*(\d+[A-Z]?)\s*$", re.I)
+
+
+@dataclass
+class SourceSpan:
+    doc_id: str
+    section_id: str
+    start_char: int
+    end_char: int
+    quote: str
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+@dataclass
+class AnswerUnit:
+    id: str
+    text: str
+    kind: str  # "verbatim" | "derived"
+    quote: Optional[str] = None
+    supporting_sources: List[str] = field(default_factory=list)
+    source_spans: List[SourceSpan] = field(default_factory=list)
+
+    @property
+    def is_clickable(self) -> bool:
+        """Only verbatim units with a resolved span may be highlighted."""
+        return self.kind == "verbatim" and bool(self.source_spans)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "text": self.text,
+            "kind": self.kind,
+            "quote": self.quote,
+            "supporting_sources": list(self.supporting_sources),
+            "source_spans": [s.to_dict() for s in self.source_spans],
+            "is_clickable": self.is_clickable,
+        }
+
+
+@dataclass
+class ChunkWithOffsets:
+    """A retrieved chunk and where its text starts/ends in the source document."""
+    doc_id: str
+    section_id: str
+    text: str
+    start_char: int
+    end_char: int
+
+
+def _normalize_text(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+def _normalize_with_offsets(text: str) -> Tuple[str, List[int]]:
+    """
+    Same normalization as _normalize_text, plus the original index of every normalized
+    character so matches can be mapped back to exact source ranges.
+    """
+    chars: List[str] = []
+    offsets: List[int] = []
+    pending_space = False
+    for i, ch in enumerate(text):
+        if ch.isspace():
+            pending_space = bool(chars)
+            continue
+        if pending_space:
+            chars.append(" ")
+            offsets.append(i - 1)
+            pending_space = False
+        for lowered in ch.lower():
+            chars.append(lowered)
+            offsets.append(i)
+    return "".join(chars), offsets
+
+
+class _AhoCorasick:
+    """Multi-pattern matcher: finds every pattern in a text in one left-to-right pass."""
+
+    def __init__(self, patterns: Sequence[str]):
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.out: List[List[int]] = [[]]
+        self.lengths = [len(p) for p in patterns]
+
+        for pattern_id, pattern in enumerate(patterns):
+            state = 0
+            for ch in pattern:
+                nxt = self.goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self.goto)
+                    self.goto[state][ch] = nxt
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.out.append([])
+                state = nxt
+            self.out[state].append(pattern_id)
+
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self.goto[state].items():
+                queue.append(nxt)
+                f = self.fail[state]
+                while f and ch not in self.goto[f]:
+                    f = self.fail[f]
+                self.fail[nxt] = self.goto[f].get(ch, 0)
+                self.out[nxt] = self.out[nxt] + self.out[self.fail[nxt]]
+
+    def search(self, text: str) -> Iterator[Tuple[int, int]]:
+        """Yields (start, pattern_id) for every occurrence, in order of end position."""
+        state = 0
+        for i, ch in enumerate(text):
+            while state and ch not in self.goto[state]:
+                state = self.fail[state]
+            state = self.goto[state].get(ch, 0)
+            for pattern_id in self.out[state]:
+                yield i - self.lengths[pattern_id] + 1, pattern_id
+
+
+def _fuzzy_find(needle: str, haystack: str, threshold: float = FUZZY_THRESHOLD,
+                deadline: Optional[float] = None) -> Optional[Tuple[int, int]]:
+    """
+    Approximate search for `needle` in `haystack`.
+    Candidate windows are anchored where a short shingle of the needle occurs in the haystack,
+    instead of sliding over every offset. Returns (start, end) of the best window scoring
+    >= threshold; once `deadline` (a time.perf_counter() value) passes, the best so far.
+    """
+    if not needle or not haystack:
+        return None
+
+    n = len(needle)
+    k = min(FUZZY_SHINGLE, n)
+    matcher = SequenceMatcher(None, autojunk=False)
+    matcher.set_seq2(needle)
+    seen = set()
+    best: Optional[Tuple[float, int, int]] = None
+    for offset in range(0, n - k + 1, max(1, k // 2)):
+        shingle = needle[offset:offset + k]
+        pos = haystack.find(shingle)
+        while pos != -1:
+            if deadline is not None and time.perf_counter() >= deadline:
+                return (best[1], best[2]) if best else None
+            start = max(0, pos - offset)
+            pos = haystack.find(shingle, pos + 1)
+            if start in seen:
+                continue
+            seen.add(start)
+            for length in (n, int(n * 1.2)):
+                window = haystack[start:start + length]
+                matcher.set_seq1(window)
+                if matcher.real_quick_ratio() < threshold or matcher.quick_ratio() < threshold:
+                    continue
+                ratio = matcher.ratio()
+                if ratio >= threshold and (best is None or (-ratio, start) < (-best[0], best[1])):
+                    best = (ratio, start, start + len(window))
+    return (best[1], best[2]) if best else None
+
+
+def _make_span(chunk: ChunkWithOffsets, offsets: List[int], start: int, end: int) -> SourceSpan:
+    original_start = offsets[start]
+    original_end = offsets[end - 1] + 1
+    return SourceSpan(
+        doc_id=chunk.doc_id,
+        section_id=chunk.section_id,
+        start_char=chunk.start_char + original_start,
+        end_char=chunk.start_char + original_end,
+        quote=chunk.text[original_start:original_end],
+    )
+
+
+def _resolve_quotes(quotes: Sequence[str], chunks: Sequence[ChunkWithOffsets],
+                    fuzzy_budget: float = FUZZY_BUDGET_SECONDS) -> List[Optional[SourceSpan]]:
+    """
+    Resolves many quotes against many chunks.
+    Each chunk is normalized once, and all quotes are matched in a single Aho-Corasick pass
+    over it; the first occurrence (chunk order, then position) wins. Only quotes still
+    unresolved go through the fuzzy fallback, which stops (also inside a single chunk) once
+    the time budget is spent.
+    """
+    spans: List[Optional[SourceSpan]] = [None] * len(quotes)
+    if not quotes or not chunks:
+        return spans
+
+    pattern_ids: Dict[str, int] = {}
+    quote_patterns: List[Optional[int]] = []
+    for quote in quotes:
+        normalized = _normalize_text(quote or "")
+        if not normalized:
+            quote_patterns.append(None)
+            continue
+        quote_patterns.append(pattern_ids.setdefault(normalized, len(pattern_ids)))
+    if not pattern_ids:
+        return spans
+
+    patterns = list(pattern_ids)
+    automaton = _AhoCorasick(patterns)
+    normalized_chunks = [_normalize_with_offsets(chunk.text) for chunk in chunks]
+
+    found: Dict[int, SourceSpan] = {}
+    for chunk, (normalized, offsets) in zip(chunks, normalized_chunks):
+        for start, pattern_id in automaton.search(normalized):
+            if pattern_id not in found:
+                found[pattern_id] = _make_span(chunk, offsets, start, start + len(patterns[pattern_id]))
+        if len(found) == len(patterns):
+            break
+
+    deadline = time.perf_counter() + fuzzy_budget
+    unresolved = [pattern_id for pattern_id in range(len(patterns)) if pattern_id not in found]
+    for n_done, pattern_id in enumerate(unresolved):
+        if time.perf_counter() >= deadline:
+            logger.info(f"Fuzzy span budget exhausted; {len(unresolved) - n_done} quotes left unresolved")
+            break
+        for chunk, (normalized, offsets) in zip(chunks, normalized_chunks):
+            match = _fuzzy_find(patterns[pattern_id], normalized, deadline=deadline)
+            if match:
+                found[pattern_id] = _make_span(chunk, offsets, *match)
+                break
+            if time.perf_counter() >= deadline:
+                break
+
+    for i, pattern_id in enumerate(quote_patterns):
+        if pattern_id is not None:
+            spans[i] = found.get(pattern_id)
+    return spans
+
+
+def resolve_span(quote: str, chunks: Sequence[ChunkWithOffsets]) -> Optional[SourceSpan]:
+    """Finds a single quote in the chunks (exact after normalization, then fuzzy)."""
+    if not quote or not chunks:
+        return None
+    return _resolve_quotes([quote], chunks)[0]
+
+
+def resolve_all_spans(units: List[AnswerUnit], chunks: Sequence[ChunkWithOffsets],
+                      fuzzy_budget: float = FUZZY_BUDGET_SECONDS) -> List[AnswerUnit]:
+    """
+    Attaches source spans to every verbatim unit in one batched pass.
+    Verbatim units whose quote cannot be located are downgraded to derived.
+    """
+    verbatim = [unit for unit in units if unit.kind == "verbatim"]
+    spans = _resolve_quotes([unit.quote or "" for unit in verbatim], chunks, fuzzy_budget)
+
+    for unit, span in zip(verbatim, spans):
+        if span is not None:
+            unit.source_spans = [span]
+        else:
+            unit.kind = "derived"
+            unit.quote = None
+            unit.source_spans = []
+    return units
+
+
+def _extract_section_id(source: str) -> str:
+    """Reduces an LLM-written source reference ("GSOP_004 - SOP ON ...", "Section 173 BNSS") to its id."""
+    match = GSOP_ID_RE.search(source)
+    if match:
+        return f"GSOP_{int(match.group(1)):03d}"
+    for pattern in (SECTION_RE, LAW_CODE_RE, PLAIN_NUMBER_RE):
+        match = pattern.search(source)
+        if match:
+            return match.group(1).upper()
+
+    source = source.strip()
+    if len(source) > MAX_SOURCE_ID_LENGTH:
+        return source[:MAX_SOURCE_ID_LENGTH] + "..."
+    return source
+
+
+def _clean_supporting_sources(sources: Optional[List[Any]]) -> List[str]:
+    cleaned: List[str] = []
+    for source in sources or []:
+        if not isinstance(source, str) or not source.strip():
+            continue
+        section_id = _extract_section_id(source)
+        if section_id not in cleaned:
+            cleaned.append(section_id)
+    return cleaned
+
+
+def _extract_json_from_response(response: str) -> str:
+    """Returns the JSON object text from an LLM reply (fences, preambles and trailing notes removed)."""
+    block = extract_json_block(response)
+    return block if block is not None else strip_code_fences(response)
+
+
+def parse_answer_units_response(response: str) -> List[AnswerUnit]:
+    """
+    Parses the LLM's answer_units JSON. Returns [] when it is unusable so the caller can
+    fall back to the regular answer. Verbatim units without a quote are downgraded.
+    """
+    text = _extract_json_from_response(response or "")
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError:
+        data = repair_json(text)
+    if not isinstance(data, dict) or not isinstance(data.get("answer_units"), list):
+        logger.warning("Answer units response is not valid JSON; falling back")
+        return []
+
+    units = []
+    for i, item in enumerate(data["answer_units"]):
+        if not isinstance(item, dict) or not isinstance(item.get("text"), str) or not item["text"].strip():
+            continue
+        quote = item.get("quote") if isinstance(item.get("quote"), str) and item["quote"].strip() else None
+        kind = "verbatim" if item.get("kind") == "verbatim" and quote else "derived"
+        units.append(AnswerUnit(
+            id=str(item.get("id") or f"S{i + 1}"),
+            text=item["text"],
+            kind=kind,
+            quote=quote if kind == "verbatim" else None,
+            supporting_sources=_clean_supporting_sources(item.get("supporting_sources")),
+        ))
+    return units
+
+
+def get_answer_unit_prompt(context: str, question: str) -> str:
+    return f"""You are a legal assistant for Indian criminal law (BNS, BNSS, BSA and police SOPs).
+Answer the question using ONLY the context below, split into short answer units.
+
+CONTEXT:
+{context}
+
+QUESTION:
+{question}
+
+Each answer unit is one sentence and is either:
+- "verbatim": the sentence restates the source directly. Set "quote" to the exact words copied
+  from the context (no paraphrasing, no added words), so it can be highlighted in the source.
+- "derived": the sentence summarizes, combines or explains. Do NOT set "quote".
+List the ids of the sources each unit relies on in "supporting_sources" (e.g. "GSOP_004", "Section 173 BNSS").
+
+Return ONLY JSON in this format:
+{{
+  "answer_units": [
+    {{"id": "S1", "text": "...", "kind": "verbatim", "quote": "...", "supporting_sources": ["GSOP_004"]}},
+    {{"id": "S2", "text": "...", "kind": "derived", "supporting_sources": ["173"]}}
+  ]
+}}"""
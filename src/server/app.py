@@ -1,13 +1,27 @@
 import asyncio
+import hashlib
+import hmac
+import json
 import logging
 import os
+import signal
 import time
-from contextlib import asynccontextmanager
-from typing import List, Dict, Any, Optional
-from fastapi import FastAPI, HTTPException
+from contextlib import asynccontextmanager, contextmanager
+from typing import List, Dict, Any, Optional, Union
+from fastapi import FastAPI, HTTPException, Header, Query, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel, Field
 from dotenv import load_dotenv
+from ..retrieval.metrics import metrics
+from ..retrieval.cache import normalize_query
+from ..retrieval.singleflight import AsyncSingleFlight
+from .schemas import ConfidenceLevel, SourceResponse, SourceType, SystemNotice, TimelineItem
+from .adapter import adapt_response, detect_case_type, reset_timeline_index
+from .engine_manager import EngineManager, EngineUnavailable, ReloadInProgress
+from .sentence_attribution import compute_sentence_attribution
+from .source_fetcher import fetch_source_content, get_source_index, reset_source_index, resolve_source
 
 # 1. Setup Logging FIRST (do this before any other imports that might log)
 logging.basicConfig(
@@ -26,12 +40,18 @@ load_dotenv()
 class QueryRequest(BaseModel):
     query: str = Field(..., example="What is the procedure for zero FIR?")
     stream: bool = Field(default=False)
+    include_source_text: bool = Field(
+        default=True,
+        description="Set to false to receive source references only and fetch text via /rag/source."
+    )
 
 class LegalSourceInfo(BaseModel):
     law: str
     section: str
     citation: str
     text: str
+    source_type: Optional[SourceType] = None
+    source_id: Optional[str] = None
 
 class LegalResponseModel(BaseModel):
     answer: str
@@ -42,40 +62,110 @@ class LegalResponseModel(BaseModel):
     important_notes: List[str]
     sources: List[LegalSourceInfo]
     metadata: Dict[str, Any]
+    sentence_attribution: Optional[Dict[str, Any]] = None
+    case_type: Optional[str] = None
+    timeline: List[TimelineItem] = []
+    confidence: Optional[ConfidenceLevel] = None
+    system_notice: Optional[SystemNotice] = None
+
+class BatchQueryRequest(BaseModel):
+    queries: List[str] = Field(..., min_length=1, example=["What is zero FIR?", "Is rape a bailable offence?"])
+    include_source_text: bool = Field(default=True)
+
+class SearchRequest(BaseModel):
+    query: str = Field(..., example="zero FIR registration")
+    k: int = Field(default=5, ge=1, le=50)
+    hybrid_weight: float = Field(default=0.5, ge=0.0, le=1.0, description="0 = semantic only, 1 = keyword only.")
+    filters: Dict[str, Union[str, List[str]]] = Field(
+        default_factory=dict,
+        example={"law": ["BNSS", "SOP"]},
+        description="Metadata filters: law, doc_type, unit_type, chapter, section, source_file, year."
+    )
+    include_text: bool = Field(default=True, description="Include chunk text (and parent context) in the hits.")
+    expand: bool = Field(default=True, description="Attach parent section text to sub-unit hits.")
+
+class SearchHit(BaseModel):
+    citation: str
+    chunk_id: Optional[str] = Field(default=None, description="Stable content-addressed id of the chunk; unchanged across rebuilds while its text is.")
+    source: Optional[Dict[str, Any]] = Field(default=None, description="Where the chunk is in documents/: path, start/end byte offsets, line_start/line_end.")
+    law: Optional[str] = None
+    section: Optional[str] = None
+    unit_type: Optional[str] = None
+    score: float
+    semantic: float
+    keyword: float
+    metadata: Dict[str, Any]
+    text: Optional[str] = None
+    parent_context: Optional[str] = None
+
+class SearchResponse(BaseModel):
+    query: str
+    store_version: str
+    retrieval_mode: str = Field(default="hybrid", description="'lexical' (BM25 only) while the embedding model is still loading.")
+    took_ms: float
+    hits: List[SearchHit]
+
+class CacheInvalidateRequest(BaseModel):
+    store_version: Optional[str] = Field(
+        default=None,
+        description="Store version whose cached answers should be dropped. Defaults to every version except the live one."
+    )
 
 # 4. Global State
-engine = None
-engine_loading = False
-engine_error = None
+# The live engine; rebuilt and swapped in place when the store is republished
+engine_manager = EngineManager()
+engine_manager.on_swap.extend([reset_source_index, reset_timeline_index])
 
-def load_engine_sync():
-    """Synchronously load the engine. Called from background task."""
-    global engine, engine_loading, engine_error
-    try:
-        logger.info("Background: Starting Legal Engine load...")
-        from ..retrieval.engine import LegalEngine
-        engine = LegalEngine()
-        logger.info("Background: Legal Engine loaded successfully!")
-    except Exception as e:
-        logger.error(f"Background: Failed to load engine: {e}", exc_info=True)
-        engine_error = str(e)
-    finally:
-        engine_loading = False
+# Seconds between checks of the store's CURRENT version (0 disables the watcher)
+STORE_WATCH_INTERVAL = float(os.getenv("STORE_WATCH_INTERVAL", 30))
+# Set in forked workers of the prefork server (src/server/prefork.py); reloads are done by the master
+PREFORK_MASTER_PID: Optional[int] = None
+
+# Identical concurrent queries wait on one in-flight computation
+query_flight = AsyncSingleFlight("server.query")
+QUERY_COALESCE_TIMEOUT = float(os.getenv("QUERY_COALESCE_TIMEOUT", 60))
+
+# Batch endpoint limits
+MAX_BATCH_QUERIES = int(os.getenv("MAX_BATCH_QUERIES", 500))
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", 4))
+BATCH_RETRIEVAL_SIZE = int(os.getenv("BATCH_RETRIEVAL_SIZE", 32))
+
+# Search results only change when the store is rebuilt
+SEARCH_CACHE_CONTROL = os.getenv("SEARCH_CACHE_CONTROL", "public, max-age=300")
+# Source text only changes when the documents are re-ingested
+SOURCE_CACHE_CONTROL = os.getenv("SOURCE_CACHE_CONTROL", "public, max-age=86400")
 
 async def load_engine_background():
     """Run engine loading in a thread pool to not block the event loop."""
-    global engine_loading
-    engine_loading = True
+    engine_manager.loading = True
     loop = asyncio.get_event_loop()
-    await loop.run_in_executor(None, load_engine_sync)
+    await loop.run_in_executor(None, engine_manager.load)
+
+async def watch_store():
+    """Reloads the engine when a new store version is published (see EngineManager.check_for_update)."""
+    while True:
+        await asyncio.sleep(STORE_WATCH_INTERVAL)
+        try:
+            result = await run_in_threadpool(engine_manager.check_for_update)
+        except Exception as e:
+            logger.error(f"Store watch failed: {e}", exc_info=True)
+            continue
+        if result:
+            metrics.incr("engine.reloads" if result["status"] == "ok" else "engine.reload_failures")
 
 # 5. Lifespan Context Manager (Modern FastAPI approach)
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup: Schedule engine loading but don't await it
-    logger.info("Server starting up. Scheduling engine load in background...")
-    asyncio.create_task(load_engine_background())
+    if engine_manager.engine is None:
+        logger.info("Server starting up. Scheduling engine load in background...")
+        asyncio.create_task(load_engine_background())
+    else:
+        logger.info("Server starting up with a preloaded engine.")
+    watcher = asyncio.create_task(watch_store()) if STORE_WATCH_INTERVAL > 0 else None
     yield
+    if watcher:
+        watcher.cancel()
     # Shutdown
     logger.info("Server shutting down.")
 
@@ -96,48 +186,120 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+def source_reference(law: str, section: str) -> Optional[Dict[str, Any]]:
+    """Returns the /rag/source reference for a statute source, if the section is indexed."""
+    try:
+        source_type = SourceType(str(law).lower())
+    except ValueError:
+        return None
+    if source_type == SourceType.GENERAL_SOP:
+        return None
+    resolved = resolve_source(source_type, section)
+    if resolved is None:
+        return None
+    return {"source_type": source_type, "source_id": resolved[1]["section_id"]}
+
+def build_response_model(result: Dict[str, Any], include_source_text: bool = True, encoder=None) -> LegalResponseModel:
+    """Maps a LegalEngine result onto the public response contract."""
+    raw_response = result["response"]
+    
+    sources = []
+    citations = []
+    for s in raw_response.get("sources", []):
+        law = s.get("law", "Unknown")
+        section = s.get("section", "Unknown")
+        reference = source_reference(law, section) or {}
+        # Referenced sources can be fetched on demand instead of being inlined
+        text = s.get("content", "") if include_source_text or not reference else ""
+        sources.append(LegalSourceInfo(
+            law=law,
+            section=section,
+            citation=s.get("citation", "Unknown"),
+            text=text,
+            **reference
+        ))
+        citations.append({
+            "source_type": reference["source_type"].value if reference else str(law).lower(),
+            "source_id": reference.get("source_id", section),
+            "display": s.get("citation", ""),
+            "context_snippet": s.get("content", "")
+        })
+
+    answer = raw_response.get("answer", "")
+    # Reuses the retrieval embedding model: one batched encode, no extra LLM call
+    attribution = compute_sentence_attribution(answer, citations, encoder)
+
+    # Victim timelines only for recognised case types; anchors come from the ingest-time timeline index
+    intent = result.get("intent", {})
+    case_type = detect_case_type(" ".join([result.get("query", ""), *map(str, intent.get("key_entities") or [])]))
+    adapted = None
+    if case_type:
+        adapted = adapt_response({
+            "case_type": case_type,
+            "answer": answer,
+            "citations": [source.citation for source in sources],
+        }, result.get("query", ""))
+        
+    return LegalResponseModel(
+        answer=answer,
+        safety_alert=raw_response.get("safety_alert"),
+        immediate_action_plan=raw_response.get("immediate_action_plan", []),
+        legal_basis=raw_response.get("legal_basis", ""),
+        procedure_steps=raw_response.get("procedure_steps", []),
+        important_notes=raw_response.get("important_notes", []),
+        sources=sources,
+        metadata=intent,
+        sentence_attribution=attribution,
+        case_type=adapted.case_type if adapted else None,
+        timeline=adapted.timeline if adapted else [],
+        confidence=adapted.confidence if adapted else None,
+        system_notice=adapted.system_notice if adapted else None
+    )
+
+@contextmanager
+def require_engine():
+    """Leases the live engine for one request; a reload swaps engines without interrupting it."""
+    try:
+        handle = engine_manager.acquire()
+    except EngineUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    try:
+        yield handle.engine
+    finally:
+        engine_manager.release(handle)
+
+def encoder_for(engine):
+    """The (micro-batched) embedding model, or None while retrieval is still lexical-only."""
+    retrieval = engine.orchestrator.engine
+    return retrieval.encoder if retrieval.semantic_ready else None
+
 # 8. Endpoints
 @app.get("/health")
 async def health_check():
-    status = "loading" if engine_loading else ("ready" if engine else "error")
     return {
-        "status": "ok" if engine else "starting",
-        "engine_status": status,
-        "error": engine_error
+        "status": "ok" if engine_manager.engine else "starting",
+        "engine_status": engine_manager.status,
+        "error": engine_manager.error,
+        **engine_manager.describe()
     }
 
 @app.post("/api/v1/query", response_model=LegalResponseModel)
 async def process_query(request: QueryRequest):
-    if engine_loading:
-        raise HTTPException(status_code=503, detail="Legal Engine is still loading. Please wait.")
-    if not engine:
-        raise HTTPException(status_code=503, detail=f"Legal Engine failed to load: {engine_error}")
-    
+    with require_engine() as engine:
+        return await answer_query(engine, request)
+
+async def answer_query(engine, request: QueryRequest) -> LegalResponseModel:
     start_time = time.time()
     logger.info(f"Received query: {request.query}")
     
     try:
-        result = engine.query(request.query)
-        raw_response = result["response"]
-        
-        sources = []
-        for s in raw_response.get("sources", []):
-            sources.append(LegalSourceInfo(
-                law=s.get("law", "Unknown"),
-                section=s.get("section", "Unknown"),
-                citation=s.get("citation", "Unknown"),
-                text=s.get("content", "")
-            ))
-            
-        response = LegalResponseModel(
-            answer=raw_response.get("answer", ""),
-            safety_alert=raw_response.get("safety_alert"),
-            immediate_action_plan=raw_response.get("immediate_action_plan", []),
-            legal_basis=raw_response.get("legal_basis", ""),
-            procedure_steps=raw_response.get("procedure_steps", []),
-            important_notes=raw_response.get("important_notes", []),
-            sources=sources,
-            metadata=result.get("intent", {})
+        result = await query_flight.do(
+            normalize_query(request.query),
+            lambda: run_in_threadpool(engine.query, request.query),
+            timeout=QUERY_COALESCE_TIMEOUT
+        )
+        response = await run_in_threadpool(
+            build_response_model, result, request.include_source_text, encoder_for(engine)
         )
         
         elapsed_time = time.time() - start_time
@@ -145,10 +307,289 @@ async def process_query(request: QueryRequest):
         
         return response
 
+    except asyncio.TimeoutError:
+        logger.warning(f"Timed out waiting for query '{request.query}' after {QUERY_COALESCE_TIMEOUT}s")
+        raise HTTPException(status_code=504, detail="Timed out waiting for the answer. Please retry.")
     except Exception as e:
         logger.error(f"Error processing query '{request.query}': {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
+class LeasedStreamingResponse(StreamingResponse):
+    """
+    A streaming response that holds an engine lease until it has been sent.
+    The lease is released even when the body is never iterated (client gone before the first
+    chunk, send failure), which a generator's `finally` or a BackgroundTask does not guarantee.
+    """
+
+    def __init__(self, content, handle, **kwargs):
+        super().__init__(content, **kwargs)
+        self.handle = handle
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            engine_manager.release(self.handle)
+
+@app.post("/api/v1/query:batch")
+async def process_query_batch(request: BatchQueryRequest):
+    """
+    Answers many queries in one call.
+    Retrieval runs in chunks of BATCH_RETRIEVAL_SIZE queries through `orchestrate_batch`
+    (concurrent classification, one batched encode + FAISS search per chunk), one chunk after
+    another. Generation is what BATCH_CONCURRENCY bounds: each item is answered as soon as its
+    chunk is retrieved and streamed as an NDJSON line when it completes. The engine lease is held
+    until the response is done, so a reload mid-batch does not mix stores.
+    """
+    if len(request.queries) > MAX_BATCH_QUERIES:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_BATCH_QUERIES} queries per batch.")
+    try:
+        handle = engine_manager.acquire()
+    except EngineUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    engine = handle.engine
+    encoder = encoder_for(engine)
+
+    start_time = time.time()
+    logger.info(f"Received batch of {len(request.queries)} queries")
+    metrics.incr("batch.queries", len(request.queries))
+    semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+    chunk_size = max(1, BATCH_RETRIEVAL_SIZE)
+
+    async def retrieve_chunk(queries: List[str], previous: Optional[asyncio.Task]) -> List[Any]:
+        if previous is not None:
+            await asyncio.wait([previous])
+        try:
+            return await run_in_threadpool(engine.orchestrate_batch, queries)
+        except Exception as e:
+            # Retry one at a time so a bad query only fails its own line
+            logger.warning(f"Batched retrieval of {len(queries)} queries failed ({e}); retrying one at a time")
+            orchestrations: List[Any] = []
+            for query in queries:
+                try:
+                    orchestrations.append(await run_in_threadpool(engine.orchestrate, query))
+                except Exception as item_error:
+                    orchestrations.append(item_error)
+            return orchestrations
+
+    async def run_item(index: int, query: str, retrieval: asyncio.Task) -> Dict[str, Any]:
+        try:
+            orchestration = (await asyncio.shield(retrieval))[index % chunk_size]
+            if isinstance(orchestration, Exception):
+                raise orchestration
+            async with semaphore:
+                result = await run_in_threadpool(engine.respond, query, orchestration)
+                response = await run_in_threadpool(build_response_model, result, request.include_source_text, encoder)
+            return {"index": index, "query": query, "result": response.model_dump(mode="json")}
+        except Exception as e:
+            logger.error(f"Batch item {index} failed: {e}")
+            metrics.incr("batch.errors")
+            return {"index": index, "query": query, "error": str(e)}
+
+    async def stream():
+        retrievals: List[asyncio.Task] = []
+        for start in range(0, len(request.queries), chunk_size):
+            previous = retrievals[-1] if retrievals else None
+            retrievals.append(asyncio.ensure_future(
+                retrieve_chunk(request.queries[start:start + chunk_size], previous)))
+        tasks = [asyncio.ensure_future(run_item(i, q, retrievals[i // chunk_size]))
+                 for i, q in enumerate(request.queries)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                item = await next_done
+                yield json.dumps(item, ensure_ascii=False) + "\n"
+            logger.info(f"Batch of {len(tasks)} processed in {time.time() - start_time:.2f}s")
+        finally:
+            # Client went away: don't keep retrieving or generating answers nobody will read
+            for task in retrievals + tasks:
+                task.cancel()
+
+    try:
+        return LeasedStreamingResponse(stream(), handle, media_type="application/x-ndjson")
+    except BaseException:
+        engine_manager.release(handle)
+        raise
+
+def run_search(engine, request: SearchRequest, if_none_match: Optional[str]) -> Response:
+    store_version = engine.store_version
+    retrieval_mode = engine.retrieval_mode
+    etag_source = json.dumps({
+        "store": store_version,
+        "mode": retrieval_mode,
+        # As sent: the body echoes it, so queries differing only in case get their own ETag
+        "query": request.query,
+        "params": request.model_dump(exclude={"query"}),
+    }, sort_keys=True)
+    etag = '"' + hashlib.sha1(etag_source.encode("utf-8")).hexdigest() + '"'
+    headers = {"ETag": etag, "Cache-Control": SEARCH_CACHE_CONTROL}
+
+    if if_none_match and etag in [t.strip().removeprefix("W/") for t in if_none_match.split(",")]:
+        metrics.incr("search.not_modified")
+        return Response(status_code=304, headers=headers)
+
+    start_time = time.perf_counter()
+    try:
+        results = engine.orchestrator.search(
+            request.query, k=request.k, hybrid_weight=request.hybrid_weight, filters=request.filters or None
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not request.expand:
+        for res in results:
+            res.pop("parent_context", None)
+
+    hits = []
+    for res in results:
+        chunk = res["chunk"]
+        meta = chunk.get("metadata", {})
+        hits.append(SearchHit(
+            citation=chunk.get("canonical_header", ""),
+            chunk_id=chunk.get("chunk_id"),
+            source=chunk.get("source") or None,
+            law=meta.get("law"),
+            section=meta.get("section"),
+            unit_type=meta.get("unit_type"),
+            score=res["score"],
+            semantic=res["semantic"],
+            keyword=res["keyword"],
+            metadata=meta,
+            text=chunk["text"] if request.include_text else None,
+            parent_context=res.get("parent_context") if request.include_text else None
+        ))
+    took_ms = (time.perf_counter() - start_time) * 1000
+    metrics.incr("search.requests")
+
+    body = SearchResponse(
+        query=request.query, store_version=store_version, retrieval_mode=retrieval_mode, took_ms=round(took_ms, 2), hits=hits
+    )
+    return JSONResponse(content=body.model_dump(), headers=headers)
+
+@app.get("/api/v1/search", response_model=SearchResponse)
+async def search_get(
+    q: str = Query(..., description="Search text."),
+    k: int = Query(default=5, ge=1, le=50),
+    hybrid_weight: float = Query(default=0.5, ge=0.0, le=1.0),
+    filter: List[str] = Query(default=[], description="Repeatable field:value filters, e.g. filter=law:BNSS"),
+    include_text: bool = Query(default=True),
+    expand: bool = Query(default=True),
+    if_none_match: Optional[str] = Header(default=None)
+):
+    """Retrieval-only search (no LLM). Ranked chunks with ETag support."""
+    filters: Dict[str, List[str]] = {}
+    for item in filter:
+        field, sep, value = item.partition(":")
+        if not sep:
+            raise HTTPException(status_code=400, detail=f"Invalid filter '{item}'. Use field:value.")
+        filters.setdefault(field.strip(), []).append(value.strip())
+
+    request = SearchRequest(query=q, k=k, hybrid_weight=hybrid_weight, filters=filters, include_text=include_text, expand=expand)
+    with require_engine() as engine:
+        return await run_in_threadpool(run_search, engine, request, if_none_match)
+
+@app.post("/api/v1/search", response_model=SearchResponse)
+async def search_post(request: SearchRequest, if_none_match: Optional[str] = Header(default=None)):
+    """Retrieval-only search (no LLM). Same as GET with a JSON body."""
+    with require_engine() as engine:
+        return await run_in_threadpool(run_search, engine, request, if_none_match)
+
+@app.get("/rag/source", response_model=SourceResponse)
+async def get_source(
+    source_type: SourceType,
+    source_id: str,
+    highlight: Optional[str] = Query(default=None, description="Snippet to locate in the source text."),
+    chunk_id: Optional[str] = Query(default=None, description="Retrieved chunk to highlight, from its recorded source offsets."),
+    if_none_match: Optional[str] = Header(default=None)
+):
+    """
+    Returns the verbatim text of a statute section or General SOP block.
+    Served from the prebuilt offset index, so it works even while the engine is still loading
+    (a `chunk_id` highlight needs the engine's chunk metadata and is skipped until then).
+    """
+    resolved = await run_in_threadpool(resolve_source, source_type, source_id)
+    if resolved is None:
+        raise HTTPException(status_code=404, detail=f"No {source_type.value} source '{source_id}'.")
+    key, entry = resolved
+
+    chunk_source = None
+    if chunk_id and engine_manager.engine is not None:
+        with require_engine() as engine:
+            chunk = engine.orchestrator.engine.chunk_by_id(chunk_id)
+        chunk_source = chunk.get("source") if chunk else None
+
+    file_info = get_source_index().files.get(entry["file"], {})
+    etag_source = json.dumps({
+        "key": key,
+        "file": file_info,
+        "span": [entry["offset"], entry["length"]],
+        "highlight": highlight,
+        "chunk_source": chunk_source,
+    }, sort_keys=True)
+    etag = '"' + hashlib.sha1(etag_source.encode("utf-8")).hexdigest() + '"'
+    headers = {"ETag": etag, "Cache-Control": SOURCE_CACHE_CONTROL}
+
+    if if_none_match and etag in [t.strip().removeprefix("W/") for t in if_none_match.split(",")]:
+        metrics.incr("source.not_modified")
+        return Response(status_code=304, headers=headers)
+
+    result = await run_in_threadpool(fetch_source_content, source_type, source_id, highlight, chunk_source)
+    metrics.incr("source.requests")
+    return JSONResponse(content=result.model_dump(mode="json"), headers=headers)
+
+@app.get("/api/v1/metrics")
+async def get_metrics():
+    return {"counters": metrics.snapshot()}
+
+def require_admin(token: Optional[str]):
+    admin_token = os.getenv("ADMIN_TOKEN")
+    if not admin_token:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled. Set ADMIN_TOKEN to enable them.")
+    if not token or not hmac.compare_digest(token.encode("utf-8"), admin_token.encode("utf-8")):
+        raise HTTPException(status_code=401, detail="Invalid admin token.")
+
+@app.post("/api/v1/admin/cache/invalidate")
+async def invalidate_cache(request: CacheInvalidateRequest, x_admin_token: Optional[str] = Header(default=None)):
+    require_admin(x_admin_token)
+    with require_engine() as engine:
+        if not engine.cache:
+            raise HTTPException(status_code=404, detail="Response cache is disabled.")
+
+        if request.store_version:
+            removed = engine.cache.invalidate(store_version=request.store_version)
+        else:
+            removed = engine.cache.invalidate(keep_version=engine.store_version)
+        logger.info(f"Response cache invalidated: {removed} entries removed (store_version={request.store_version})")
+        return {
+            "removed": removed,
+            "current_store_version": engine.store_version,
+            "cache": engine.cache.stats()
+        }
+
+@app.post("/api/v1/admin/store/reload", status_code=202)
+async def reload_store(x_admin_token: Optional[str] = Header(default=None)):
+    """
+    Rebuilds the engine from the store's CURRENT version in the background and swaps it in once
+    a canary search succeeds. Progress and the outcome are reported by /health.
+    """
+    require_admin(x_admin_token)
+    if PREFORK_MASTER_PID:
+        # The master reloads once and re-forks every worker from the new engine
+        os.kill(PREFORK_MASTER_PID, signal.SIGHUP)
+        return {"status": "reloading", "current_store_version": engine_manager.describe()["store_version"]}
+    if engine_manager.loading:
+        raise HTTPException(status_code=503, detail="Legal Engine is still loading. Please wait.")
+    if engine_manager.reloading:
+        raise HTTPException(status_code=409, detail="A reload is already in progress.")
+
+    async def run():
+        try:
+            result = await run_in_threadpool(engine_manager.reload, "admin")
+        except ReloadInProgress:
+            return
+        metrics.incr("engine.reloads" if result["status"] == "ok" else "engine.reload_failures")
+
+    asyncio.create_task(run())
+    return {"status": "reloading", "current_store_version": engine_manager.describe()["store_version"]}
+
 if __name__ == "__main__":
     import uvicorn
     port = int(os.getenv("PORT", 8000))
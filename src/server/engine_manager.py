@@ -0,0 +1,259 @@
+"""
+Owns the live LegalEngine and swaps it for a freshly built one without downtime.
+
+Requests lease the current engine for their duration. A reload builds a new engine from the
+store's CURRENT version in the background, warms it with a canary search and swaps it in
+under a lock; requests already holding the old engine finish on it, and the old engine is
+dropped (and its memory returned) once the last of them releases it.
+"""
+
+import ctypes
+import gc
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from ..retrieval.store import DEFAULT_STORE_DIR, resolve_store_dir, store_version
+
+logger = logging.getLogger("LegalRAG-EngineManager")
+
+RELOAD_CANARY_QUERY = os.getenv("RELOAD_CANARY_QUERY", "procedure for registering a zero FIR")
+
+
+class EngineUnavailable(RuntimeError):
+    """No engine can serve requests (still loading, or the initial load failed)."""
+
+
+class ReloadInProgress(RuntimeError):
+    """A reload was requested while another one is still running."""
+
+
+def _default_factory(store_dir: str, defer_semantic: bool = False):
+    from ..retrieval.engine import LegalEngine
+    return LegalEngine(store_dir, defer_semantic=defer_semantic)
+
+
+def _release_memory():
+    gc.collect()
+    try:
+        # Give freed arenas back to the OS so the old index/model don't linger in RSS
+        ctypes.CDLL("libc.so.6").malloc_trim(0)
+    except (OSError, AttributeError):
+        pass
+
+
+class EngineHandle:
+    """One loaded engine plus the number of requests currently using it."""
+
+    def __init__(self, engine, store_dir: Path, version: str):
+        self.engine = engine
+        self.store_dir = store_dir
+        self.version = version
+        self.loaded_at = time.time()
+        self.active = 0
+        self.retired = False
+
+
+class EngineManager:
+    def __init__(self, store_root: str = DEFAULT_STORE_DIR, factory: Callable[..., Any] = _default_factory,
+                 canary_query: str = RELOAD_CANARY_QUERY):
+        self.store_root = Path(store_root)
+        self.factory = factory
+        self.canary_query = canary_query
+        self.loading = False
+        self.error: Optional[str] = None
+        self.reloading = False
+        self.last_reload: Optional[Dict[str, Any]] = None
+        # Called after every successful swap (e.g. to drop indexes cached for the old version)
+        self.on_swap: List[Callable[[], None]] = []
+
+        self._current: Optional[EngineHandle] = None
+        self._draining: List[EngineHandle] = []
+        self._lock = threading.Lock()
+        self._reload_lock = threading.Lock()
+        # Store fingerprint seen on the previous watch poll (debounces half-written builds)
+        self._pending_fingerprint: Optional[str] = None
+        # Store fingerprint whose reload failed; not retried until the store changes again
+        self._failed_fingerprint: Optional[str] = None
+
+    @property
+    def engine(self):
+        handle = self._current
+        return handle.engine if handle else None
+
+    @property
+    def status(self) -> str:
+        if self.loading:
+            return "loading"
+        return "ready" if self._current else "error"
+
+    def describe(self) -> Dict[str, Any]:
+        handle = self._current
+        engine = handle.engine if handle else None
+        return {
+            "retrieval_mode": engine.retrieval_mode if engine else None,
+            "components": engine.components if engine else {},
+            "store_version": handle.version if handle else None,
+            "store_dir": str(handle.store_dir) if handle else None,
+            "reloading": self.reloading,
+            "draining_engines": len(self._draining),
+            "last_reload": self.last_reload,
+        }
+
+    def _build(self, **kwargs) -> EngineHandle:
+        store_dir = resolve_store_dir(self.store_root)
+        engine = self.factory(str(store_dir), **kwargs)
+        return EngineHandle(engine, store_dir, store_version(store_dir))
+
+    def _warm(self, handle: EngineHandle):
+        results = handle.engine.orchestrator.search(self.canary_query, k=1)
+        if not results:
+            raise RuntimeError(f"Canary search returned no results for '{self.canary_query}'")
+
+    def load(self):
+        """
+        Initial, blocking load in two phases. The engine starts serving (BM25-only) as soon as
+        the lexical phase is in; the embedding model and FAISS then load and switch it to hybrid.
+        Errors are recorded rather than raised (the server keeps serving /health).
+        """
+        self.loading = True
+        try:
+            logger.info("Loading Legal Engine (lexical phase)...")
+            handle = self._build(defer_semantic=True)
+            with self._lock:
+                self._current = handle
+            self.error = None
+            logger.info(f"Legal Engine serving lexical retrieval (store {handle.version} at {handle.store_dir})")
+        except Exception as e:
+            logger.error(f"Failed to load engine: {e}", exc_info=True)
+            self.error = str(e)
+            return
+        finally:
+            self.loading = False
+
+        try:
+            handle.engine.load_semantic()
+            logger.info("Legal Engine switched to hybrid retrieval")
+        except Exception as e:
+            # Keep answering with BM25; the failure shows up in the component status
+            logger.error(f"Semantic retrieval failed to load, staying lexical-only: {e}", exc_info=True)
+
+    def acquire(self) -> EngineHandle:
+        with self._lock:
+            handle = self._current
+            if handle is None:
+                if self.loading:
+                    raise EngineUnavailable("Legal Engine is still loading. Please wait.")
+                raise EngineUnavailable(f"Legal Engine failed to load: {self.error}")
+            handle.active += 1
+            return handle
+
+    def release(self, handle: EngineHandle):
+        with self._lock:
+            handle.active -= 1
+            drained = handle.retired and handle.active == 0
+            if drained:
+                self._draining.remove(handle)
+                handle.engine = None
+        if drained:
+            logger.info(f"Engine for store {handle.version} drained; releasing memory")
+            _release_memory()
+
+    @contextmanager
+    def lease(self) -> Iterator[Any]:
+        """Yields the current engine; a concurrent swap never takes it away mid-request."""
+        handle = self.acquire()
+        try:
+            yield handle.engine
+        finally:
+            self.release(handle)
+
+    def _swap(self, handle: EngineHandle) -> Optional[EngineHandle]:
+        with self._lock:
+            old = self._current
+            self._current = handle
+            if old is not None:
+                old.retired = True
+                if old.active:
+                    self._draining.append(old)
+                else:
+                    old.engine = None
+        return old
+
+    def reload(self, reason: str = "admin") -> Dict[str, Any]:
+        """
+        Builds and warms a new engine from the CURRENT store version, then swaps it in.
+        On any failure the old engine keeps serving. Raises ReloadInProgress if one is running.
+        """
+        if not self._reload_lock.acquire(blocking=False):
+            raise ReloadInProgress("A reload is already in progress.")
+        self.reloading = True
+        start = time.perf_counter()
+        previous = self._current.version if self._current else None
+        try:
+            logger.info(f"Reloading engine ({reason})...")
+            handle = self._build()
+            self._warm(handle)
+            old = self._swap(handle)
+            self.error = None
+            for callback in self.on_swap:
+                callback()
+            if old is not None and old.engine is None:
+                _release_memory()
+            self.last_reload = {
+                "reason": reason,
+                "status": "ok",
+                "previous_version": previous,
+                "store_version": handle.version,
+                "took_ms": round((time.perf_counter() - start) * 1000, 2),
+                "finished_at": time.time(),
+            }
+            logger.info(f"Engine reloaded: store {previous} -> {handle.version}")
+        except Exception as e:
+            logger.error(f"Engine reload failed, keeping store {previous}: {e}", exc_info=True)
+            self.last_reload = {
+                "reason": reason,
+                "status": "failed",
+                "error": str(e),
+                "previous_version": previous,
+                "took_ms": round((time.perf_counter() - start) * 1000, 2),
+                "finished_at": time.time(),
+            }
+        finally:
+            self.reloading = False
+            self._reload_lock.release()
+        return self.last_reload
+
+    def _fingerprint(self) -> str:
+        store_dir = resolve_store_dir(self.store_root)
+        return f"{store_dir}:{store_version(store_dir)}"
+
+    def check_for_update(self) -> Optional[Dict[str, Any]]:
+        """
+        File-watch poll. Reloads when the store differs from the live engine and the change
+        looked the same on the previous poll too, so a build still being written is not picked up.
+        """
+        handle = self._current
+        if handle is None or self.reloading:
+            return None
+        fingerprint = self._fingerprint()
+        if fingerprint == f"{handle.store_dir}:{handle.version}":
+            self._pending_fingerprint = None
+            return None
+        if fingerprint == self._failed_fingerprint:
+            return None
+        if fingerprint != self._pending_fingerprint:
+            self._pending_fingerprint = fingerprint
+            return None
+        self._pending_fingerprint = None
+        try:
+            result = self.reload("store changed")
+        except ReloadInProgress:
+            return None
+        if result["status"] != "ok":
+            self._failed_fingerprint = fingerprint
+        return result
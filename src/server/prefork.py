@@ -0,0 +1,213 @@
+"""
+Preload-then-fork server.
+
+The master process loads the engine once (both phases), moves everything it loaded out of the
+garbage collector's reach with gc.freeze(), binds the listening socket and forks the workers.
+Workers serve from the inherited engine instead of loading their own copy: the FAISS index and
+the BM25 arrays are read-only memory maps, and the model weights and metadata are never
+written, so their pages stay shared copy-on-write across all workers.
+
+Store reloads (SIGHUP, the admin endpoint, or a newly published store version) happen once in
+the master, which then forks a fresh set of workers and gracefully stops the old ones; requests
+already running on an old worker finish there.
+
+    python -m src.server.prefork --workers 4 --port 8000
+"""
+
+import argparse
+import gc
+import logging
+import os
+import signal
+import socket
+import sys
+import time
+from typing import Dict, List
+
+from . import app as server_app
+from .app import engine_manager
+
+logger = logging.getLogger("LegalRAG-Prefork")
+
+# Seconds an old worker gets to finish its in-flight requests before it is killed
+GRACEFUL_TIMEOUT = float(os.getenv("PREFORK_GRACEFUL_TIMEOUT", 60))
+
+
+def bind_socket(host: str, port: int, backlog: int = 2048) -> socket.socket:
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def set_compute_threads(threads: int):
+    """Sizes the torch / FAISS thread pools (only for libraries that are already loaded)."""
+    if "torch" in sys.modules:
+        sys.modules["torch"].set_num_threads(threads)
+    if "faiss" in sys.modules:
+        sys.modules["faiss"].omp_set_num_threads(threads)
+
+
+def prepare_shared_state():
+    """
+    Builds lookups that would otherwise be created lazily in every worker, then freezes the
+    heap so the collector never writes to (and un-shares) the pages of the loaded engine.
+    """
+    engine = engine_manager.engine
+    if engine is not None:
+        engine.orchestrator.engine.filter_columns()
+    gc.collect()
+    gc.freeze()
+
+
+class Master:
+    def __init__(self, sock: socket.socket, workers: int, threads_per_worker: int, log_level: str,
+                 watch_interval: float):
+        self.sock = sock
+        self.num_workers = workers
+        self.threads_per_worker = threads_per_worker
+        self.log_level = log_level
+        self.watch_interval = watch_interval
+        self.workers: List[int] = []
+        # Old-generation workers finishing their requests: pid -> kill deadline
+        self.retiring: Dict[int, float] = {}
+        self.stopping = False
+        self.reload_requested = False
+
+    def _serve(self):
+        import uvicorn
+
+        for sig in (signal.SIGHUP, signal.SIGTERM, signal.SIGINT, signal.SIGCHLD):
+            signal.signal(sig, signal.SIG_DFL)
+        set_compute_threads(self.threads_per_worker)
+        # OpenMP thread counts are per thread, so the FAISS search scheduler sizes its own pool
+        searcher = engine_manager.engine.orchestrator.engine.searcher
+        if searcher is not None and searcher.threads is None:
+            searcher.threads = self.threads_per_worker
+        config = uvicorn.Config(server_app.app, log_level=self.log_level, lifespan="on")
+        uvicorn.Server(config).run(sockets=[self.sock])
+
+    def spawn(self) -> int:
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                self._serve()
+            except BaseException:
+                logger.exception("Worker crashed")
+                code = 1
+            finally:
+                os._exit(code)
+        logger.info(f"Started worker {pid}")
+        return pid
+
+    def spawn_all(self) -> List[int]:
+        return [self.spawn() for _ in range(self.num_workers)]
+
+    def retire(self, pids: List[int]):
+        deadline = time.monotonic() + GRACEFUL_TIMEOUT
+        for pid in pids:
+            try:
+                os.kill(pid, signal.SIGTERM)  # uvicorn stops accepting and drains in-flight requests
+                self.retiring[pid] = deadline
+            except ProcessLookupError:
+                pass
+
+    def reap(self):
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            if pid in self.retiring:
+                del self.retiring[pid]
+            elif pid in self.workers:
+                self.workers.remove(pid)
+                if not self.stopping:
+                    logger.warning(f"Worker {pid} exited unexpectedly (status {status}); replacing it")
+                    self.workers.append(self.spawn())
+
+        now = time.monotonic()
+        for pid, deadline in list(self.retiring.items()):
+            if now > deadline:
+                logger.warning(f"Worker {pid} did not drain in {GRACEFUL_TIMEOUT}s; killing it")
+                os.kill(pid, signal.SIGKILL)
+                self.retiring[pid] = float("inf")
+
+    def refork(self):
+        """Workers fork from the master's (new) engine; the old generation drains and exits."""
+        gc.unfreeze()
+        prepare_shared_state()
+        old, self.workers = self.workers, self.spawn_all()
+        self.retire(old)
+
+    def reload(self, reason: str):
+        result = engine_manager.reload(reason)
+        if result["status"] == "ok":
+            self.refork()
+
+    def run(self):
+        signal.signal(signal.SIGTERM, lambda *_: setattr(self, "stopping", True))
+        signal.signal(signal.SIGINT, lambda *_: setattr(self, "stopping", True))
+        signal.signal(signal.SIGHUP, lambda *_: setattr(self, "reload_requested", True))
+
+        self.workers = self.spawn_all()
+        next_watch = time.monotonic() + self.watch_interval
+        while not self.stopping:
+            time.sleep(0.5)
+            self.reap()
+            if self.reload_requested:
+                self.reload_requested = False
+                self.reload("signal")
+            elif self.watch_interval > 0 and time.monotonic() >= next_watch:
+                next_watch = time.monotonic() + self.watch_interval
+                result = engine_manager.check_for_update()
+                if result and result["status"] == "ok":
+                    self.refork()
+
+        logger.info("Stopping workers...")
+        self.retire(self.workers)
+        self.workers = []
+        while self.retiring:
+            time.sleep(0.2)
+            self.reap()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Preload the engine once, then fork uvicorn workers.")
+    parser.add_argument("--host", default=os.getenv("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", 8000)))
+    parser.add_argument("--workers", type=int, default=int(os.getenv("PREFORK_WORKERS", 2)))
+    parser.add_argument("--threads-per-worker", type=int, default=None,
+                        help="torch/FAISS threads per worker (default: CPU count / workers).")
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args()
+
+    if not hasattr(os, "fork"):
+        sys.exit("The prefork server needs os.fork(); use `uvicorn src.server.app:app` on this platform.")
+    threads = args.threads_per_worker or max(1, (os.cpu_count() or 1) // args.workers)
+
+    # The master does the loading and store watching; workers only serve
+    watch_interval = server_app.STORE_WATCH_INTERVAL
+    server_app.STORE_WATCH_INTERVAL = 0
+    server_app.PREFORK_MASTER_PID = os.getpid()
+
+    engine_manager.load()
+    if engine_manager.engine is None:
+        sys.exit(f"Engine failed to load: {engine_manager.error}")
+    # Single-threaded in the master: OpenMP pools started before fork() can deadlock the children
+    set_compute_threads(1)
+    prepare_shared_state()
+
+    sock = bind_socket(args.host, args.port)
+    logger.info(f"Listening on {args.host}:{args.port} with {args.workers} workers x {threads} threads")
+    Master(sock, args.workers, threads, args.log_level, watch_interval).run()
+
+
+if __name__ == "__main__":
+    main()
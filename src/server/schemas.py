@@ -0,0 +1,67 @@
+from enum import Enum
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel, Field
+
+
+class SourceType(str, Enum):
+    BNS = "bns"
+    BNSS = "bnss"
+    BSA = "bsa"
+    GENERAL_SOP = "general_sop"
+
+
+class HighlightRange(BaseModel):
+    start: int = Field(..., description="Character offset into `content` where the highlight starts.")
+    end: int = Field(..., description="Character offset into `content` where the highlight ends (exclusive).")
+    reason: str
+
+
+class SourceResponse(BaseModel):
+    source_type: SourceType
+    section_id: str
+    title: str
+    content: str = Field(..., description="Verbatim source text, exactly as it appears in the document.")
+    metadata: Dict[str, Any] = {}
+    highlights: List[HighlightRange] = []
+
+
+class TierType(str, Enum):
+    TIER1 = "tier1"  # sexual offences against women/children: strict anchor guarantees
+    TIER2 = "tier2"  # other violent crimes
+    TIER3 = "tier3"  # property crimes
+    STANDARD = "standard"
+
+
+class ConfidenceLevel(str, Enum):
+    HIGH = "high"
+    MEDIUM = "medium"
+    LOW = "low"
+
+
+class TimelineItem(BaseModel):
+    stage: str
+    title: str
+    deadline: Optional[str] = None
+    audience: str = Field(..., description="Who acts at this stage: victim, police or court.")
+    is_anchor: bool = False
+    legal_basis: Optional[str] = None
+    sources: List[str] = []
+
+
+class SystemNotice(BaseModel):
+    type: str = Field(..., description="Machine-readable notice type, e.g. ANCHOR_MISSING.")
+    message: str
+    details: Dict[str, Any] = {}
+
+
+class AdaptedResponse(BaseModel):
+    query: str
+    answer: str
+    case_type: Optional[str] = None
+    tier: TierType = TierType.STANDARD
+    timeline: List[TimelineItem] = []
+    citations: List[str] = []
+    confidence: ConfidenceLevel
+    system_notice: Optional[SystemNotice] = None
+    clarification_needed: bool = False
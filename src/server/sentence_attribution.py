@@ -0,0 +1,248 @@
+"""
+Sentence-level citation attribution.
+
+Maps every sentence of an answer to the sources that support it. The default path is
+vectorized: all sentences and source snippets are embedded in one batch with the engine's
+already-loaded embedding model, one similarity matrix is computed, and explicit section
+references in a sentence ("Section 183", "GSOP_004") boost the matching source.
+Without an encoder a token-overlap heuristic is used. An LLM prompt is also provided for
+callers that want the model to do the mapping instead.
+"""
+
+import json
+import logging
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ..retrieval.json_repair import extract_json_block, repair_json
+
+logger = logging.getLogger("LegalRAG-Attribution")
+
+# Minimum combined score for a source to be attributed to a sentence
+SIMILARITY_THRESHOLD = 0.45
+HEURISTIC_THRESHOLD = 0.3
+# Added to the similarity when a sentence explicitly names the source's section
+SECTION_MATCH_BONUS = 0.5
+MAX_CITATIONS_PER_SENTENCE = 2
+
+ABBREVIATIONS = ("Dr", "Mr", "Mrs", "Ms", "No", "Nos", "Sec", "Sr", "Jr", "St", "vs", "viz", "etc", "Govt", "Hon'ble", "Art", "Cl")
+ABBREVIATION_RE = re.compile(r"\b(" + "|".join(re.escape(a) for a in ABBREVIATIONS) + r")\.", re.I)
+DOTTED_ABBREVIATION_RE = re.compile(r"\b(?:[A-Za-z]\.){2,}")
+SENTENCE_BOUNDARY_RE = re.compile(r"(?<=[.!?])\s+(?=[\"'(*\[]?[A-Z0-9])")
+LIST_MARKER_RE = re.compile(r"^\s*(?:[-*•]|\d+[.)])\s+")
+DOT_PLACEHOLDER = "\x00"
+
+LAW_NAMES = ("BNSS", "BNS", "BSA")
+SECTION_REF_RE = re.compile(
+    r"\b(?:(BNSS|BNS|BSA)\s*,?\s*)?(?:Section|Sec\.?|S\.|u/s)\s*(\d+[A-Z]?)(?:\s*(?:of\s+(?:the\s+)?)?(BNSS|BNS|BSA))?",
+    re.I
+)
+LAW_SECTION_RE = re.compile(r"\b(BNSS|BNS|BSA)\s+(\d+[A-Z]?)\b", re.I)
+GSOP_REF_RE = re.compile(r"\bGSOP[_\s-]?(\d+)\b", re.I)
+
+STOPWORDS = frozenset(
+    "a an and are as at be by can for from has have if in is it its may must not of on or shall "
+    "should such that the their them this to under was were which will with within you your".split()
+)
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def split_into_sentences(text: str) -> List[Dict[str, str]]:
+    """
+    Splits an answer into sentences with stable ids (S1, S2, ...).
+    Markdown headers are skipped, list items are their own sentences, and abbreviations
+    such as "Dr." or "i.e." do not end a sentence.
+    """
+    if not text or not text.strip():
+        return []
+
+    sentences: List[str] = []
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        line = LIST_MARKER_RE.sub("", line)
+        masked = ABBREVIATION_RE.sub(lambda m: m.group(1) + DOT_PLACEHOLDER, line)
+        masked = DOTTED_ABBREVIATION_RE.sub(lambda m: m.group(0).replace(".", DOT_PLACEHOLDER), masked)
+        for part in SENTENCE_BOUNDARY_RE.split(masked):
+            part = part.replace(DOT_PLACEHOLDER, ".").strip()
+            if part:
+                sentences.append(part)
+
+    return [{"sid": f"S{i + 1}", "text": s} for i, s in enumerate(sentences)]
+
+
+def build_citation_key(source_type: str, source_id: str) -> str:
+    return f"{source_type}:{source_id}"
+
+
+def parse_citation_key(key: str) -> Tuple[str, str]:
+    if ":" not in key:
+        return ("unknown", key)
+    source_type, source_id = key.split(":", 1)
+    return (source_type, source_id)
+
+
+def get_available_citations(citations: List[Dict[str, Any]]) -> List[str]:
+    """Unique citation keys, in order of first appearance."""
+    keys = []
+    for citation in citations:
+        key = build_citation_key(citation.get("source_type", "unknown"), str(citation.get("source_id", "")))
+        if key not in keys:
+            keys.append(key)
+    return keys
+
+
+def create_attribution_prompt(sentences: List[Dict[str, str]], citation_keys: List[str], answer: str) -> str:
+    sentence_lines = "\n".join(f"{s['sid']}: {s['text']}" for s in sentences)
+    key_lines = "\n".join(f"- {key}" for key in citation_keys)
+    return f"""You are attributing each sentence of a legal answer to the sources it is based on.
+
+FULL ANSWER:
+{answer}
+
+SENTENCES:
+{sentence_lines}
+
+AVAILABLE CITATIONS:
+{key_lines}
+
+Rules:
+1. Only use citation keys from the list above, exactly as written.
+2. A sentence may have zero, one or several citations.
+3. Use an empty list for sentences that are general advice not grounded in any source.
+
+Return ONLY a JSON object mapping every sentence id to a list of citation keys, e.g.
+{{"S1": ["{citation_keys[0] if citation_keys else 'bnss:173'}"], "S2": []}}"""
+
+
+def parse_attribution_response(text: str, sentences: List[Dict[str, str]], citation_keys: List[str]) -> Optional[Dict[str, List[str]]]:
+    """Validates an LLM attribution reply; unknown keys are dropped. Returns None if unusable."""
+    block = extract_json_block(text or "")
+    if block is None:
+        return None
+    try:
+        data = json.loads(block)
+    except json.JSONDecodeError:
+        data = repair_json(block)
+    if not isinstance(data, dict):
+        return None
+
+    valid = set(citation_keys)
+    mapping = {}
+    for sentence in sentences:
+        keys = data.get(sentence["sid"], [])
+        mapping[sentence["sid"]] = [k for k in keys if isinstance(k, str) and k in valid] if isinstance(keys, list) else []
+    return mapping
+
+
+def _referenced_sections(text: str) -> Tuple[set, set]:
+    """Returns ({(law or None, section)}, {GSOP ids}) explicitly mentioned in a sentence."""
+    sections = set()
+    for law_before, number, law_after in SECTION_REF_RE.findall(text):
+        law = (law_before or law_after).upper() or None
+        sections.add((law, number.upper()))
+    for law, number in LAW_SECTION_RE.findall(text):
+        sections.add((law.upper(), number.upper()))
+    gsops = {f"GSOP_{int(n):03d}" for n in GSOP_REF_RE.findall(text)}
+    return sections, gsops
+
+
+def _section_hits(sentences: List[Dict[str, str]], citations: List[Dict[str, Any]]) -> np.ndarray:
+    """(sentences x citations) matrix of 1.0 where a sentence names the citation's section."""
+    hits = np.zeros((len(sentences), len(citations)), dtype=np.float32)
+    for i, sentence in enumerate(sentences):
+        sections, gsops = _referenced_sections(sentence["text"])
+        if not sections and not gsops:
+            continue
+        for j, citation in enumerate(citations):
+            source_type = str(citation.get("source_type", "")).lower()
+            source_id = str(citation.get("source_id", "")).upper()
+            if source_type == "general_sop":
+                hits[i, j] = source_id in gsops
+            elif source_type.upper() in LAW_NAMES:
+                hits[i, j] = (source_type.upper(), source_id) in sections or (None, source_id) in sections
+    return hits
+
+
+def _citation_text(citation: Dict[str, Any]) -> str:
+    return " ".join(filter(None, [citation.get("display"), citation.get("context_snippet")]))
+
+
+def _select(scores: np.ndarray, sentences: List[Dict[str, str]], keys: List[str], threshold: float) -> Dict[str, List[str]]:
+    mapping = {}
+    for i, sentence in enumerate(sentences):
+        order = np.argsort(-scores[i])[:MAX_CITATIONS_PER_SENTENCE]
+        selected = []
+        for j in order:
+            if scores[i, j] >= threshold and keys[j] not in selected:
+                selected.append(keys[j])
+        mapping[sentence["sid"]] = selected
+    return mapping
+
+
+def _tokens(text: str) -> set:
+    return {t for t in TOKEN_RE.findall(text.lower()) if t not in STOPWORDS}
+
+
+def _heuristic_attribution(sentences: List[Dict[str, str]], citations: List[Dict[str, Any]]) -> Dict[str, List[str]]:
+    """Token overlap between sentence and source, plus explicit section references."""
+    if not citations:
+        return {s["sid"]: [] for s in sentences}
+
+    keys = [build_citation_key(c.get("source_type", "unknown"), str(c.get("source_id", ""))) for c in citations]
+    citation_tokens = [_tokens(_citation_text(c)) for c in citations]
+    scores = np.zeros((len(sentences), len(citations)), dtype=np.float32)
+    for i, sentence in enumerate(sentences):
+        tokens = _tokens(sentence["text"])
+        if not tokens:
+            continue
+        for j, source_tokens in enumerate(citation_tokens):
+            scores[i, j] = len(tokens & source_tokens) / len(tokens)
+
+    scores += _section_hits(sentences, citations) * SECTION_MATCH_BONUS
+    return _select(scores, sentences, keys, HEURISTIC_THRESHOLD)
+
+
+def _vector_attribution(sentences: List[Dict[str, str]], citations: List[Dict[str, Any]], encoder) -> Dict[str, List[str]]:
+    """One batched encode of sentences + sources, one similarity matrix, plus section-reference hits."""
+    keys = [build_citation_key(c.get("source_type", "unknown"), str(c.get("source_id", ""))) for c in citations]
+    texts = [s["text"] for s in sentences] + [_citation_text(c) for c in citations]
+
+    vectors = np.asarray(encoder.encode(texts, convert_to_numpy=True), dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    vectors /= np.maximum(norms, 1e-12)
+
+    n = len(sentences)
+    scores = vectors[:n] @ vectors[n:].T
+    scores += _section_hits(sentences, citations) * SECTION_MATCH_BONUS
+    return _select(scores, sentences, keys, SIMILARITY_THRESHOLD)
+
+
+def compute_sentence_attribution(answer: str, citations: List[Dict[str, Any]], encoder=None) -> Optional[Dict[str, Any]]:
+    """
+    Attributes each answer sentence to the citations that support it.
+
+    `citations` are dicts with source_type, source_id, display and context_snippet.
+    `encoder` is the loaded SentenceTransformer (anything with `.encode(list) -> array`);
+    without one the heuristic is used. Returns None when there is no answer, otherwise
+    {"sentences": [{"sid", "text"}], "mapping": {sid: [citation keys]}}.
+    """
+    sentences = split_into_sentences(answer)
+    if not sentences:
+        return None
+
+    if not citations:
+        mapping = {s["sid"]: [] for s in sentences}
+    elif encoder is not None:
+        try:
+            mapping = _vector_attribution(sentences, citations, encoder)
+        except Exception as e:
+            logger.warning(f"Vector attribution failed, using heuristic: {e}")
+            mapping = _heuristic_attribution(sentences, citations)
+    else:
+        mapping = _heuristic_attribution(sentences, citations)
+
+    return {"sentences": sentences, "mapping": mapping}
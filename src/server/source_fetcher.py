@@ -0,0 +1,164 @@
+import logging
+import os
+import re
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..retrieval.source_index import SOURCE_INDEX_FILE, SourceIndex
+from ..retrieval.store import DEFAULT_STORE_DIR, resolve_store_dir
+from .schemas import HighlightRange, SourceResponse, SourceType
+
+logger = logging.getLogger("LegalRAG-SourceFetcher")
+
+# Defaults to the index shipped with the live store version
+SOURCE_INDEX_PATH = os.getenv("SOURCE_INDEX_PATH")
+LEGAL_DOCS_DIR = os.getenv("LEGAL_DOCS_DIR", "documents")
+
+HIGHLIGHT_REASON = "Referenced in response"
+CHUNK_HIGHLIGHT_REASON = "Retrieved passage"
+
+GSOP_ID_RE = re.compile(r"GSOP[\s_-]*(\d+)", re.I)
+# The number after a section marker; ids like "BNSS 2023 Section 183" also carry the act's year.
+# Sections run to three digits, so a four-digit token is never taken for one.
+SECTION_REF_RE = re.compile(r"(?:\bsections?|\bsec\.?|§|\bs\.)\s*(\d{1,3}[A-Z]?)(?![\dA-Z])", re.I)
+# Without a marker, only an id that is just the number (optionally with a clause, "183(2)")
+BARE_SECTION_RE = re.compile(r"(\d{1,3}[A-Z]?)(?:\s*\([^)]*\))*", re.I)
+
+_index: Optional[SourceIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_source_index() -> SourceIndex:
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                index_path = SOURCE_INDEX_PATH or str(resolve_store_dir(DEFAULT_STORE_DIR) / SOURCE_INDEX_FILE)
+                _index = SourceIndex.load(index_path, LEGAL_DOCS_DIR)
+                logger.info(f"Source index ready: {len(_index.entries)} entries")
+    return _index
+
+
+def reset_source_index():
+    """Drops the cached index so the next lookup loads the one from the new store version."""
+    global _index
+    with _index_lock:
+        _index = None
+
+
+def normalize_source_id(source_type: SourceType, source_id: str) -> Optional[str]:
+    """
+    Maps user/LLM-style references onto index ids.
+    "gsop_4" -> "GSOP_004"; "BNSS 2023 Section 183", "Sec. 183(2)", "§183", "183" -> "183".
+    """
+    source_id = (source_id or "").strip()
+    if not source_id:
+        return None
+
+    if source_type == SourceType.GENERAL_SOP:
+        match = GSOP_ID_RE.search(source_id)
+        return f"GSOP_{int(match.group(1)):03d}" if match else None
+
+    match = SECTION_REF_RE.search(source_id) or BARE_SECTION_RE.fullmatch(source_id)
+    return match.group(1).upper() if match else None
+
+
+def resolve_source(source_type: SourceType, source_id: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+    """Returns (index key, entry) without touching the source file."""
+    section_id = normalize_source_id(source_type, source_id)
+    if section_id is None:
+        return None
+    key = f"{source_type.value}:{section_id}"
+    entry = get_source_index().get(key)
+    return (key, entry) if entry else None
+
+
+def _whitespace_map(text: str) -> Tuple[str, List[int]]:
+    """Collapses whitespace runs to single spaces, keeping each output char's offset in `text`."""
+    chars, offsets = [], []
+    previous_space = False
+    for i, ch in enumerate(text):
+        if ch.isspace():
+            if previous_space:
+                continue
+            chars.append(" ")
+            previous_space = True
+        else:
+            chars.append(ch)
+            previous_space = False
+        offsets.append(i)
+    return "".join(chars), offsets
+
+
+def compute_highlights(content: str, snippet: Optional[str]) -> List[HighlightRange]:
+    """
+    Locates a response snippet inside the verbatim content.
+    Snippets are often cut with a trailing '...', and may have had whitespace reflowed.
+    """
+    if not snippet:
+        return []
+    for ellipsis in ("...", "…"):
+        if snippet.endswith(ellipsis):
+            snippet = snippet[:-len(ellipsis)]
+            break
+
+    for candidate in (snippet, snippet.strip()):
+        if not candidate:
+            continue
+        start = content.find(candidate)
+        if start != -1:
+            return [HighlightRange(start=start, end=start + len(candidate), reason=HIGHLIGHT_REASON)]
+
+    normalized_snippet = " ".join(snippet.split())
+    if not normalized_snippet:
+        return []
+    normalized_content, offsets = _whitespace_map(content)
+    start = normalized_content.find(normalized_snippet)
+    if start == -1:
+        return []
+    end = offsets[start + len(normalized_snippet) - 1] + 1
+    return [HighlightRange(start=offsets[start], end=end, reason=HIGHLIGHT_REASON)]
+
+
+def chunk_highlights(entry: Dict[str, Any], chunk_source: Optional[Dict[str, Any]]) -> List[HighlightRange]:
+    """
+    Highlight of a retrieved chunk inside a source entry, taken from the byte span recorded
+    for the chunk at ingest (see Chunk.source), so nothing is searched.
+    """
+    if not chunk_source or chunk_source.get("path") != entry["file"]:
+        return []
+    entry_start, entry_end = entry["offset"], entry["offset"] + entry["length"]
+    start, end = max(chunk_source["start"], entry_start), min(chunk_source["end"], entry_end)
+    if start >= end:
+        return []
+    index = get_source_index()
+    char_start = len(index.read_range(entry["file"], entry_start, start))
+    char_end = char_start + len(index.read_range(entry["file"], start, end))
+    return [HighlightRange(start=char_start, end=char_end, reason=CHUNK_HIGHLIGHT_REASON)]
+
+
+def fetch_source_content(
+    source_type: SourceType,
+    source_id: str,
+    highlight_snippet: Optional[str] = None,
+    chunk_source: Optional[Dict[str, Any]] = None
+) -> Optional[SourceResponse]:
+    """
+    Returns the verbatim text of a statute section or General SOP block, or None if unknown.
+    No LLM is involved: the text is sliced straight out of the source document. A chunk's
+    recorded source span is highlighted directly; a snippet is located in the text.
+    """
+    resolved = resolve_source(source_type, source_id)
+    if resolved is None:
+        return None
+    _, entry = resolved
+
+    content = get_source_index().read(entry)
+    return SourceResponse(
+        source_type=source_type,
+        section_id=entry["section_id"],
+        title=entry["title"],
+        content=content,
+        metadata=entry.get("metadata", {}),
+        highlights=chunk_highlights(entry, chunk_source) or compute_highlights(content, highlight_snippet),
+    )
@@ -11,5 +11,10 @@ fi
 
 echo "Binding to PORT: $PORT"
 
+# Several workers share one preloaded engine via the prefork server
+if [ -n "$PREFORK_WORKERS" ] && [ "$PREFORK_WORKERS" -gt 1 ]; then
+    exec python -m src.server.prefork --host 0.0.0.0 --port "$PORT" --workers "$PREFORK_WORKERS"
+fi
+
 # Run Uvicorn with explicit shell expansion
 uvicorn src.server.app:app --host 0.0.0.0 --port "$PORT"
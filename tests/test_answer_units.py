@@ -5,6 +5,9 @@ This tests the answer unit system that classifies sentences as
 verbatim (directly quoted, can be highlighted) or derived (synthesized, no highlight).
 """
 
+import logging
+import time
+
 import pytest
 from src.server.answer_units import (
     SourceSpan,
@@ -12,6 +15,7 @@ from src.server.answer_units import (
     ChunkWithOffsets,
     resolve_span,
     resolve_all_spans,
+    _resolve_quotes,
     parse_answer_units_response,
     get_answer_unit_prompt,
     _normalize_text,
@@ -244,6 +248,82 @@ class TestResolveAllSpans:
         assert len(resolved[0].source_spans) == 0
 
 
+class TestBatchedResolution:
+    """Tests for resolving many quotes against many chunks in one pass."""
+
+    CHUNKS = [
+        ChunkWithOffsets("BNSS_2023", "173", "Information relating to a cognizable offence shall be reduced to writing.", 1000, 1073),
+        ChunkWithOffsets("BNSS_2023", "183", "The Magistrate shall record the statement. The statement shall be signed.", 2000, 2074),
+        ChunkWithOffsets("GENERAL_SOP", "GSOP_004", "Register the FIR immediately. The statement shall be signed by the informant.", 0, 78),
+    ]
+
+    def test_many_quotes_many_chunks(self):
+        """Each quote maps to the chunk and exact offsets it came from."""
+        quotes = ["reduced to writing", "Magistrate shall record", "Register the FIR immediately", "not in any chunk"]
+        spans = _resolve_quotes(quotes, self.CHUNKS)
+
+        assert [s.section_id if s else None for s in spans] == ["173", "183", "GSOP_004", None]
+        for span, chunk in zip(spans[:3], self.CHUNKS):
+            local = span.start_char - chunk.start_char
+            assert chunk.text[local:local + len(span.quote)] == span.quote
+            assert span.quote.lower() == quotes[self.CHUNKS.index(chunk)].lower()
+
+    def test_duplicate_quotes(self):
+        """The same quote twice (even with different spacing/case) resolves to the same span."""
+        spans = _resolve_quotes(["record  the STATEMENT", "record the statement"], self.CHUNKS)
+        assert spans[0] is not None
+        assert spans[0] == spans[1]
+
+    def test_first_occurrence_wins(self):
+        """A quote found in several places resolves to the first chunk, then the first position."""
+        span = _resolve_quotes(["the statement shall be signed"], self.CHUNKS)[0]
+        assert span.section_id == "183"
+
+        span = _resolve_quotes(["the statement"], self.CHUNKS)[0]
+        assert (span.section_id, span.start_char) == ("183", 2000 + self.CHUNKS[1].text.index("the statement"))
+
+    def test_resolve_all_spans_downgrades_only_unresolved(self):
+        """In a batch, resolved quotes get spans and the rest are downgraded."""
+        units = [
+            AnswerUnit(id="S1", text="a", kind="verbatim", quote="reduced to writing"),
+            AnswerUnit(id="S2", text="b", kind="verbatim", quote="made up words"),
+            AnswerUnit(id="S3", text="c", kind="verbatim", quote="reduced to writing"),
+        ]
+        resolve_all_spans(units, self.CHUNKS)
+        assert [u.kind for u in units] == ["verbatim", "derived", "verbatim"]
+        assert units[0].source_spans == units[2].source_spans
+
+    def test_budget_exhausted_is_logged(self, caplog):
+        """With no fuzzy budget left, remaining quotes stay unresolved and the cut-off is logged."""
+        with caplog.at_level(logging.INFO, logger="LegalRAG-AnswerUnits"):
+            spans = _resolve_quotes(["Register the FIR immediatly", "Magistrate shal record"], self.CHUNKS,
+                                    fuzzy_budget=0)
+        assert spans == [None, None]
+        assert "Fuzzy span budget exhausted; 2 quotes left unresolved" in caplog.text
+
+    def test_fuzzy_fallback_within_budget(self):
+        """A near-miss quote is still found by the fuzzy fallback."""
+        span = _resolve_quotes(["Register the FIR immediatly"], self.CHUNKS)[0]
+        assert span is not None
+        assert span.section_id == "GSOP_004"
+
+    def test_pathological_pair_returns_within_budget(self):
+        """A single long, repetitive chunk cannot run the fuzzy fallback past its budget."""
+        chunk = ChunkWithOffsets("DOC", "001", "ab " * 7000, 0, 21000)
+        quote = "ab " * 99 + "abc"
+        budget = 0.05
+        started = time.perf_counter()
+        _resolve_quotes([quote], [chunk], fuzzy_budget=budget)
+        # The deadline is checked between candidate windows, so allow one window's worth over
+        assert time.perf_counter() - started < budget + 0.05
+
+    def test_fuzzy_find_deadline_returns_best_so_far(self):
+        """A passed deadline stops _fuzzy_find before any window is scored; a live one finds the match."""
+        assert _fuzzy_find("a" * 300, "a" * 20000, deadline=time.perf_counter()) is None
+        haystack = "record the statement of the victim within 24 hours"
+        assert _fuzzy_find("the statment of the victim", haystack, deadline=time.perf_counter() + 10) == (7, 33)
+
+
 class TestExtractJsonFromResponse:
     """Tests for extracting JSON from various LLM response formats."""
     
@@ -0,0 +1,245 @@
+"""
+Tests for POST /api/v1/query:batch and the batched orchestration/retrieval paths behind it.
+
+Run with: pytest tests/test_batch_query.py -v
+"""
+
+import asyncio
+import json
+import sys
+import threading
+import time
+import types
+
+import pytest
+from fastapi.testclient import TestClient
+
+import src.retrieval.retrieval_engine as retrieval_engine
+import src.server.app as app_module
+from src.retrieval.classifier import QueryIntent
+from src.retrieval.store import new_version_dir, publish_version
+from src.server.engine_manager import EngineManager
+from tests.test_chunk_ids import CHUNKS, KeywordModel, write_store
+from tests.test_engine_manager import write_store as write_version
+
+HIT = {
+    "chunk": {"text": "Zero FIR may be registered at any police station", "canonical_header": "BNSS 173",
+              "chunk_id": "BNSS/s173:abc", "metadata": {"law": "BNSS", "section": "173", "unit_type": "section"}},
+    "score": 0.9, "semantic": 0.8, "keyword": 1.0,
+}
+
+
+class StubOrchestrator:
+    def __init__(self):
+        self.engine = types.SimpleNamespace(semantic_ready=False)
+        self.searches = []
+
+    def search(self, query, k=5, hybrid_weight=0.5, filters=None):
+        self.searches.append({"query": query, "k": k, "hybrid_weight": hybrid_weight, "filters": filters})
+        if filters and "bogus" in filters:
+            raise ValueError("Unsupported filter field(s): bogus")
+        return [dict(HIT)][:k]
+
+
+class StubEngine:
+    """A LegalEngine stand-in: no store, no LLM. Queries containing 'slow' (answer) or 'boom' (retrieval) misbehave."""
+
+    def __init__(self, store_dir, defer_semantic=False):
+        self.orchestrator = StubOrchestrator()
+        self.store_version = "v-test"
+        self.retrieval_mode = "hybrid"
+        self.components = {}
+        self.orchestrated = []
+        self.batches = []
+
+    def load_semantic(self):
+        pass
+
+    def orchestrate(self, query):
+        self.orchestrated.append(query)
+        if "boom" in query:
+            raise RuntimeError(f"classification failed for {query}")
+        return {"intent": {"category": "general_explanation"}, "results": []}
+
+    def orchestrate_batch(self, queries, max_workers=8):
+        self.batches.append(list(queries))
+        return [self.orchestrate(q) for q in queries]
+
+    def respond(self, query, orchestration):
+        if "slow" in query:
+            time.sleep(0.3)
+        return {"query": query, "intent": orchestration["intent"], "response": {
+            "answer": f"Answer to {query}.", "legal_basis": "", "procedure_steps": [], "important_notes": [],
+            "sources": []}}
+
+
+@pytest.fixture
+def manager(tmp_path, monkeypatch):
+    version = new_version_dir(tmp_path)
+    write_version(version)
+    publish_version(tmp_path, version)
+    manager = EngineManager(tmp_path, factory=StubEngine)
+    manager.load()
+    monkeypatch.setattr(app_module, "engine_manager", manager)
+    return manager
+
+
+@pytest.fixture
+def client(manager):
+    # No `with`: the lifespan (background load, store watcher) is not started
+    return TestClient(app_module.app)
+
+
+def batch_lines(client, queries):
+    response = client.post("/api/v1/query:batch", json={"queries": queries})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+class TestBatchEndpoint:
+    """Items stream as they finish, failures stay per item, and the engine lease is always returned."""
+
+    def test_every_item_answered_once(self, client):
+        queries = [f"question {i}" for i in range(6)]
+        lines = batch_lines(client, queries)
+        assert sorted(line["index"] for line in lines) == list(range(6))
+        for line in lines:
+            assert line["query"] == queries[line["index"]]
+            assert line["result"]["answer"] == f"Answer to {line['query']}."
+
+    def test_items_stream_in_completion_order(self, client):
+        lines = batch_lines(client, ["slow question", "fast one", "fast two"])
+        assert [line["index"] for line in lines][-1] == 0
+        assert {line["index"] for line in lines[:2]} == {1, 2}
+
+    def test_failed_item_is_an_error_line(self, client):
+        lines = {line["index"]: line for line in batch_lines(client, ["fine", "boom", "also fine"])}
+        assert "classification failed for boom" in lines[1]["error"]
+        assert "result" not in lines[1]
+        assert lines[0]["result"]["answer"] and lines[2]["result"]["answer"]
+
+    def test_retrieval_runs_in_batched_chunks(self, client, manager, monkeypatch):
+        monkeypatch.setattr(app_module, "BATCH_RETRIEVAL_SIZE", 2)
+        monkeypatch.setattr(app_module, "BATCH_CONCURRENCY", 1)
+        queries = [f"question {i}" for i in range(5)]
+        lines = batch_lines(client, queries)
+        assert manager.engine.batches == [queries[0:2], queries[2:4], queries[4:5]]
+        assert sorted(line["index"] for line in lines) == list(range(5))
+        assert all("result" in line for line in lines)
+
+    def test_failed_chunk_retried_one_at_a_time(self, client, manager, monkeypatch):
+        monkeypatch.setattr(app_module, "BATCH_RETRIEVAL_SIZE", 2)
+        lines = {line["index"]: line for line in batch_lines(client, ["one", "boom", "three"])}
+        assert manager.engine.batches == [["one", "boom"], ["three"]]
+        assert "classification failed for boom" in lines[1]["error"]
+        assert lines[0]["result"]["answer"] == "Answer to one."
+        assert lines[2]["result"]["answer"] == "Answer to three."
+
+    def test_too_many_queries(self, client, manager, monkeypatch):
+        monkeypatch.setattr(app_module, "MAX_BATCH_QUERIES", 2)
+        response = client.post("/api/v1/query:batch", json={"queries": ["a", "b", "c"]})
+        assert response.status_code == 413
+        assert manager.engine.batches == []
+        assert manager._current.active == 0
+
+    def test_empty_batch_rejected(self, client):
+        assert client.post("/api/v1/query:batch", json={"queries": []}).status_code == 422
+
+    def test_lease_released_after_stream(self, client, manager):
+        batch_lines(client, ["one", "boom"])
+        assert manager._current.active == 0
+
+    def test_lease_released_when_body_never_sent(self, manager):
+        handle = manager.acquire()
+        started = []
+
+        async def body():
+            started.append(True)
+            yield b"never sent\n"
+
+        async def send(message):
+            raise OSError("client went away")
+
+        async def receive():
+            return {"type": "http.disconnect"}
+
+        response = app_module.LeasedStreamingResponse(body(), handle, media_type="application/x-ndjson")
+        scope = {"type": "http", "asgi": {"spec_version": "2.4"}}
+        with pytest.raises(Exception):
+            asyncio.run(response(scope, receive, send))
+        assert started == []
+        assert handle.active == 0
+
+
+@pytest.fixture
+def orchestrator(tmp_path, monkeypatch):
+    fake_st = types.ModuleType("sentence_transformers")
+    fake_st.SentenceTransformer = lambda name: KeywordModel()
+    monkeypatch.setitem(sys.modules, "sentence_transformers", fake_st)
+    monkeypatch.setattr(retrieval_engine, "EMBED_BATCHING", False)
+    monkeypatch.setenv("GEMINI_API_KEY", "unused")
+    from src.retrieval.orchestrator import LegalOrchestrator
+    orchestrator = LegalOrchestrator(str(write_store(tmp_path, CHUNKS)))
+
+    classified = []
+    lock = threading.Lock()
+
+    def classify(query):
+        with lock:
+            classified.append(query)
+        context = "victim_distress" if "robbed" in query else "informational"
+        return QueryIntent(category="procedure" if "fir" in query.lower() else "general_explanation",
+                           sub_intent="report to police", key_entities=["theft"], user_context=context,
+                           confidence=1.0)
+
+    orchestrator.classify = classify
+    orchestrator.classified = classified
+    return orchestrator
+
+
+def chunk_ids(results):
+    return [r["chunk"]["chunk_id"] for r in results]
+
+
+class TestBatchedRetrieval:
+    """The batched paths give the same results as one query at a time."""
+
+    QUERIES = ["zero fir registration", "I was robbed, what now", "punishment for theft", "medical examination"]
+
+    def test_search_batch_matches_single_searches(self, orchestrator):
+        engine = orchestrator.engine
+        weights = [0.5, 0.0, 1.0, 0.6]
+        batched = engine.search_batch(self.QUERIES, k=2, hybrid_weights=weights)
+        single = [engine.search(q, k=2, hybrid_weight=w) for q, w in zip(self.QUERIES, weights)]
+        assert [chunk_ids(r) for r in batched] == [chunk_ids(r) for r in single]
+        assert [[r["score"] for r in rs] for rs in batched] == [[r["score"] for r in rs] for rs in single]
+
+    def test_search_batch_filters_and_empty(self, orchestrator):
+        engine = orchestrator.engine
+        assert engine.search_batch([]) == []
+        filtered = engine.search_batch(self.QUERIES, k=3, filters={"law": "BNS"})
+        assert all(r["chunk"]["metadata"]["law"] == "BNS" for rs in filtered for r in rs)
+        assert engine.search_batch(self.QUERIES[:2], filters={"law": "NALSA"}) == [[], []]
+
+    def test_orchestrate_batch_matches_orchestrate(self, orchestrator):
+        batched = orchestrator.orchestrate_batch(self.QUERIES, k=2, max_workers=2)
+        single = [orchestrator.orchestrate(q, k=2) for q in self.QUERIES]
+        assert len(batched) == len(self.QUERIES)
+        for got, expected in zip(batched, single):
+            assert got["intent"] == expected["intent"]
+            assert chunk_ids(got["results"]) == chunk_ids(expected["results"])
+        assert sorted(orchestrator.classified[:len(self.QUERIES)]) == sorted(self.QUERIES)
+
+    def test_legal_engine_delegates(self, orchestrator):
+        from src.retrieval.engine import LegalEngine
+
+        engine = LegalEngine.__new__(LegalEngine)
+        engine.orchestrator = orchestrator
+        batched = engine.orchestrate_batch(self.QUERIES[:2], max_workers=2)
+        assert [chunk_ids(o["results"]) for o in batched] == \
+            [chunk_ids(engine.orchestrate(q)["results"]) for q in self.QUERIES[:2]]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,93 @@
+"""
+Tests for the array-backed BM25 index shared by forked workers.
+
+Run with: pytest tests/test_bm25_arrays.py -v
+"""
+
+import pickle
+
+import numpy as np
+import pytest
+from rank_bm25 import BM25Okapi
+
+from src.retrieval.bm25_arrays import BM25_ARRAYS_DIR, BM25Arrays, load_bm25
+
+CORPUS = [
+    "zero fir can be registered at any police station",
+    "punishment for theft under the sanhita",
+    "the police station shall register the fir without delay",
+    "medical examination of the victim",
+    "bail and anticipatory bail before the sessions court",
+    "theft of property from a dwelling house",
+]
+QUERIES = [
+    "zero fir police station",
+    "theft punishment",
+    "bail",
+    "unknown words only",
+    "fir fir station",
+]
+
+
+@pytest.fixture
+def okapi():
+    return BM25Okapi([doc.split() for doc in CORPUS])
+
+
+class TestBM25Arrays:
+    """BM25Arrays must score exactly like rank_bm25.BM25Okapi."""
+
+    @pytest.mark.parametrize("query", QUERIES)
+    def test_scores_match_okapi(self, okapi, query):
+        arrays = BM25Arrays.from_okapi(okapi)
+        tokens = query.split()
+        assert np.allclose(arrays.get_scores(tokens), okapi.get_scores(tokens), rtol=0, atol=1e-12)
+
+    @pytest.mark.parametrize("query", QUERIES)
+    def test_build_matches_okapi(self, okapi, query):
+        arrays = BM25Arrays.build(doc.split() for doc in CORPUS)
+        tokens = query.split()
+        assert np.allclose(arrays.get_scores(tokens), okapi.get_scores(tokens), rtol=0, atol=1e-12)
+
+    def test_build_matches_conversion(self, okapi):
+        built, converted = BM25Arrays.build(doc.split() for doc in CORPUS), BM25Arrays.from_okapi(okapi)
+        for name in ("terms", "idf", "ptr", "docs", "tfs", "doc_len"):
+            assert np.array_equal(getattr(built, name), getattr(converted, name)), name
+        assert built.avgdl == converted.avgdl
+
+    def test_save_and_mmap_load(self, okapi, tmp_path):
+        BM25Arrays.from_okapi(okapi).save(tmp_path / BM25_ARRAYS_DIR)
+        loaded = BM25Arrays.load(tmp_path / BM25_ARRAYS_DIR)
+
+        assert isinstance(loaded.docs, np.memmap)
+        for query in QUERIES:
+            assert np.allclose(loaded.get_scores(query.split()), okapi.get_scores(query.split()), rtol=0, atol=1e-12)
+
+    def test_load_missing_or_old_format(self, okapi, tmp_path):
+        assert BM25Arrays.load(tmp_path / "missing") is None
+
+        BM25Arrays.from_okapi(okapi).save(tmp_path / BM25_ARRAYS_DIR)
+        (tmp_path / BM25_ARRAYS_DIR / "params.json").write_text('{"version": 0}', encoding="utf-8")
+        assert BM25Arrays.load(tmp_path / BM25_ARRAYS_DIR) is None
+
+
+class TestLoadBM25:
+    """load_bm25 prefers the prebuilt arrays and falls back to bm25.pkl."""
+
+    def test_falls_back_to_pickle(self, okapi, tmp_path):
+        with open(tmp_path / "bm25.pkl", "wb") as f:
+            pickle.dump(okapi, f)
+
+        arrays = load_bm25(tmp_path)
+        assert np.allclose(arrays.get_scores(["theft"]), okapi.get_scores(["theft"]))
+
+    def test_prefers_arrays(self, okapi, tmp_path):
+        BM25Arrays.from_okapi(okapi).save(tmp_path / BM25_ARRAYS_DIR)
+
+        arrays = load_bm25(tmp_path, mmap=False)
+        assert not isinstance(arrays.docs, np.memmap)
+        assert arrays.corpus_size == len(CORPUS)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,137 @@
+"""
+Tests for stable chunk ids and the id-mapped FAISS store.
+
+Run with: pytest tests/test_chunk_ids.py -v
+"""
+
+import json
+import pickle
+import sys
+import types
+
+import faiss
+import numpy as np
+import pytest
+from rank_bm25 import BM25Okapi
+
+import src.retrieval.retrieval_engine as retrieval_engine
+from ingest_legal_docs import Chunk, assign_chunk_ids, make_chunk_id
+from src.retrieval.retrieval_engine import RetrievalEngine
+from src.retrieval.store import CHUNK_IDS_FILE, faiss_ids
+
+META = {"law": "BNS", "section": "103", "sub_section": "2", "unit_type": "sub_section"}
+
+CHUNKS = [
+    {"text": "Zero FIR may be registered at any police station", "metadata": {"law": "BNSS", "section": "173"}},
+    {"text": "Medical examination of the victim of rape", "metadata": {"law": "BNSS", "section": "184"}},
+    {"text": "Punishment for theft", "metadata": {"law": "BNS", "section": "303"}},
+]
+for position, chunk in enumerate(CHUNKS):
+    chunk["chunk_id"] = make_chunk_id(chunk["metadata"], chunk["text"])
+    chunk["vector"] = np.eye(3, dtype="float32")[position]
+
+
+class KeywordModel:
+    """Embeds a text as the vector of the first chunk sharing a word with it."""
+
+    def encode(self, texts, convert_to_numpy=True, **kwargs):
+        def embed(text):
+            for chunk in CHUNKS:
+                if set(text.lower().split()) & set(chunk["text"].lower().split()):
+                    return chunk["vector"]
+            return np.full(3, 1 / np.sqrt(3), dtype="float32")
+        return np.vstack([embed(t) for t in texts])
+
+
+def write_store(path, chunks, id_mapped=True):
+    path.mkdir(parents=True, exist_ok=True)
+    with open(path / "metadata.json", "w", encoding="utf-8") as f:
+        json.dump([{k: v for k, v in c.items() if k != "vector"} for c in chunks], f)
+    with open(path / "bm25.pkl", "wb") as f:
+        pickle.dump(BM25Okapi([c["text"].lower().split() for c in chunks]), f)
+    vectors = np.vstack([c["vector"] for c in chunks])
+    if id_mapped:
+        chunk_ids = [c["chunk_id"] for c in chunks]
+        index = faiss.IndexIDMap(faiss.IndexFlatIP(3))
+        index.add_with_ids(vectors, faiss_ids(chunk_ids))
+        with open(path / CHUNK_IDS_FILE, "w", encoding="utf-8") as f:
+            json.dump({"chunk_ids": chunk_ids, "faiss_ids": faiss_ids(chunk_ids).tolist()}, f)
+    else:
+        index = faiss.IndexFlatIP(3)
+        index.add(vectors)
+    faiss.write_index(index, str(path / "index.faiss"))
+    return path
+
+
+@pytest.fixture
+def load_engine(monkeypatch):
+    fake_st = types.ModuleType("sentence_transformers")
+    fake_st.SentenceTransformer = lambda name: KeywordModel()
+    monkeypatch.setitem(sys.modules, "sentence_transformers", fake_st)
+    monkeypatch.setattr(retrieval_engine, "EMBED_BATCHING", False)
+    return lambda path: RetrievalEngine(str(path))
+
+
+class TestChunkIds:
+    """Ids are derived from the law, section path and text, never from the chunk's position."""
+
+    def test_format_and_stability(self):
+        chunk_id = make_chunk_id(META, "text")
+        assert chunk_id.startswith("BNS/s103/ss2/sub_section:")
+        assert make_chunk_id(dict(META), "text") == chunk_id
+        assert make_chunk_id(META, "amended text") != chunk_id
+        assert make_chunk_id({**META, "section": "104"}, "text") != chunk_id
+
+    def test_identical_chunks_are_numbered(self):
+        chunks = assign_chunk_ids([Chunk("same", dict(META), "h"), Chunk("other", dict(META), "h"), Chunk("same", dict(META), "h")])
+        assert chunks[2].chunk_id == chunks[0].chunk_id + "-2"
+        assert len({c.chunk_id for c in chunks}) == 3
+
+    def test_ids_survive_reordering(self):
+        chunks = [Chunk(f"text {i}", dict(META), "h") for i in range(5)]
+        before = {c.text: c.chunk_id for c in assign_chunk_ids(chunks)}
+        after = {c.text: c.chunk_id for c in assign_chunk_ids(list(reversed(chunks)))}
+        assert before == after
+
+
+class TestIdMappedStore:
+    """FAISS results come back as chunk ids and are mapped to metadata rows."""
+
+    def test_search_maps_ids_to_rows(self, tmp_path, load_engine):
+        engine = load_engine(write_store(tmp_path, CHUNKS))
+        assert isinstance(engine.index, faiss.IndexIDMap)
+
+        results = engine.search("theft", k=1, hybrid_weight=0.0)
+        assert results[0]["chunk"]["chunk_id"] == CHUNKS[2]["chunk_id"]
+        assert results[0]["semantic"] == pytest.approx(1.0)
+
+    def test_results_do_not_depend_on_row_order(self, tmp_path, load_engine):
+        ordered = load_engine(write_store(tmp_path / "a", CHUNKS))
+        shuffled = load_engine(write_store(tmp_path / "b", [CHUNKS[2], CHUNKS[0], CHUNKS[1]]))
+        for query in ("theft", "medical victim", "zero fir"):
+            top = ordered.search(query, k=1)[0]
+            assert shuffled.search(query, k=1)[0]["chunk"]["chunk_id"] == top["chunk"]["chunk_id"]
+
+    def test_filters_select_by_id(self, tmp_path, load_engine):
+        engine = load_engine(write_store(tmp_path, CHUNKS))
+        results = engine.search("theft", k=3, filters={"law": "BNSS"})
+        assert {r["chunk"]["metadata"]["section"] for r in results} == {"173", "184"}
+
+    def test_store_without_id_map(self, tmp_path, load_engine):
+        engine = load_engine(write_store(tmp_path, CHUNKS, id_mapped=False))
+        assert list(engine.faiss_ids) == [0, 1, 2]
+        assert engine.search("theft", k=1)[0]["chunk"]["metadata"]["section"] == "303"
+
+    def test_unknown_ids_map_to_no_row(self, tmp_path, load_engine):
+        engine = load_engine(write_store(tmp_path, CHUNKS))
+        ids = np.array([engine.faiss_ids[1], -1, 12345])
+        assert engine.rows_for_ids(ids).tolist() == [1, -1, -1]
+
+    def test_chunk_by_id(self, tmp_path, load_engine):
+        engine = load_engine(write_store(tmp_path, CHUNKS))
+        assert engine.chunk_by_id(CHUNKS[1]["chunk_id"])["metadata"]["section"] == "184"
+        assert engine.chunk_by_id("BNS/s999:000000000000") is None
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,117 @@
+"""
+Tests for the store build's corpus encoder (length buckets, core plans, cache checkpoints).
+
+Run with: pytest tests/test_corpus_encoder.py -v
+"""
+
+import numpy as np
+import pytest
+
+from src.retrieval.corpus_encoder import (CorpusEncoder, encode_corpus, length_batches, partition_cores,
+                                          plan_workers)
+from src.retrieval.embedding_cache import EmbeddingCache, text_hash
+
+
+class LengthModel:
+    """Embeds a text as [len, 1]; records the batches it was given."""
+
+    def __init__(self, fail_after=None):
+        self.calls = []
+        self.fail_after = fail_after
+
+    def encode(self, texts, convert_to_numpy=True, batch_size=32, show_progress_bar=False):
+        if self.fail_after is not None and len(self.calls) >= self.fail_after:
+            raise KeyboardInterrupt
+        self.calls.append(list(texts))
+        return np.array([[len(t), 1.0] for t in texts], dtype=np.float32)
+
+
+def length_model(model_name):
+    return LengthModel()
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = EmbeddingCache(str(tmp_path / "embeddings.sqlite3"))
+    yield cache
+    cache.close()
+
+
+def local_encoder(model, batch_size=2):
+    return CorpusEncoder("model-a", [[0]], batch_size, loader=lambda name: model)
+
+
+class TestPlanning:
+    """Batches hold texts of similar length; workers get disjoint cores on one socket."""
+
+    def test_length_batches(self):
+        items = [(str(i), "x" * n) for i, n in enumerate([3, 50, 1, 40, 2])]
+        batches = length_batches(items, 2)
+        assert [[len(t) for _, t in batch] for batch in batches] == [[50, 40], [3, 2], [1]]
+
+    def test_partition_groups_cores_by_socket(self):
+        interleaved = lambda core: core % 2  # noqa: E731 - even cores on socket 0, odd on socket 1
+        assert partition_cores(range(8), 2, interleaved) == [[0, 2, 4, 6], [1, 3, 5, 7]]
+        assert partition_cores(range(5), 2, lambda core: 0) == [[0, 1, 2], [3, 4]]
+        assert partition_cores([0], 4, lambda core: 0) == [[0]]
+
+    def test_plan_workers(self):
+        assert len(plan_workers(0, 0, cores=range(16))) == 4
+        assert plan_workers(0, 8, cores=range(16))[1] == [8, 9, 10, 11, 12, 13, 14, 15]
+        assert [len(s) for s in plan_workers(3, 2, cores=range(12))] == [2, 2, 2]
+        assert plan_workers(0, 0, cores=[0]) == [[0]]
+
+
+class TestEncodeCorpus:
+    """Only uncached texts are encoded, and every finished batch is already in the cache."""
+
+    def test_encodes_sorted_batches_into_the_cache(self, cache):
+        model = LengthModel()
+        texts = ["bb", "a", "dddd", "ccc", "a"]
+        stats = encode_corpus(texts, cache, local_encoder(model))
+
+        assert model.calls == [["dddd", "ccc"], ["bb", "a"]]
+        assert (stats.total, stats.encoded, stats.cached) == (5, 4, 1)
+        vector = cache.get_many("model-a", [text_hash("ccc")])[text_hash("ccc")]
+        assert np.allclose(vector, np.array([3, 1]) / np.sqrt(10))
+
+    def test_second_run_encodes_nothing(self, cache):
+        encode_corpus(["one", "two"], cache, local_encoder(LengthModel()))
+        model = LengthModel()
+        stats = encode_corpus(["one", "two", "three"], cache, local_encoder(model))
+        assert model.calls == [["three"]]
+        assert stats.cached == 2
+
+    def test_interrupted_run_resumes(self, cache):
+        texts = [f"text {i:02d}" for i in range(10)]
+        with pytest.raises(KeyboardInterrupt):
+            encode_corpus(texts, cache, local_encoder(LengthModel(fail_after=3)))
+        assert cache.count("model-a") == 6
+
+        model = LengthModel()
+        stats = encode_corpus(texts, cache, local_encoder(model))
+        assert stats.encoded == 4
+        assert cache.count("model-a") == 10
+
+    def test_windows_bound_what_is_held(self, cache):
+        model = LengthModel()
+        encode_corpus(["a", "bbb", "cc", "dddd"], cache, local_encoder(model), window=2)
+        assert model.calls == [["bbb", "a"], ["dddd", "cc"]]
+
+    def test_process_pool_matches_local(self, tmp_path, cache):
+        texts = [f"{'word ' * (i % 7)}chunk {i}" for i in range(40)]
+        encode_corpus(texts, cache, local_encoder(LengthModel(), batch_size=4))
+
+        pooled = EmbeddingCache(str(tmp_path / "pooled.sqlite3"))
+        with CorpusEncoder("model-a", [[0], [0]], 4, loader=length_model, pin=False) as encoder:
+            stats = encode_corpus(texts, pooled, encoder)
+        hashes = [text_hash(t) for t in texts]
+        local, remote = cache.get_many("model-a", hashes), pooled.get_many("model-a", hashes)
+        pooled.close()
+
+        assert stats.encoded == 40
+        assert all(np.array_equal(local[h], remote[h]) for h in hashes)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,102 @@
+"""
+Tests for micro-batching of query embeddings across concurrent requests.
+
+Run with: pytest tests/test_embedding_batcher.py -v
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from src.retrieval.embedding_batcher import EmbeddingBatcher
+
+
+class FakeModel:
+    """Embeds a text as [len(text), position-independent hash]; records every encode call."""
+
+    def __init__(self, delay: float = 0.0, fail: bool = False):
+        self.delay = delay
+        self.fail = fail
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def encode(self, texts, convert_to_numpy=True, batch_size=32, show_progress_bar=None):
+        with self.lock:
+            self.calls.append(list(texts))
+        time.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("model exploded")
+        return np.array([[len(t), sum(map(ord, t)) % 97] for t in texts], dtype=np.float32).reshape(-1, 2)
+
+
+def expected(texts):
+    return FakeModel().encode(texts)
+
+
+class TestEmbeddingBatcher:
+    """Queued texts are encoded together and each caller gets its own rows."""
+
+    def test_single_request(self):
+        batcher = EmbeddingBatcher(FakeModel(), max_wait_ms=0)
+        vectors = batcher.encode(["zero fir", "bail"])
+        assert np.array_equal(vectors, expected(["zero fir", "bail"]))
+
+    def test_concurrent_requests_share_encode_calls(self):
+        model = FakeModel(delay=0.02)
+        batcher = EmbeddingBatcher(model, max_batch=64, max_wait_ms=20)
+        queries = [f"query number {i}" for i in range(16)]
+
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            results = list(pool.map(lambda q: batcher.encode([q]), queries))
+
+        for query, vectors in zip(queries, results):
+            assert np.array_equal(vectors, expected([query]))
+        assert len(model.calls) < len(queries)
+        assert sorted(t for call in model.calls for t in call) == sorted(queries)
+
+    def test_lone_client_does_not_wait(self):
+        batcher = EmbeddingBatcher(FakeModel(), max_wait_ms=500)
+        started = time.monotonic()
+        for i in range(3):
+            batcher.encode([f"q{i}"])
+        assert time.monotonic() - started < 0.5
+
+    def test_max_batch_limits_collection(self):
+        model = FakeModel(delay=0.05)
+        batcher = EmbeddingBatcher(model, max_batch=4, max_wait_ms=50)
+
+        with ThreadPoolExecutor(max_workers=12) as pool:
+            list(pool.map(lambda i: batcher.encode([f"q{i}"]), range(12)))
+
+        assert all(len(call) <= 4 for call in model.calls)
+
+    def test_error_reaches_every_caller(self):
+        batcher = EmbeddingBatcher(FakeModel(fail=True), max_wait_ms=0)
+        with pytest.raises(RuntimeError, match="model exploded"):
+            batcher.encode(["theft"])
+        # The worker survives a failed batch
+        batcher.model = FakeModel()
+        assert np.array_equal(batcher.encode(["theft"]), expected(["theft"]))
+
+    def test_idle_worker_exits_and_restarts(self):
+        batcher = EmbeddingBatcher(FakeModel(), max_wait_ms=0, idle_seconds=0.05)
+        batcher.encode(["first"])
+        deadline = time.monotonic() + 2
+        while batcher._thread is not None and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert batcher._thread is None
+
+        assert np.array_equal(batcher.encode(["second"]), expected(["second"]))
+
+    def test_empty_input(self):
+        model = FakeModel()
+        batcher = EmbeddingBatcher(model)
+        assert batcher.encode([]).shape[0] == 0
+        assert batcher._thread is None
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
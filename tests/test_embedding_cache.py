@@ -0,0 +1,54 @@
+"""
+Tests for the persistent chunk embedding cache.
+
+Run with: pytest tests/test_embedding_cache.py -v
+"""
+
+import numpy as np
+import pytest
+
+from src.retrieval.embedding_cache import EmbeddingCache, text_hash
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = EmbeddingCache(str(tmp_path / "embeddings.sqlite3"))
+    yield cache
+    cache.close()
+
+
+class TestEmbeddingCache:
+    """Vectors are keyed by model name and chunk-text hash."""
+
+    def test_roundtrip(self, cache):
+        vectors = {text_hash("zero fir"): np.array([0.6, 0.8], dtype=np.float32)}
+        cache.put_many("model-a", vectors)
+
+        found = cache.get_many("model-a", [text_hash("zero fir"), text_hash("missing")])
+        assert list(found) == [text_hash("zero fir")]
+        assert np.array_equal(found[text_hash("zero fir")], vectors[text_hash("zero fir")])
+
+    def test_models_do_not_share_entries(self, cache):
+        cache.put_many("model-a", {text_hash("bail"): np.ones(3, dtype=np.float32)})
+        assert cache.get_many("model-b", [text_hash("bail")]) == {}
+        assert cache.count("model-a") == 1
+
+    def test_missing_lists_uncached_hashes_in_order(self, cache):
+        cache.put_many("model-a", {text_hash("bail"): np.ones(3, dtype=np.float32)})
+        hashes = [text_hash("fir"), text_hash("bail"), text_hash("fir"), text_hash("arrest")]
+        assert cache.missing("model-a", hashes) == [text_hash("fir"), text_hash("arrest")]
+
+    def test_persists_and_handles_large_lookups(self, cache, tmp_path):
+        vectors = {text_hash(f"chunk {i}"): np.full(4, i, dtype=np.float32) for i in range(1200)}
+        cache.put_many("model-a", vectors)
+        cache.close()
+
+        reopened = EmbeddingCache(str(tmp_path / "embeddings.sqlite3"))
+        found = reopened.get_many("model-a", list(vectors))
+        assert len(found) == 1200
+        assert found[text_hash("chunk 7")][0] == 7
+        reopened.close()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,214 @@
+"""
+Tests for the versioned store layout and zero-downtime engine reloads.
+
+Run with: pytest tests/test_engine_manager.py -v
+"""
+
+from pathlib import Path
+
+import pytest
+from src.retrieval.store import (
+    STORE_FILES,
+    new_version_dir,
+    prune_versions,
+    publish_version,
+    resolve_store_dir,
+)
+from src.server.engine_manager import EngineManager, EngineUnavailable, ReloadInProgress
+
+
+def write_store(store_dir: Path, marker: str = "v1"):
+    store_dir.mkdir(parents=True, exist_ok=True)
+    for name in STORE_FILES:
+        (store_dir / name).write_text(marker, encoding="utf-8")
+
+
+class FakeOrchestrator:
+    def __init__(self, results):
+        self.results = results
+
+    def search(self, query, k=5, **kwargs):
+        return self.results[:k]
+
+
+class FakeEngine:
+    def __init__(self, store_dir, results=("hit",), defer_semantic=False):
+        self.store_dir = store_dir
+        self.orchestrator = FakeOrchestrator(list(results))
+        self.retrieval_mode = "lexical" if defer_semantic else "hybrid"
+        self.components = {}
+
+    def load_semantic(self):
+        self.retrieval_mode = "hybrid"
+
+
+class TestVersionedStore:
+    """Test CURRENT-based store resolution and publishing."""
+
+    def test_flat_layout_resolves_to_root(self, tmp_path):
+        write_store(tmp_path)
+        assert resolve_store_dir(tmp_path) == tmp_path
+
+    def test_publish_switches_current(self, tmp_path):
+        first = new_version_dir(tmp_path)
+        write_store(first)
+        publish_version(tmp_path, first)
+        assert resolve_store_dir(tmp_path) == first
+
+        second = new_version_dir(tmp_path)
+        write_store(second, "v2")
+        assert second != first
+        publish_version(tmp_path, second)
+        assert resolve_store_dir(tmp_path) == second
+        assert not (tmp_path / ".CURRENT.tmp").exists()
+
+    def test_prune_keeps_current(self, tmp_path):
+        versions = []
+        for _ in range(4):
+            version = new_version_dir(tmp_path)
+            write_store(version)
+            versions.append(version)
+        publish_version(tmp_path, versions[0])
+
+        removed = prune_versions(tmp_path, keep=1)
+        assert versions[0].exists()
+        assert versions[-1].exists()
+        assert sorted(removed) == sorted(v.name for v in versions[1:3])
+
+
+class TestEngineManager:
+    """Test loading, leasing and swapping engines."""
+
+    @pytest.fixture
+    def store(self, tmp_path):
+        version = new_version_dir(tmp_path)
+        write_store(version)
+        publish_version(tmp_path, version)
+        return tmp_path
+
+    def publish_new(self, root: Path, marker: str = "v2") -> Path:
+        version = new_version_dir(root)
+        write_store(version, marker)
+        publish_version(root, version)
+        return version
+
+    def test_acquire_before_load_is_unavailable(self, store):
+        manager = EngineManager(store, factory=FakeEngine)
+        with pytest.raises(EngineUnavailable):
+            manager.acquire()
+
+    def test_load_failure_is_recorded(self, store):
+        def broken(store_dir, **kwargs):
+            raise RuntimeError("index missing")
+
+        manager = EngineManager(store, factory=broken)
+        manager.load()
+        assert manager.status == "error"
+        assert "index missing" in manager.error
+        with pytest.raises(EngineUnavailable, match="index missing"):
+            manager.acquire()
+
+    def test_initial_load_serves_lexical_then_hybrid(self, store):
+        modes = []
+
+        class RecordingEngine(FakeEngine):
+            def load_semantic(self):
+                # The engine is already being served while the semantic phase loads
+                modes.append(manager.acquire().engine.retrieval_mode)
+                super().load_semantic()
+
+        manager = EngineManager(store, factory=RecordingEngine)
+        manager.load()
+        assert modes == ["lexical"]
+        assert manager.describe()["retrieval_mode"] == "hybrid"
+
+    def test_semantic_failure_stays_lexical(self, store):
+        class NoModelEngine(FakeEngine):
+            def load_semantic(self):
+                raise OSError("model download failed")
+
+        manager = EngineManager(store, factory=NoModelEngine)
+        manager.load()
+        assert manager.status == "ready"
+        assert manager.describe()["retrieval_mode"] == "lexical"
+
+    def test_reload_swaps_to_new_version(self, store):
+        manager = EngineManager(store, factory=FakeEngine)
+        manager.load()
+        old_engine = manager.engine
+        new_dir = self.publish_new(store)
+
+        result = manager.reload("test")
+        assert result["status"] == "ok"
+        assert manager.engine is not old_engine
+        assert manager.engine.store_dir == str(new_dir)
+        assert manager.describe()["store_version"] == result["store_version"]
+
+    def test_in_flight_request_finishes_on_old_engine(self, store):
+        manager = EngineManager(store, factory=FakeEngine)
+        manager.load()
+        self.publish_new(store)
+
+        handle = manager.acquire()
+        old_engine = handle.engine
+        manager.reload("test")
+
+        # The lease still sees the old engine until it is released
+        assert handle.engine is old_engine
+        assert manager.describe()["draining_engines"] == 1
+        manager.release(handle)
+        assert handle.engine is None
+        assert manager.describe()["draining_engines"] == 0
+
+    def test_failed_canary_keeps_old_engine(self, store):
+        built = []
+
+        def factory(store_dir, **kwargs):
+            built.append(store_dir)
+            return FakeEngine(store_dir, results=() if len(built) > 1 else ("hit",), **kwargs)
+
+        manager = EngineManager(store, factory=factory)
+        manager.load()
+        old_engine = manager.engine
+        self.publish_new(store)
+
+        result = manager.reload("test")
+        assert result["status"] == "failed"
+        assert "Canary" in result["error"]
+        assert manager.engine is old_engine
+
+    def test_concurrent_reload_is_rejected(self, store):
+        manager = EngineManager(store, factory=FakeEngine)
+        manager.load()
+        manager._reload_lock.acquire()
+        try:
+            with pytest.raises(ReloadInProgress):
+                manager.reload("test")
+        finally:
+            manager._reload_lock.release()
+
+    def test_swap_callbacks_run(self, store):
+        calls = []
+        manager = EngineManager(store, factory=FakeEngine)
+        manager.on_swap.append(lambda: calls.append(1))
+        manager.load()
+        self.publish_new(store)
+        manager.reload("test")
+        assert calls == [1]
+
+    def test_watch_reloads_after_stable_change(self, store):
+        manager = EngineManager(store, factory=FakeEngine)
+        manager.load()
+        assert manager.check_for_update() is None
+
+        new_dir = self.publish_new(store)
+        # First poll only notes the change; the second (unchanged) poll reloads
+        assert manager.check_for_update() is None
+        result = manager.check_for_update()
+        assert result and result["status"] == "ok"
+        assert manager.engine.store_dir == str(new_dir)
+        assert manager.check_for_update() is None
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,45 @@
+"""
+Tests for lazy heavy imports and the import-time profile script.
+
+Run with: pytest tests/test_import_profile.py -v
+"""
+
+import pytest
+from benchmarks.import_profile import LAZY_MODULES, check_budgets, parse_importtime, profile_import
+
+SAMPLE = """import time: self [us] | cumulative | imported package
+import time:       120 |        120 |   _io
+import time:       800 |       1500 | encodings
+import time:      2000 |       5000 |     fastapi.routing
+import time:       300 |       6000 | src.server.app
+"""
+
+
+class TestParseImporttime:
+    """Test parsing of `-X importtime` output."""
+
+    def test_rows_and_depth(self):
+        rows = parse_importtime(SAMPLE)
+        assert [r["module"] for r in rows] == ["_io", "encodings", "fastapi.routing", "src.server.app"]
+        assert [r["depth"] for r in rows] == [1, 0, 2, 0]
+        assert rows[3]["cumulative_us"] == 6000
+
+    def test_budget_failures(self):
+        profile = {"total_ms": 2000.0, "rss_mb": 80.0, "eager_heavy_modules": ["torch"]}
+        failures = check_budgets(profile, max_ms=1500, max_rss_mb=200)
+        assert len(failures) == 2
+        assert check_budgets({**profile, "total_ms": 100.0, "eager_heavy_modules": []}, 1500, 200) == []
+
+
+class TestLazyImports:
+    """Importing the server or the engine must not pull in the heavy libraries."""
+
+    @pytest.mark.parametrize("module", ["src.server.app", "src.retrieval.engine"])
+    def test_no_heavy_modules_at_import(self, module):
+        profile = profile_import(module)
+        assert profile["eager_heavy_modules"] == [], f"{module} imports {profile['eager_heavy_modules']}"
+        assert LAZY_MODULES
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,247 @@
+"""
+Tests for manifest-driven (parallel, incremental) ingestion and the line scanner.
+
+Run with: pytest tests/test_ingestion.py -v
+"""
+
+import hashlib
+import json
+from dataclasses import asdict
+from pathlib import Path
+
+import pytest
+
+from ingest_legal_docs import (ParserContext, StatefulParser, expand_manifest, ingest_documents, load_manifest,
+                               load_previous_run, main, parse_document, parse_documents, write_debug_chunks)
+from src.retrieval.chunk_stream import iter_chunks
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+DOCS_DIR = REPO_ROOT / "documents"
+MANIFEST = REPO_ROOT / "ingest_manifest.json"
+
+# Output of the baseline (pre-scanner) parser over documents/, from the legal_chunks.json and
+# debug_chunks.txt it produced. Only text, metadata and canonical_header are hashed, so fields
+# added later (chunk_id, source spans) don't move the pin; regenerated files in the tree can't either.
+BASELINE_CHUNK_COUNT = 2620
+BASELINE_CHUNKS_SHA256 = "5ba076f8360509f4f1a7bbc2fad10ed5f1795dcadbb34ee84155492d8ff9b5da"
+BASELINE_DEBUG_SHA256 = "6eb802be80e7b0b52244942f363e5c462a0c4f3ecc4a2f3b6ce026dfc13ad0fc"
+
+
+def write_manifest(path: Path, sources) -> str:
+    path.write_text(json.dumps({"sources": sources}), encoding="utf-8")
+    return str(path)
+
+
+@pytest.fixture
+def docs(tmp_path):
+    statute = tmp_path / "docs" / "ACT"
+    statute.mkdir(parents=True)
+    (statute / "b_chapter.md").write_text("## Section 2 — Second\n\nText two.\n", encoding="utf-8")
+    (statute / "a_chapter.md").write_text("## Section 1 — First\n\nText one.\n", encoding="utf-8")
+    (statute / "notes.txt").write_text("ignored", encoding="utf-8")
+    (tmp_path / "docs" / "sop.md").write_text("## **SOP ON TESTING**\n\nDo the thing.\n", encoding="utf-8")
+    return tmp_path / "docs"
+
+
+class TestManifest:
+    """The manifest decides which files are parsed, in which order and with which context."""
+
+    def test_expand_order_and_context(self, docs, tmp_path):
+        manifest = write_manifest(tmp_path / "m.json", [
+            {"path": "sop.md", "context": {"law": "SOP", "doc_type": "sop"}},
+            {"path": "ACT", "context": {"law": "ACT", "year": 2024}},
+            {"path": "missing.md", "context": {}},
+        ])
+        jobs = expand_manifest(load_manifest(manifest), str(docs))
+
+        assert [Path(p).name for p, _ in jobs] == ["sop.md", "a_chapter.md", "b_chapter.md"]
+        assert jobs[1][1] == {"law": "ACT", "year": 2024}
+
+    def test_invalid_entry(self, tmp_path):
+        manifest = write_manifest(tmp_path / "m.json", [{"context": {"law": "X"}}])
+        with pytest.raises(ValueError):
+            load_manifest(manifest)
+
+    def test_context_overrides_reach_chunks(self, docs, tmp_path):
+        manifest = write_manifest(tmp_path / "m.json", [{"path": "ACT", "context": {"law": "ACT", "law_name": "Test Act"}}])
+        chunks = parse_documents(expand_manifest(load_manifest(manifest), str(docs)))
+
+        assert [c.metadata["section"] for c in chunks] == ["1", "2"]
+        assert all(c.metadata["law"] == "ACT" for c in chunks)
+        assert chunks[0].canonical_header.startswith("Test Act")
+
+
+@pytest.mark.skipif(not DOCS_DIR.exists(), reason="source documents not available")
+class TestParallelIngestion:
+    """Parsing in a process pool gives exactly the serial result."""
+
+    def test_parallel_matches_serial(self):
+        jobs = expand_manifest(load_manifest(str(MANIFEST)), str(DOCS_DIR))
+        serial = [asdict(c) for c in parse_documents(jobs, workers=1)]
+        parallel = [asdict(c) for c in parse_documents(jobs, workers=3)]
+
+        assert len(serial) > 0
+        assert parallel == serial
+
+
+class TestIncrementalIngestion:
+    """Only files whose content or context changed are parsed again."""
+
+    def run(self, docs, tmp_path, manifest_sources):
+        manifest = write_manifest(tmp_path / "m.json", manifest_sources)
+        jobs = expand_manifest(load_manifest(manifest), str(docs))
+        state_path, chunks_path = tmp_path / "state.json", tmp_path / "chunks.jsonl"
+        previous = load_previous_run(str(state_path), str(chunks_path))
+        state, parsed = ingest_documents(jobs, str(docs), str(chunks_path), previous=previous)
+
+        state_path.write_text(json.dumps(state), encoding="utf-8")
+        return list(iter_chunks(chunks_path)), state, parsed, jobs
+
+    def test_reparses_only_changed_files(self, docs, tmp_path):
+        sources = [{"path": "ACT", "context": {"law": "ACT"}}, {"path": "sop.md", "context": {"law": "SOP"}}]
+        _, state, parsed, _ = self.run(docs, tmp_path, sources)
+        assert parsed == 3
+        assert len(state["chunk_sha256"]) == 3
+
+        _, _, parsed, _ = self.run(docs, tmp_path, sources)
+        assert parsed == 0
+
+        (docs / "ACT" / "b_chapter.md").write_text("## Section 2 — Second\n\nAmended text.\n", encoding="utf-8")
+        chunks, _, parsed, jobs = self.run(docs, tmp_path, sources)
+        assert parsed == 1
+        assert chunks == [asdict(c) for c in parse_documents(jobs, docs_dir=str(docs))]
+        assert "Amended text." in chunks[1]["text"]
+
+    def test_context_change_reparses(self, docs, tmp_path):
+        self.run(docs, tmp_path, [{"path": "ACT", "context": {"law": "ACT"}}])
+        chunks, _, parsed, _ = self.run(docs, tmp_path, [{"path": "ACT", "context": {"law": "ACT", "year": 2025}}])
+        assert parsed == 2
+        assert all(c["metadata"]["year"] == 2025 for c in chunks)
+
+    def test_edited_output_invalidates_state(self, docs, tmp_path):
+        self.run(docs, tmp_path, [{"path": "ACT", "context": {"law": "ACT"}}])
+        (tmp_path / "chunks.jsonl").write_text("", encoding="utf-8")
+        assert load_previous_run(str(tmp_path / "state.json"), str(tmp_path / "chunks.jsonl")) is None
+
+
+class TestStreamingOutput:
+    """Chunks are written to JSONL as files are parsed; the debug dump only on request."""
+
+    def test_main_writes_jsonl_and_no_dump_by_default(self, docs, tmp_path, monkeypatch):
+        manifest = write_manifest(tmp_path / "m.json", [{"path": "ACT", "context": {"law": "ACT"}}])
+        monkeypatch.chdir(tmp_path)
+        main(["--docs-dir", str(docs), "--manifest", manifest, "--workers", "1"])
+
+        lines = (tmp_path / "legal_chunks.jsonl").read_text(encoding="utf-8").splitlines()
+        assert [json.loads(line)["metadata"]["section"] for line in lines] == ["1", "2"]
+        assert not (tmp_path / "debug_chunks.txt").exists()
+        assert not list(tmp_path.glob(".*.tmp"))
+
+        main(["--docs-dir", str(docs), "--manifest", manifest, "--workers", "1", "--debug-dump"])
+        assert (tmp_path / "debug_chunks.txt").read_text(encoding="utf-8").count("--- CHUNK") == 2
+
+    def test_reads_legacy_json_array(self, tmp_path):
+        (tmp_path / "chunks.json").write_text(json.dumps([{"text": "a"}, {"text": "b"}]), encoding="utf-8")
+        assert [c["text"] for c in iter_chunks(tmp_path / "chunks.json")] == ["a", "b"]
+
+    def test_failed_run_keeps_previous_output(self, docs, tmp_path):
+        chunks_path = tmp_path / "chunks.jsonl"
+        jobs = expand_manifest([{"path": "ACT", "context": {"law": "ACT"}}], str(docs))
+        ingest_documents(jobs, str(docs), str(chunks_path))
+        before = chunks_path.read_bytes()
+
+        with pytest.raises(FileNotFoundError):
+            ingest_documents(jobs + [(str(docs / "gone.md"), {})], str(docs), str(chunks_path))
+        assert chunks_path.read_bytes() == before
+
+
+def parse_lines(lines, **context):
+    parser = StatefulParser()
+    parser.context = ParserContext(source_file="test.md", **context)
+    for line in lines:
+        parser.parse_line(line + "\n")
+    parser.flush_buffer()
+    return parser
+
+
+class TestLineScanner:
+    """State transitions of the dispatch scanner, including the precedence between rules."""
+
+    def test_headings(self):
+        parser = parse_lines([
+            "# PART II", "## CHAPTER III", "## GENERAL EXCEPTIONS", "## Section 14 — Act of a child", "**(1)** Nothing is an offence.",
+        ], law="BNS")
+        ctx = parser.context
+        assert (ctx.part, ctx.chapter, ctx.chapter_title) == ("PART II", "CHAPTER III", "GENERAL EXCEPTIONS")
+        assert (ctx.section, ctx.section_title, ctx.sub_section) == ("14", "Act of a child", "1")
+        assert parser.chunks[0].metadata["unit_type"] == "sub_section"
+
+    def test_numbered_heading_is_a_clause_only_in_nalsa(self):
+        assert parse_lines(["## 2. DEFINITIONS"], law="NALSA").context.clause == "2"
+
+        other = parse_lines(["## CHAPTER I", "## 2. DEFINITIONS"], law="BNS")
+        assert other.context.clause is None
+        assert other.context.chapter_title is None  # nor a chapter title
+        assert other.chunks[0].text.endswith("## 2. DEFINITIONS")
+
+    def test_chapter_title_needs_a_chapter(self):
+        parser = parse_lines(["## GENERAL EXCEPTIONS"], law="BNS")
+        assert parser.context.chapter_title is None
+        assert len(parser.chunks) == 1
+
+    def test_sop_steps_and_topics(self):
+        ctx = parse_lines(["## **SOP ON RAPE**", "**01. FIR — Suggested timeline**"], law="SOP").context
+        assert (ctx.chapter_title, ctx.step, ctx.section_title, ctx.mode) == ("SOP ON RAPE", "Step 01", "FIR", "step")
+        assert parse_lines(["**Step 3:**"], law="SOP").context.step == "Step 3"
+
+    def test_modes_and_tables(self):
+        parser = parse_lines(["Illustrations.", "A does B.", "| Loss of life | 5 lakh |"], law="NALSA")
+        assert [c.metadata["unit_type"] for c in parser.chunks] == ["illustration", "table_row"]
+        assert parse_lines(["*Explanation 1.— text"], law="BNS").context.mode == "explanation"
+
+
+class TestSourceSpans:
+    """Every chunk records the byte and line range of its text in the source file."""
+
+    def test_spans_slice_the_source(self, tmp_path):
+        source = tmp_path / "docs" / "act.md"
+        source.parent.mkdir()
+        source.write_bytes("## Section 1 — Première\r\n\r\n  Text one,\r\ncontinued.  \r\n\r\n**(2)** Second.\r\n".encode("utf-8"))
+        chunks = parse_document((str(source), {"law": "ACT"}), docs_dir=str(tmp_path / "docs"))
+
+        data = source.read_bytes()
+        first, second = (c.source for c in chunks)
+        assert first == {"path": "act.md", "start": data.index(b"Text one"), "end": data.index(b"  \r\n\r\n**"),
+                         "line_start": 3, "line_end": 4}
+        assert data[second["start"]:second["end"]] == b"**(2)** Second."
+        assert (second["line_start"], second["line_end"]) == (6, 6)
+        assert "\r" not in chunks[0].text
+
+    def test_lines_fed_directly_have_no_span(self):
+        assert parse_lines(["Some text."], law="BNS").chunks[0].source == {}
+
+
+def baseline_stream_sha256(chunks) -> str:
+    digest = hashlib.sha256()
+    for chunk in chunks:
+        row = [chunk.text, chunk.metadata, chunk.canonical_header]
+        digest.update(json.dumps(row, ensure_ascii=False, sort_keys=True).encode("utf-8") + b"\n")
+    return digest.hexdigest()
+
+
+@pytest.mark.skipif(not (DOCS_DIR.exists() and MANIFEST.exists()), reason="source documents not available")
+class TestGoldenOutput:
+    """The parser reproduces the baseline parser's chunks and debug dump byte for byte."""
+
+    def test_matches_baseline_output(self, tmp_path):
+        jobs = expand_manifest(load_manifest(str(MANIFEST)), str(DOCS_DIR))
+        chunks = parse_documents(jobs, docs_dir=str(DOCS_DIR))
+
+        assert len(chunks) == BASELINE_CHUNK_COUNT
+        assert baseline_stream_sha256(chunks) == BASELINE_CHUNKS_SHA256
+
+        write_debug_chunks(chunks, str(tmp_path / "debug_chunks.txt"))
+        assert hashlib.sha256((tmp_path / "debug_chunks.txt").read_bytes()).hexdigest() == BASELINE_DEBUG_SHA256
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
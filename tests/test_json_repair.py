@@ -0,0 +1,108 @@
+"""
+Tests for tolerant JSON extraction and repair of LLM output.
+
+Run with: pytest tests/test_json_repair.py -v
+"""
+
+import pytest
+from pydantic import ValidationError
+
+from src.retrieval.classifier import QueryIntent
+from src.retrieval.json_repair import extract_json_block, parse_model_json, repair_json
+from src.retrieval.metrics import metrics
+from src.retrieval.responder import DEFAULT_DISCLAIMER, LegalResponse
+
+
+class TestExtractJsonBlock:
+    """Test balanced-brace extraction."""
+
+    def test_prose_preamble(self):
+        """Should skip text before the object."""
+        text = 'Sure! Here is the classification:\n{"category": "procedure"}\nHope this helps.'
+        assert extract_json_block(text) == '{"category": "procedure"}'
+
+    def test_braces_inside_strings(self):
+        """Braces inside strings must not close the object."""
+        text = '{"answer": "Use {curly} braces", "n": 1} trailing'
+        assert extract_json_block(text) == '{"answer": "Use {curly} braces", "n": 1}'
+
+    def test_truncated_object(self):
+        """An unclosed object is returned up to the end of the text."""
+        assert extract_json_block('```json\n{"a": [1, 2') == '{"a": [1, 2'
+
+    def test_no_object(self):
+        """Should return None when there is no object at all."""
+        assert extract_json_block("I cannot help with that.") is None
+
+
+class TestRepairJson:
+    """Test repair of malformed objects."""
+
+    def test_trailing_commas(self):
+        """Trailing commas in objects and arrays are dropped."""
+        assert repair_json('{"a": [1, 2,], "b": 3,}') == {"a": [1, 2], "b": 3}
+
+    def test_truncated_string(self):
+        """An open string and its brackets are closed."""
+        assert repair_json('{"answer": "File an FIR at the near') == {"answer": "File an FIR at the near"}
+
+    def test_dangling_key(self):
+        """An incomplete last member is cut back to the previous one."""
+        assert repair_json('{"a": 1, "b": [1, 2], "c":') == {"a": 1, "b": [1, 2]}
+
+    def test_half_written_literal(self):
+        """A half-written literal is cut back too."""
+        assert repair_json('{"a": "x", "b": tru') == {"a": "x"}
+
+
+class TestParseModelJson:
+    """Test validation into the pipeline's models."""
+
+    def test_fenced_json_is_not_a_repair(self):
+        """Well-formed fenced JSON takes the strict path."""
+        before = metrics.get("llm.json_repair.retries_avoided")
+        text = '```json\n{"category": "procedure", "user_context": "informational", "confidence": 0.9}\n```'
+
+        intent = parse_model_json(text, QueryIntent)
+
+        assert intent.category == "procedure"
+        assert metrics.get("llm.json_repair.retries_avoided") == before
+
+    def test_truncated_intent_uses_fallbacks(self):
+        """Missing optional fields are defaulted and the repair is counted."""
+        before = metrics.get("llm.json_repair.retries_avoided")
+        text = 'Here you go: {"category": "procedure", "user_context": "victim_distress", "key_entities": ["FIR", "rob'
+
+        intent = parse_model_json(text, QueryIntent, fallbacks={"confidence": 0.5})
+
+        assert intent.user_context == "victim_distress"
+        assert intent.key_entities == ["FIR", "rob"]
+        assert intent.confidence == 0.5
+        assert metrics.get("llm.json_repair.retries_avoided") == before + 1
+
+    def test_truncated_response_keeps_required_fields(self):
+        """A response cut off after the required fields is still accepted."""
+        text = (
+            '{"answer": "**File an FIR** at any police station.", "legal_basis": "Section 173 BNSS",'
+            ' "procedure_steps": ["Go to the police station", "Ask for'
+        )
+
+        response = parse_model_json(text, LegalResponse, fallbacks={"sources": [], "disclaimer": DEFAULT_DISCLAIMER})
+
+        assert response.answer.startswith("**File an FIR**")
+        assert response.procedure_steps == ["Go to the police station", "Ask for"]
+        assert response.disclaimer == DEFAULT_DISCLAIMER
+
+    def test_missing_required_field_raises(self):
+        """Repair must not invent required fields."""
+        with pytest.raises(ValidationError):
+            parse_model_json('{"category": "procedure",', QueryIntent)
+
+    def test_not_json_raises(self):
+        """Plain prose cannot be repaired."""
+        with pytest.raises(ValueError):
+            parse_model_json("The model refused to answer.", QueryIntent)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
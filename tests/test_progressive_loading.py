@@ -0,0 +1,78 @@
+"""
+Tests for phased retrieval loading (BM25 first, semantic later).
+
+Run with: pytest tests/test_progressive_loading.py -v
+"""
+
+import json
+import pickle
+import sys
+import types
+
+import pytest
+from rank_bm25 import BM25Okapi
+from src.retrieval.retrieval_engine import RetrievalEngine
+
+CHUNKS = [
+    {"text": "Zero FIR may be registered at any police station", "metadata": {"law": "BNSS", "section": "173"}},
+    {"text": "Medical examination of the victim of rape", "metadata": {"law": "BNSS", "section": "184"}},
+    {"text": "Punishment for theft", "metadata": {"law": "BNS", "section": "303"}},
+]
+
+
+@pytest.fixture
+def store(tmp_path):
+    with open(tmp_path / "metadata.json", "w", encoding="utf-8") as f:
+        json.dump(CHUNKS, f)
+    with open(tmp_path / "bm25.pkl", "wb") as f:
+        pickle.dump(BM25Okapi([c["text"].lower().split() for c in CHUNKS]), f)
+    return tmp_path
+
+
+class TestLexicalPhase:
+    """Test searches served before the embedding model and FAISS are loaded."""
+
+    def test_deferred_engine_is_lexical(self, store):
+        engine = RetrievalEngine(str(store), defer_semantic=True)
+        assert engine.retrieval_mode == "lexical"
+        assert engine.components["metadata"]["status"] == "ready"
+        assert engine.components["bm25"]["status"] == "ready"
+        assert engine.components["bm25"]["seconds"] is not None
+        assert engine.components["embedding_model"]["status"] == "pending"
+        assert engine.components["faiss"]["status"] == "pending"
+
+    def test_lexical_search_ranks_by_bm25(self, store):
+        engine = RetrievalEngine(str(store), defer_semantic=True)
+        results = engine.search("theft punishment", k=2)
+        assert results[0]["chunk"]["metadata"]["section"] == "303"
+        assert results[0]["keyword"] == pytest.approx(1.0)
+        assert results[0]["semantic"] == 0.0
+
+    def test_lexical_search_skips_non_matching_chunks(self, store):
+        engine = RetrievalEngine(str(store), defer_semantic=True)
+        assert engine.search("bail bond", k=3) == []
+
+    def test_lexical_search_respects_filters(self, store):
+        engine = RetrievalEngine(str(store), defer_semantic=True)
+        results = engine.search("victim police station", k=3, filters={"law": "BNS"})
+        assert results == []
+        results = engine.search("victim police station", k=3, filters={"section": "184"})
+        assert [r["chunk"]["metadata"]["section"] for r in results] == ["184"]
+
+    def test_semantic_failure_is_recorded(self, store, monkeypatch):
+        # Stand-in model so no download is attempted; the store has no index.faiss
+        fake_st = types.ModuleType("sentence_transformers")
+        fake_st.SentenceTransformer = lambda name: object()
+        monkeypatch.setitem(sys.modules, "sentence_transformers", fake_st)
+
+        engine = RetrievalEngine(str(store), defer_semantic=True)
+        with pytest.raises(Exception):
+            engine.load_semantic()
+        assert engine.components["embedding_model"]["status"] == "ready"
+        assert engine.components["faiss"]["status"] == "error"
+        assert engine.retrieval_mode == "lexical"
+        assert engine.search("theft", k=1)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
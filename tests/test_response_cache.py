@@ -0,0 +1,149 @@
+"""
+Tests for the persistent response cache.
+
+Run with: pytest tests/test_response_cache.py -v
+"""
+
+import os
+import time
+
+import pytest
+from fastapi import HTTPException
+
+from src.retrieval.cache import ResponseCache, build_cache_key, normalize_query
+from src.server.app import require_admin
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ResponseCache(path=str(tmp_path / "responses.sqlite3"), ttl_seconds=60, max_entries=3)
+
+
+class TestCacheKey:
+    """Test query normalization and key construction."""
+
+    def test_normalize_query(self):
+        """Case, spacing and trailing punctuation should not matter."""
+        assert normalize_query("  What is  Zero FIR? ") == "what is zero fir"
+        assert normalize_query("what is zero fir") == "what is zero fir"
+
+    def test_chunk_order_does_not_matter(self):
+        """Keys use the sorted chunk ids."""
+        a = build_cache_key("q", ["BNSS 173", "SOP 1"], "gemma-3-4b-it", "v1")
+        b = build_cache_key("q", ["SOP 1", "BNSS 173"], "gemma-3-4b-it", "v1")
+        assert a == b
+
+    def test_model_and_prompt_change_key(self):
+        """Different model or prompt version must not share an entry."""
+        base = build_cache_key("q", ["c1"], "m1", "v1")
+        assert build_cache_key("q", ["c1"], "m2", "v1") != base
+        assert build_cache_key("q", ["c1"], "m1", "v2") != base
+
+
+class TestResponseCache:
+    """Test storage, expiry, eviction and invalidation."""
+
+    def test_roundtrip(self, cache):
+        """Stored payload should come back unchanged."""
+        cache.set("k1", {"answer": "File an FIR."}, store_version="s1", model_id="m")
+        assert cache.get("k1") == {"answer": "File an FIR."}
+        assert cache.get("missing") is None
+
+    def test_ttl_expiry(self, cache):
+        """Entries older than the TTL are treated as misses."""
+        cache.ttl_seconds = 0
+        cache.set("k1", {"answer": "a"}, store_version="s1", model_id="m")
+        time.sleep(0.01)
+        assert cache.get("k1") is None
+
+    def test_lru_eviction(self, cache):
+        """Least recently used entries are evicted above max_entries."""
+        for i in range(4):
+            cache.set(f"k{i}", {"i": i}, store_version="s1", model_id="m")
+            time.sleep(0.01)
+        cache.get("k0")  # refresh k0 so k1 becomes the oldest
+        cache.evict()
+
+        assert cache.stats()["entries"] == 3
+        assert cache.get("k0") is not None
+        assert cache.get("k1") is None
+
+    def test_invalidate_by_store_version(self, cache):
+        """Only entries of the given store version are removed."""
+        cache.set("old", {"a": 1}, store_version="s1", model_id="m")
+        cache.set("new", {"a": 2}, store_version="s2", model_id="m")
+
+        assert cache.invalidate(store_version="s1") == 1
+        assert cache.get("old") is None
+        assert cache.get("new") is not None
+
+    def test_invalidate_keeps_current_version(self, cache):
+        """Without a version, everything but the live version is dropped."""
+        cache.set("a", {"a": 1}, store_version="s1", model_id="m")
+        cache.set("b", {"a": 2}, store_version="s2", model_id="m")
+        cache.set("c", {"a": 3}, store_version="s3", model_id="m")
+
+        assert cache.invalidate(keep_version="s3") == 2
+        assert cache.stats()["by_store_version"] == {"s3": 1}
+
+    def test_shared_between_instances(self, tmp_path):
+        """Two caches on the same file (e.g. two workers) see each other's writes."""
+        path = str(tmp_path / "shared.sqlite3")
+        writer = ResponseCache(path=path)
+        reader = ResponseCache(path=path)
+
+        writer.set("k", {"answer": "shared"}, store_version="s1", model_id="m")
+        assert reader.get("k") == {"answer": "shared"}
+
+
+class TestConnections:
+    """Connections are opened lazily, per thread and per process."""
+
+    def test_no_connection_until_first_use(self, cache):
+        assert getattr(cache._local, "conn", None) is None
+        cache.set("k", {"a": 1}, store_version="s1", model_id="m")
+        assert cache._local.conn is not None
+
+    def test_reopened_in_another_process(self, cache):
+        cache.set("k", {"a": 1}, store_version="s1", model_id="m")
+        inherited = cache._local.conn
+        cache._local.pid = -1  # as seen from a forked child where the fork hook did not run
+        assert cache.get("k") == {"a": 1}
+        assert cache._local.conn is not inherited
+
+    @pytest.mark.skipif(not hasattr(os, "fork"), reason="needs fork()")
+    def test_forked_child_uses_its_own_connection(self, cache):
+        cache.set("parent", {"a": 1}, store_version="s1", model_id="m")
+        parent_conn = cache._local.conn
+        pid = os.fork()
+        if pid == 0:
+            ok = False
+            try:
+                cache.set("child", {"a": 2}, store_version="s1", model_id="m")
+                ok = cache._local.conn is not parent_conn and cache.get("parent") == {"a": 1}
+            finally:
+                os._exit(0 if ok else 1)
+        _, status = os.waitpid(pid, 0)
+        assert os.waitstatus_to_exitcode(status) == 0
+        assert cache.get("child") == {"a": 2}
+
+
+class TestAdminToken:
+    """Admin endpoints (cache invalidation, reload) check the token in constant time."""
+
+    def test_token_checks(self, monkeypatch):
+        monkeypatch.delenv("ADMIN_TOKEN", raising=False)
+        with pytest.raises(HTTPException) as disabled:
+            require_admin("anything")
+        assert disabled.value.status_code == 403
+
+        monkeypatch.setenv("ADMIN_TOKEN", "s3cret")
+        require_admin("s3cret")
+        for token in (None, "", "s3cre", "s3cret ", "S3CRET", "sécret"):
+            with pytest.raises(HTTPException) as rejected:
+                require_admin(token)
+            assert rejected.value.status_code == 401
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
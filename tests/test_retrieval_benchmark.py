@@ -0,0 +1,108 @@
+"""
+Tests for the retrieval benchmark suite (golden set, metrics, staged runner).
+
+Run with: pytest tests/test_retrieval_benchmark.py -v
+"""
+
+import sys
+import types
+from pathlib import Path
+
+import pytest
+
+import src.retrieval.retrieval_engine as retrieval_engine
+from benchmarks.retrieval.golden import load_golden_set, matches, missing_targets
+from benchmarks.retrieval.metrics import first_relevant_rank, latency_summary, quality_summary, recall_at
+from benchmarks.retrieval.run import compare, run_config
+from src.retrieval.chunk_stream import iter_chunks
+from tests.test_chunk_ids import CHUNKS, KeywordModel, write_store
+
+GOLDEN_CHUNKS = Path(__file__).resolve().parent.parent / "legal_chunks.jsonl"
+
+
+def hit(law, section):
+    return {"chunk": {"metadata": {"law": law, "section": section}}}
+
+
+class TestGoldenSet:
+    """The committed golden set is well formed and every target exists in the corpus."""
+
+    def test_loads(self):
+        queries = load_golden_set()
+        assert len(queries) >= 25
+        assert len({q["id"] for q in queries}) == len(queries)
+
+    @pytest.mark.skipif(not GOLDEN_CHUNKS.exists(), reason="chunk file not available")
+    def test_targets_exist_in_corpus(self):
+        assert missing_targets(load_golden_set(), iter_chunks(GOLDEN_CHUNKS)) == []
+
+    def test_match_needs_every_field(self):
+        chunk = hit("BNS", "309")["chunk"]
+        assert matches(chunk, {"law": "BNS", "section": "309"})
+        assert not matches(chunk, {"law": "BNSS", "section": "309"})
+
+
+class TestMetrics:
+    """Rank, recall@k and latency percentiles."""
+
+    def test_rank_and_recall(self):
+        results = [hit("BNS", "303"), hit("BNS", "309"), hit("BNS", "310")]
+        targets = [{"law": "BNS", "section": "309"}, {"law": "BNS", "section": "254"}]
+        assert first_relevant_rank(results, targets) == 2
+        assert first_relevant_rank(results[:1], targets) == 0
+        assert recall_at(results, targets, 1) == 0.0
+        assert recall_at(results, targets, 3) == 0.5
+
+    def test_quality_summary(self):
+        per_query = [{"rank": 1, "recall": {"1": 1.0}}, {"rank": 4, "recall": {"1": 0.0}}, {"rank": 0, "recall": {"1": 0.0}}]
+        assert quality_summary(per_query, [1]) == {"recall@1": 0.3333, "mrr": 0.4167}
+
+    def test_latency_summary(self):
+        summary = latency_summary([i / 1000 for i in range(1, 101)])
+        assert summary["p50"] == pytest.approx(50.5)
+        assert summary["p99"] == pytest.approx(99.01)
+
+
+class TestRunner:
+    """The staged pipeline gives the same ranking as the orchestrator's search path."""
+
+    @pytest.fixture
+    def orchestrator(self, tmp_path, monkeypatch):
+        fake_st = types.ModuleType("sentence_transformers")
+        fake_st.SentenceTransformer = lambda name: KeywordModel()
+        monkeypatch.setitem(sys.modules, "sentence_transformers", fake_st)
+        monkeypatch.setattr(retrieval_engine, "EMBED_BATCHING", False)
+        monkeypatch.setenv("GEMINI_API_KEY", "unused")
+        from src.retrieval.orchestrator import LegalOrchestrator
+        return LegalOrchestrator(str(write_store(tmp_path, CHUNKS)))
+
+    GOLDEN = [
+        {"id": "q1", "query": "theft", "expected": [{"law": "BNS", "section": "303"}]},
+        {"id": "q2", "query": "zero fir", "expected": [{"law": "BNSS", "section": "173"}]},
+    ]
+
+    @pytest.mark.parametrize("weight", [0.5, None])
+    def test_config_report(self, orchestrator, weight):
+        report = run_config(orchestrator, self.GOLDEN, weight, k=3, cutoffs=[1, 3], repeat=2)
+
+        assert report["queries"] == 4
+        assert report["quality"]["mrr"] == 1.0
+        stages = set(report["latency_ms"])
+        assert {"bm25", "fusion", "prioritize", "expand", "total"} <= stages
+        assert ("encode" in stages) == (weight is not None)
+
+        served = orchestrator.search("theft", k=3, hybrid_weight=0.5)
+        if weight is not None:
+            assert report["per_query"][0]["top"] == [r["chunk"]["chunk_id"] for r in served][:3]
+
+    def test_compare_lists_changed_ranks(self, orchestrator):
+        before = {"configs": [run_config(orchestrator, self.GOLDEN, 0.5, k=3, cutoffs=[1], repeat=1)]}
+        after = {"configs": [run_config(orchestrator, self.GOLDEN, 0.5, k=3, cutoffs=[1], repeat=1)]}
+        after["configs"][0]["per_query"][1]["rank"] = 2
+        row = compare(before, after)[0]
+        assert row["rank_changed"] == ["q2"]
+        assert row["metrics"]["mrr"] == (1.0, 1.0)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,116 @@
+"""
+Tests for the retrieval-only GET/POST /api/v1/search endpoints (filters, ETags, 304s).
+
+Run with: pytest tests/test_search_api.py -v
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+
+import src.server.app as app_module
+from src.server.engine_manager import EngineManager
+from tests.test_batch_query import HIT, StubEngine, client, manager  # noqa: F401 - fixtures
+
+
+def searches(manager):
+    return manager.engine.orchestrator.searches
+
+
+class TestSearchEndpoints:
+    """GET and POST run the same search and return the same hits."""
+
+    def test_get(self, client, manager):
+        response = client.get("/api/v1/search", params={"q": "zero FIR", "k": 3, "hybrid_weight": 0.7})
+        assert response.status_code == 200
+        body = response.json()
+        assert body["query"] == "zero FIR"
+        assert body["store_version"] == "v-test"
+        assert body["hits"][0]["chunk_id"] == HIT["chunk"]["chunk_id"]
+        assert body["hits"][0]["text"] == HIT["chunk"]["text"]
+        assert response.headers["Cache-Control"] == app_module.SEARCH_CACHE_CONTROL
+        assert searches(manager) == [{"query": "zero FIR", "k": 3, "hybrid_weight": 0.7, "filters": None}]
+
+    def test_post_matches_get(self, client):
+        get = client.get("/api/v1/search", params={"q": "zero FIR"})
+        post = client.post("/api/v1/search", json={"query": "zero FIR"})
+        assert post.status_code == 200
+        assert post.json()["hits"] == get.json()["hits"]
+        assert post.headers["ETag"] == get.headers["ETag"]
+
+    def test_without_text(self, client):
+        hit = client.get("/api/v1/search", params={"q": "zero FIR", "include_text": "false"}).json()["hits"][0]
+        assert hit["text"] is None
+        assert hit["parent_context"] is None
+
+    def test_engine_not_loaded(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(app_module, "engine_manager", EngineManager(tmp_path, factory=StubEngine))
+        response = TestClient(app_module.app).get("/api/v1/search", params={"q": "zero FIR"})
+        assert response.status_code == 503
+
+
+class TestFilters:
+    """`filter=field:value` query parameters become the filters dict; malformed ones are a 400."""
+
+    def test_repeated_filters(self, client, manager):
+        response = client.get("/api/v1/search?q=fir&filter=law:BNSS&filter=law: SOP&filter=unit_type:section")
+        assert response.status_code == 200
+        assert searches(manager)[-1]["filters"] == {"law": ["BNSS", "SOP"], "unit_type": ["section"]}
+
+    def test_value_may_contain_colons(self, client, manager):
+        client.get("/api/v1/search", params={"q": "fir", "filter": "chapter:CHAPTER XIII: GENERAL"})
+        assert searches(manager)[-1]["filters"] == {"chapter": ["CHAPTER XIII: GENERAL"]}
+
+    def test_malformed_filter(self, client, manager):
+        response = client.get("/api/v1/search", params={"q": "fir", "filter": "BNSS"})
+        assert response.status_code == 400
+        assert "field:value" in response.json()["detail"]
+        assert searches(manager) == []
+
+    def test_unsupported_field(self, client):
+        response = client.post("/api/v1/search", json={"query": "fir", "filters": {"bogus": "x"}})
+        assert response.status_code == 400
+        assert "bogus" in response.json()["detail"]
+
+
+class TestETags:
+    """Conditional requests get a 304 without running the search."""
+
+    def etag(self, client, **params):
+        return client.get("/api/v1/search", params={"q": "zero FIR", **params}).headers["ETag"]
+
+    @pytest.mark.parametrize("header", ["{etag}", "W/{etag}", '"other", W/{etag}', '"other",{etag}'])
+    def test_not_modified(self, client, manager, header):
+        etag = self.etag(client)
+        response = client.get("/api/v1/search", params={"q": "zero FIR"},
+                              headers={"If-None-Match": header.format(etag=etag)})
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["ETag"] == etag
+        assert len(searches(manager)) == 1
+
+    def test_stale_etag_runs_search(self, client, manager):
+        response = client.get("/api/v1/search", params={"q": "zero FIR"}, headers={"If-None-Match": '"stale"'})
+        assert response.status_code == 200
+        assert len(searches(manager)) == 1
+
+    def test_post_not_modified(self, client):
+        etag = client.post("/api/v1/search", json={"query": "zero FIR"}).headers["ETag"]
+        response = client.post("/api/v1/search", json={"query": "zero FIR"}, headers={"If-None-Match": etag})
+        assert response.status_code == 304
+
+    def test_etag_depends_on_request_and_store(self, client, manager):
+        base = self.etag(client)
+        assert self.etag(client, k=3) != base
+        assert self.etag(client, filter="law:BNSS") != base
+        manager.engine.store_version = "v-next"
+        assert self.etag(client) != base
+
+    def test_case_variants_get_their_own_etag(self, client):
+        lower = client.get("/api/v1/search", params={"q": "zero fir"})
+        upper = client.get("/api/v1/search", params={"q": "Zero FIR"})
+        assert lower.json()["query"] != upper.json()["query"]
+        assert lower.headers["ETag"] != upper.headers["ETag"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
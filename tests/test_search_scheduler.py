@@ -0,0 +1,142 @@
+"""
+Tests for the batched FAISS search scheduler.
+
+Run with: pytest tests/test_search_scheduler.py -v
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import faiss
+import numpy as np
+import pytest
+
+from src.retrieval.search_scheduler import SearchScheduler
+
+DIM = 16
+
+
+class CountingIndex:
+    """Wraps a FAISS index, recording the row count of every search and optionally slowing it down."""
+
+    def __init__(self, index, delay: float = 0.0):
+        self.index = index
+        self.delay = delay
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def search(self, matrix, k, params=None):
+        with self.lock:
+            self.calls.append(len(matrix))
+        time.sleep(self.delay)
+        if params is None:
+            return self.index.search(matrix, k)
+        return self.index.search(matrix, k, params=params)
+
+
+@pytest.fixture
+def index():
+    rng = np.random.default_rng(7)
+    vectors = rng.standard_normal((500, DIM)).astype(np.float32)
+    faiss.normalize_L2(vectors)
+    flat = faiss.IndexFlatIP(DIM)
+    flat.add(vectors)
+    return flat
+
+
+def queries(n: int, seed: int = 11) -> np.ndarray:
+    vectors = np.random.default_rng(seed).standard_normal((n, DIM)).astype(np.float32)
+    faiss.normalize_L2(vectors)
+    return vectors
+
+
+class TestSearchScheduler:
+    """Scheduled searches return exactly what a direct index.search would."""
+
+    def test_matches_direct_search(self, index):
+        scheduler = SearchScheduler(index, max_wait_ms=0)
+        q = queries(3)
+        distances, indices = scheduler.search(q, 10)
+        expected_d, expected_i = index.search(q, 10)
+        assert np.array_equal(indices, expected_i)
+        assert np.allclose(distances, expected_d)
+
+    def test_concurrent_requests_are_coalesced(self, index):
+        counting = CountingIndex(index, delay=0.02)
+        scheduler = SearchScheduler(counting, max_batch=64, max_wait_ms=20)
+        q = queries(16)
+        ks = [5 + (i % 3) * 5 for i in range(16)]
+
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            results = list(pool.map(lambda i: scheduler.search(q[i:i + 1], ks[i]), range(16)))
+
+        for i, (distances, indices) in enumerate(results):
+            expected_d, expected_i = index.search(q[i:i + 1], ks[i])
+            assert indices.shape == (1, ks[i])
+            assert np.array_equal(indices, expected_i)
+            assert np.allclose(distances, expected_d)
+        assert len(counting.calls) < 16
+        assert sum(counting.calls) == 16
+
+    def test_filtered_requests_search_their_own_rows(self, index):
+        counting = CountingIndex(index, delay=0.02)
+        scheduler = SearchScheduler(counting, max_wait_ms=20)
+        allowed_a = np.arange(0, 100, dtype="int64")
+        allowed_b = np.arange(200, 260, dtype="int64")
+        q = queries(6)
+        jobs = [(0, None), (1, allowed_a), (2, allowed_b), (3, allowed_a), (4, None), (5, allowed_b)]
+
+        with ThreadPoolExecutor(max_workers=6) as pool:
+            results = list(pool.map(lambda job: scheduler.search(q[job[0]:job[0] + 1], 5, job[1]), jobs))
+
+        for (row, allowed), (_, indices) in zip(jobs, results):
+            if allowed is None:
+                assert np.array_equal(indices, index.search(q[row:row + 1], 5)[1])
+            else:
+                assert set(indices[0]) <= set(allowed)
+
+    def test_error_reaches_caller(self, index):
+        scheduler = SearchScheduler(index, max_wait_ms=0)
+        with pytest.raises(Exception):
+            scheduler.search(np.zeros((1, DIM + 1), dtype=np.float32), 5)
+        assert scheduler.search(queries(1), 3)[1].shape == (1, 3)
+
+
+class ThresholdIndex(CountingIndex):
+    """Records the BLAS threshold FAISS sees during each search."""
+
+    def __init__(self, index, delay: float = 0.0):
+        super().__init__(index, delay)
+        self.thresholds = []
+
+    def search(self, matrix, k, params=None):
+        time.sleep(self.delay)
+        self.thresholds.append(faiss.cvar.distance_compute_blas_threshold)
+        return super().search(matrix, k, params)
+
+
+class TestBlasThreshold:
+    """Two schedulers (old and new engine during a reload) never see each other's threshold."""
+
+    def test_concurrent_schedulers_keep_their_own_threshold(self, index):
+        default = faiss.cvar.distance_compute_blas_threshold
+        big, small = ThresholdIndex(index, delay=0.002), ThresholdIndex(index, delay=0.002)
+        big_scheduler = SearchScheduler(big, max_wait_ms=0, blas_min_rows=2)
+        small_scheduler = SearchScheduler(small, max_wait_ms=0, blas_min_rows=2)
+
+        def run(scheduler, rows):
+            for seed in range(20):
+                scheduler.search(queries(rows, seed), 3)
+
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            list(pool.map(lambda args: run(*args), [(big_scheduler, 4), (small_scheduler, 1)]))
+
+        assert big.thresholds and set(big.thresholds) == {1}
+        assert small.thresholds and set(small.thresholds) == {default}
+        small_scheduler.search(queries(1), 3)
+        assert faiss.cvar.distance_compute_blas_threshold == default
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
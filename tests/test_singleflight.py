@@ -0,0 +1,147 @@
+"""
+Tests for request coalescing (single-flight).
+
+Run with: pytest tests/test_singleflight.py -v
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+from src.retrieval.metrics import metrics
+from src.retrieval.singleflight import AsyncSingleFlight, SingleFlight
+
+
+class TestSingleFlight:
+    """Test thread-level coalescing."""
+
+    def test_concurrent_calls_share_one_execution(self):
+        """Only the first caller runs the function; the rest get its result."""
+        flight = SingleFlight("test.threads")
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        def work():
+            calls.append(1)
+            started.set()
+            release.wait(2)
+            return "answer"
+
+        results = []
+        leader = threading.Thread(target=lambda: results.append(flight.do("q", work)))
+        leader.start()
+        started.wait(2)
+
+        followers = [threading.Thread(target=lambda: results.append(flight.do("q", work))) for _ in range(4)]
+        for t in followers:
+            t.start()
+        time.sleep(0.05)
+        release.set()
+        for t in [leader] + followers:
+            t.join(2)
+
+        assert calls == [1]
+        assert results == ["answer"] * 5
+        assert metrics.get("test.threads.coalesced") == 4
+        assert flight.in_flight() == 0
+
+    def test_errors_propagate_to_waiters(self):
+        """Waiters receive the leader's exception."""
+        flight = SingleFlight("test.errors")
+        started = threading.Event()
+        errors = []
+
+        def failing():
+            started.set()
+            time.sleep(0.05)
+            raise RuntimeError("LLM quota exceeded")
+
+        def call():
+            try:
+                flight.do("q", failing)
+            except RuntimeError as e:
+                errors.append(str(e))
+
+        leader = threading.Thread(target=call)
+        leader.start()
+        started.wait(2)
+        follower = threading.Thread(target=call)
+        follower.start()
+        leader.join(2)
+        follower.join(2)
+
+        assert errors == ["LLM quota exceeded"] * 2
+
+    def test_waiter_timeout(self):
+        """A waiter gives up after its own timeout without affecting the leader."""
+        flight = SingleFlight("test.timeout")
+        started = threading.Event()
+        results = []
+
+        def slow():
+            started.set()
+            time.sleep(0.2)
+            return "done"
+
+        leader = threading.Thread(target=lambda: results.append(flight.do("q", slow)))
+        leader.start()
+        started.wait(2)
+
+        with pytest.raises(TimeoutError):
+            flight.do("q", slow, timeout=0.01)
+        leader.join(2)
+
+        assert results == ["done"]
+
+    def test_different_keys_run_independently(self):
+        """Different keys are never coalesced."""
+        flight = SingleFlight("test.keys")
+        assert flight.do("a", lambda: 1) == 1
+        assert flight.do("b", lambda: 2) == 2
+
+
+class TestAsyncSingleFlight:
+    """Test event-loop coalescing used by the server."""
+
+    def test_concurrent_awaits_share_one_execution(self):
+        """Concurrent awaits with the same key run the coroutine once."""
+        flight = AsyncSingleFlight("test.async")
+        calls = []
+
+        async def work():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return {"answer": "File an FIR."}
+
+        async def main():
+            return await asyncio.gather(*[flight.do("q", work) for _ in range(5)])
+
+        results = asyncio.run(main())
+
+        assert calls == [1]
+        assert all(r == {"answer": "File an FIR."} for r in results)
+        assert metrics.get("test.async.coalesced") == 4
+
+    def test_timeout_does_not_cancel_shared_work(self):
+        """A timed-out waiter leaves the computation running for others."""
+        flight = AsyncSingleFlight("test.async_timeout")
+
+        async def work():
+            await asyncio.sleep(0.05)
+            return "done"
+
+        async def impatient():
+            with pytest.raises(asyncio.TimeoutError):
+                await flight.do("q", work, timeout=0.001)
+
+        async def main():
+            _, result = await asyncio.gather(impatient(), flight.do("q", work, timeout=1))
+            return result
+
+        assert asyncio.run(main()) == "done"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
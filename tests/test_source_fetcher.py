@@ -7,8 +7,11 @@ Ensures verbatim source content is returned without LLM involvement.
 Run with: pytest tests/test_source_fetcher.py -v
 """
 
+import os
+
 import pytest
-from src.server.source_fetcher import fetch_source_content
+from src.retrieval.source_index import SourceIndex, build_source_index, write_source_index
+from src.server.source_fetcher import chunk_highlights, fetch_source_content, normalize_source_id, resolve_source
 from src.server.schemas import SourceType, SourceResponse
 
 
@@ -56,6 +59,31 @@ class TestSourceFetcher:
         assert result is not None
         assert "183" in result.section_id
     
+    def test_fetch_bnss_section_with_act_year(self):
+        """The act's year is not taken for the section number."""
+        result = fetch_source_content(SourceType.BNSS, "BNSS 2023 Section 183")
+
+        assert result is not None
+        assert result.section_id == "183"
+
+    def test_fetch_bnss_section_by_canonical_header(self):
+        """A chunk's canonical_header resolves to its section."""
+        header = ("Bharatiya Nagarik Suraksha Sanhita, 2023\n"
+                  "CHAPTER XIII – INFORMATION TO THE POLICE AND THEIR POWERS TO INVESTIGATE\n"
+                  "Section 183 – Recording of confessions and statements\nSub-section (2)")
+        result = fetch_source_content(SourceType.BNSS, header)
+
+        assert result is not None
+        assert result.section_id == "183"
+
+    @pytest.mark.parametrize("source_id, expected", [
+        ("Sec. 183(2)", "183"), ("s. 64A", "64A"), ("§ 183", "183"), ("183(2)", "183"),
+        ("BNSS 2023", None), ("2023", None), ("Section 2023", None),
+    ])
+    def test_normalize_section_ids(self, source_id, expected):
+        """A bare number only counts when the id is just that number; years never do."""
+        assert normalize_source_id(SourceType.BNSS, source_id) == expected
+
     def test_fetch_nonexistent_source(self):
         """Should return None for non-existent sources."""
         result = fetch_source_content(SourceType.GENERAL_SOP, "GSOP_99999")
@@ -187,5 +215,89 @@ class TestHighlightComputation:
         assert result_with_highlight.highlights[0].start == 0
 
 
+class TestChunkHighlights:
+    """Highlights taken from a chunk's recorded source span."""
+
+    SECTION_183_SUB_2 = {
+        "path": "BNSS/chapter_xiii_information_to_the_police_and_their_powers_to_investigate.md",
+        "start": 16016, "end": 16385, "line_start": 162, "line_end": 162,
+    }
+
+    def test_span_maps_to_characters_of_the_content(self):
+        """The highlight covers exactly the chunk's bytes within the section text."""
+        result = fetch_source_content(SourceType.BNSS, "183", chunk_source=self.SECTION_183_SUB_2)
+        assert result is not None
+        assert len(result.highlights) == 1
+
+        highlight = result.highlights[0]
+        assert result.content[highlight.start:highlight.end].startswith("**(2)**")
+        assert highlight.reason == "Retrieved passage"
+
+    def test_span_in_another_file_is_ignored(self):
+        """A span from a different document falls back to snippet highlighting."""
+        _, entry = resolve_source(SourceType.BNSS, "183")
+        assert chunk_highlights(entry, {**self.SECTION_183_SUB_2, "path": "BNS/other.md"}) == []
+        assert chunk_highlights(entry, {}) == []
+
+    def test_span_is_clipped_to_the_section(self):
+        """A span running past the section is cut at its end."""
+        _, entry = resolve_source(SourceType.BNSS, "183")
+        span = {**self.SECTION_183_SUB_2, "end": entry["offset"] + entry["length"] + 500}
+        content = fetch_source_content(SourceType.BNSS, "183").content
+        assert chunk_highlights(entry, span)[0].end == len(content)
+
+
+class TestSourceIndexStaleness:
+    """A prebuilt index is only reused while the documents still match it byte for byte."""
+
+    SECTION = "# CHAPTER I\n\n## Section 1 — Short title\n\nThis Act may be called the {name}, 2023.\n"
+
+    @pytest.fixture
+    def built(self, tmp_path):
+        docs = tmp_path / "documents"
+        (docs / "BNS").mkdir(parents=True)
+        doc = docs / "BNS" / "chapter_i.md"
+        doc.write_text(self.SECTION.format(name="Nyaya Sanhita"), encoding="utf-8")
+        index_path = tmp_path / "source_index.json"
+        write_source_index(build_source_index(str(docs)), str(index_path))
+        return docs, doc, index_path
+
+    def test_same_length_edit_rebuilds(self, built, caplog):
+        docs, doc, index_path = built
+        stat = doc.stat()
+        doc.write_text(self.SECTION.format(name="Nyaya Samhita"), encoding="utf-8")
+        os.utime(doc, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        assert doc.stat().st_size == stat.st_size
+
+        index = SourceIndex.load(str(index_path), str(docs))
+        assert "is stale" in caplog.text
+        assert "Nyaya Samhita" in index.read(index.get("bns:1"))
+
+    def test_touched_file_with_same_content_is_reused(self, built, caplog):
+        docs, doc, index_path = built
+        os.utime(doc, ns=(doc.stat().st_atime_ns, doc.stat().st_mtime_ns + 1_000_000_000))
+
+        index = SourceIndex.load(str(index_path), str(docs))
+        assert "is stale" not in caplog.text
+        assert "Nyaya Sanhita" in index.read(index.get("bns:1"))
+
+    def test_added_file_rebuilds(self, built, caplog):
+        docs, _, index_path = built
+        (docs / "BNS" / "chapter_ii.md").write_text(
+            "# CHAPTER II\n\n## Section 2 — Definitions\n\nIn this Sanhita, unless the context otherwise requires.\n",
+            encoding="utf-8")
+
+        index = SourceIndex.load(str(index_path), str(docs))
+        assert "is stale" in caplog.text
+        assert "Definitions" in index.get("bns:2")["title"]
+
+    def test_old_version_rebuilds(self, built, caplog):
+        docs, _, index_path = built
+        index = build_source_index(str(docs))
+        write_source_index({**index, "version": 1}, str(index_path))
+        SourceIndex.load(str(index_path), str(docs))
+        assert "is stale" in caplog.text
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
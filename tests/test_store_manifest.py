@@ -0,0 +1,142 @@
+"""
+Tests for the store manifest, load-time validation and staged (atomic) version builds.
+
+Run with: pytest tests/test_store_manifest.py -v
+"""
+
+import json
+import sys
+import types
+
+import pytest
+
+import src.retrieval.retrieval_engine as retrieval_engine
+from src.retrieval.retrieval_engine import RetrievalEngine
+from src.retrieval.store import (MANIFEST_FILE, StoreValidationError, finalize_version, new_staging_dir,
+                                 new_version_dir, prune_versions, read_faiss_header, store_version, validate_store,
+                                 verify_checksums, write_manifest)
+from tests.test_chunk_ids import CHUNKS, KeywordModel, write_store
+
+MODEL = "keyword-model"
+
+
+class SizedKeywordModel(KeywordModel):
+    def __init__(self, dimension=3):
+        self.dimension = dimension
+
+    def get_embedding_dimension(self):
+        return self.dimension
+
+
+@pytest.fixture
+def store(tmp_path):
+    path = write_store(tmp_path / "store", CHUNKS)
+    write_manifest(path, MODEL, 3, len(CHUNKS), build={"faiss_index": "IndexIDMap(IndexFlatIP)"})
+    return path
+
+
+@pytest.fixture
+def load_engine(monkeypatch):
+    def load(path, model=None, model_name=MODEL):
+        fake_st = types.ModuleType("sentence_transformers")
+        fake_st.SentenceTransformer = lambda name: model or SizedKeywordModel()
+        monkeypatch.setitem(sys.modules, "sentence_transformers", fake_st)
+        monkeypatch.setenv("EMBEDDING_MODEL", model_name)
+        return RetrievalEngine(str(path))
+
+    monkeypatch.setattr(retrieval_engine, "EMBED_BATCHING", False)
+    return load
+
+
+class TestManifest:
+    """The manifest lists every file with its size and checksum; loading only checks sizes and headers."""
+
+    def test_contents(self, store):
+        manifest = validate_store(store)
+        assert manifest["embedding"] == {"model": MODEL, "dimension": 3, "normalized": True}
+        assert manifest["chunk_count"] == 3
+        assert set(manifest["files"]) == {"index.faiss", "metadata.json", "bm25.pkl", "chunk_ids.json"}
+        assert read_faiss_header(store / "index.faiss") == ("IxMp", 3, 3)
+
+    def test_store_without_manifest_is_not_validated(self, tmp_path):
+        assert validate_store(write_store(tmp_path, CHUNKS)) is None
+
+    def test_truncated_file(self, store):
+        data = (store / "metadata.json").read_bytes()
+        (store / "metadata.json").write_bytes(data[:-10])
+        with pytest.raises(StoreValidationError, match="bytes"):
+            validate_store(store)
+
+    def test_missing_file(self, store):
+        (store / "chunk_ids.json").unlink()
+        with pytest.raises(StoreValidationError, match="missing"):
+            validate_store(store)
+
+    def test_unknown_schema(self, store):
+        manifest = json.loads((store / MANIFEST_FILE).read_text())
+        (store / MANIFEST_FILE).write_text(json.dumps({**manifest, "schema_version": 99}))
+        with pytest.raises(StoreValidationError, match="schema"):
+            validate_store(store)
+
+    def test_index_header_must_match(self, store):
+        write_manifest(store, MODEL, 384, len(CHUNKS))
+        with pytest.raises(StoreValidationError, match="dimension"):
+            validate_store(store)
+
+    def test_checksums_catch_same_size_corruption(self, store):
+        data = bytearray((store / "metadata.json").read_bytes())
+        data[5] ^= 1
+        (store / "metadata.json").write_bytes(bytes(data))
+        validate_store(store)  # sizes still match
+        assert verify_checksums(store) == ["metadata.json"]
+
+    def test_version_follows_manifest(self, store):
+        before = store_version(store)
+        write_manifest(store, MODEL, 3, len(CHUNKS), build={"note": "rebuilt"})
+        assert store_version(store) != before
+
+
+class TestEngineValidation:
+    """RetrievalEngine refuses stores that do not match their manifest or the configured model."""
+
+    def test_loads_a_valid_store(self, store, load_engine):
+        engine = load_engine(store)
+        assert engine.manifest["chunk_count"] == 3
+        assert engine.search("theft", k=1)[0]["chunk"]["metadata"]["section"] == "303"
+
+    def test_chunk_count_mismatch(self, store, load_engine):
+        write_manifest(write_store(store, CHUNKS[:2]), MODEL, 3, 3)
+        with pytest.raises(StoreValidationError):
+            load_engine(store)
+
+    def test_other_embedding_model(self, store, load_engine):
+        with pytest.raises(StoreValidationError, match="built with keyword-model"):
+            load_engine(store, model_name="other-model")
+
+    def test_model_dimension_mismatch(self, store, load_engine):
+        with pytest.raises(StoreValidationError, match="384-d"):
+            load_engine(store, model=SizedKeywordModel(384))
+
+
+class TestStagedBuilds:
+    """A build becomes a version only once finished; unfinished builds are never listed or pruned."""
+
+    def test_finalize_renames_staging_dir(self, tmp_path):
+        staging = new_staging_dir(tmp_path)
+        (staging / "metadata.json").write_text("[]")
+        assert staging.name.startswith(".")
+
+        version = finalize_version(staging)
+        assert not staging.exists()
+        assert (version / "metadata.json").exists()
+        assert version.parent == tmp_path / "versions" and not version.name.startswith(".")
+
+    def test_prune_ignores_staging_dirs(self, tmp_path):
+        staging = new_staging_dir(tmp_path)
+        new_version_dir(tmp_path)
+        assert staging.name not in prune_versions(tmp_path, keep=0)
+        assert staging.exists()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
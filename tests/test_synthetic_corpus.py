@@ -0,0 +1,72 @@
+"""
+Tests for the synthetic corpus generator and the scaling script's cache seeding.
+
+Run with: pytest tests/test_synthetic_corpus.py -v
+"""
+
+import json
+from collections import Counter
+
+import numpy as np
+import pytest
+
+from benchmarks.retrieval.golden import load_golden_set, missing_targets
+from benchmarks.scaling import seed_random_vectors
+from benchmarks.synthetic_corpus import generate_corpus
+from ingest_legal_docs import expand_manifest, load_manifest, parse_documents
+from src.retrieval.embedding_cache import EmbeddingCache, text_hash
+
+
+@pytest.fixture(scope="module")
+def corpus(tmp_path_factory):
+    out = tmp_path_factory.mktemp("synthetic")
+    stats = generate_corpus(out, 3000, seed=7, golden_queries=20)
+    jobs = expand_manifest(load_manifest(str(out / "ingest_manifest.json")), str(out / "documents"))
+    return out, stats, parse_documents(jobs)
+
+
+class TestGenerator:
+    """The parser reads the generated markdown into the counted number of chunks, of every unit type."""
+
+    def test_chunk_count_matches_parse(self, corpus):
+        _, stats, chunks = corpus
+        assert stats["chunks"] == len(chunks)
+        assert 3000 <= len(chunks) < 3010
+
+    def test_unit_types(self, corpus):
+        _, _, chunks = corpus
+        units = Counter(c.metadata["unit_type"] for c in chunks)
+        assert {"section", "sub_section", "illustration", "explanation", "step"} <= set(units)
+        assert 0.05 < units["step"] / len(chunks) < 0.25
+
+    def test_golden_targets_exist(self, corpus):
+        out, _, chunks = corpus
+        golden = load_golden_set(out / "golden_set.json")
+        assert len(golden) == 20
+        assert missing_targets(golden, ({"metadata": c.metadata} for c in chunks)) == []
+
+    def test_same_seed_same_corpus(self, corpus, tmp_path):
+        out, _, _ = corpus
+        generate_corpus(tmp_path, 3000, seed=7, golden_queries=20)
+        for path in (out / "documents").rglob("*.md"):
+            assert (tmp_path / path.relative_to(out)).read_text() == path.read_text()
+
+
+class TestSeedRandomVectors:
+    """Every chunk text gets a unit vector under the model name the build looks up."""
+
+    def test_seed(self, tmp_path):
+        texts = ["alpha", "beta", "alpha", "gamma"]
+        chunks_path = tmp_path / "chunks.jsonl"
+        chunks_path.write_text("".join(json.dumps({"text": t}) + "\n" for t in texts))
+
+        assert seed_random_vectors(chunks_path, tmp_path / "cache.sqlite3", "model-a", dim=8, batch=2) == 3
+        cache = EmbeddingCache(str(tmp_path / "cache.sqlite3"))
+        vectors = cache.get_many("model-a", [text_hash(t) for t in texts])
+        cache.close()
+        assert len(vectors) == 3
+        assert all(np.isclose(np.linalg.norm(v), 1.0) for v in vectors.values())
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
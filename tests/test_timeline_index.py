@@ -0,0 +1,92 @@
+"""
+Tests for the ingest-time timeline index and how the adapter uses it for confidence.
+
+Run with: pytest tests/test_timeline_index.py -v
+"""
+
+import json
+
+import pytest
+
+import src.server.adapter as adapter
+from src.retrieval.timeline_index import (SCOPE_ALL, SCOPE_SEXUAL_OFFENCE, TimelineIndex, build_timeline_index,
+                                          write_timeline_index)
+from src.server.schemas import ConfidenceLevel
+
+CHUNKS = [
+    {"chunk_id": "BNSS/s173/ss1/sub_section:aaa", "text": "The information shall be recorded immediately.",
+     "metadata": {"law": "BNSS", "section": "173", "section_title": "Information in cognizable cases",
+                  "unit_type": "sub_section"}},
+    {"chunk_id": "BNS/s303/section:bbb", "text": "Whoever commits theft within 3 days...",
+     "metadata": {"law": "BNS", "section": "303", "section_title": "Theft", "unit_type": "section"}},
+    {"chunk_id": "SOP/step02:ccc", "text": "Send the victim for examination within 24 hours.",
+     "metadata": {"law": "SOP", "law_name": "SOP on Rape", "step": "02", "section_title": "Medical examination",
+                  "unit_type": "step", "source_file": "sop_rape_against_women.md"}},
+    {"chunk_id": "BNSS/s176/section:ddd", "text": "The officer shall proceed with the investigation forthwith.",
+     "metadata": {"law": "BNSS", "section": "176", "section_title": "Procedure for investigation",
+                  "unit_type": "section"}},
+]
+
+
+def entry_ids(index, scopes):
+    return {stage: [e["chunk_id"] for e in entries] for stage, entries in index.lookup(scopes).items()}
+
+
+class TestTimelineIndex:
+    """Entries point at chunks by their stable id, not by row position."""
+
+    def test_entries_carry_chunk_ids(self):
+        index = TimelineIndex(build_timeline_index(CHUNKS))
+        assert len(index) == 3
+        assert entry_ids(index, [SCOPE_ALL]) == {
+            "fir_registration": ["BNSS/s173/ss1/sub_section:aaa"],
+            "investigation_commencement": ["BNSS/s176/section:ddd"],
+        }
+        assert entry_ids(index, [SCOPE_ALL, SCOPE_SEXUAL_OFFENCE])["medical_examination"] == ["SOP/step02:ccc"]
+
+    def test_ids_survive_a_reordered_rebuild(self):
+        before = entry_ids(TimelineIndex(build_timeline_index(CHUNKS)), [SCOPE_ALL, SCOPE_SEXUAL_OFFENCE])
+        after = entry_ids(TimelineIndex(build_timeline_index(CHUNKS[::-1])), [SCOPE_ALL, SCOPE_SEXUAL_OFFENCE])
+        assert before == after
+
+    def test_round_trip_and_old_format_rebuild(self, tmp_path):
+        path = tmp_path / "timeline_index.json"
+        write_timeline_index(build_timeline_index(CHUNKS), str(path))
+        assert entry_ids(TimelineIndex.load(str(path)), [SCOPE_ALL])["fir_registration"] == \
+            ["BNSS/s173/ss1/sub_section:aaa"]
+
+        # Version 1 stored row positions under "chunk"; it is rebuilt from the chunk file instead
+        path.write_text(json.dumps({"version": 1, "chunk": [0]}), encoding="utf-8")
+        chunks_path = tmp_path / "chunks.jsonl"
+        chunks_path.write_text("".join(json.dumps(c) + "\n" for c in CHUNKS), encoding="utf-8")
+        assert len(TimelineIndex.load(str(path), [str(chunks_path)])) == 3
+
+
+class TestAnchorConfidence:
+    """Confidence only counts anchors as resolved when a source actually backs them."""
+
+    RESULT = {
+        "case_type": "robbery",
+        "citations": ["BNSS Section 173"],
+        "answer": "File an FIR at the nearest police station.",
+        "retrieval": {"sop_blocks": [], "general_sop_blocks": []},
+    }
+
+    @pytest.fixture
+    def use_index(self, monkeypatch):
+        return lambda chunks: monkeypatch.setattr(adapter, "_index", TimelineIndex(build_timeline_index(chunks)))
+
+    def test_resolved_anchors_give_high(self, use_index):
+        use_index(CHUNKS)
+        assert adapter.adapt_response(self.RESULT, "I was robbed").confidence == ConfidenceLevel.HIGH
+
+    def test_unmatched_anchor_lowers_confidence(self, use_index):
+        # No investigation entry: the robbery anchor has no source, though no notice is raised outside Tier 1
+        use_index(CHUNKS[:3])
+        response = adapter.adapt_response(self.RESULT, "I was robbed")
+        assert response.system_notice is None
+        assert response.confidence == ConfidenceLevel.LOW
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])